@@ -0,0 +1,89 @@
+"""
+Compara el runner de hilos (fetch_many) con el motor asyncio (fetch_many_async)
+contra un servidor HTTP local que imita la API de TwelveData con una latencia fija.
+Sin red ni API keys:
+
+    python -m benchmarks.bench_fetch_engines --symbols 500 --latency-ms 80
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.extractors.httpclient import RateLimiter
+from src.extractors.runner import fetch_many, fetch_many_async
+from src.extractors.twelvedata_extractor import TwelveDataExtractor
+from src.normalization.normalizer import Normalizer
+
+
+def _payload(n_bars: int) -> bytes:
+    values = [{"datetime": f"2024-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}", "open": "100.0",
+               "high": "101.0", "low": "99.0", "close": "100.5", "volume": "1000"}
+              for i in range(n_bars)]
+    return json.dumps({"meta": {"interval": "1day"}, "values": values, "status": "ok"}).encode()
+
+
+def start_server(latency_ms: float, n_bars: int):
+    body = _payload(n_bars)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/time_series"
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark: motor de hilos vs asyncio")
+    p.add_argument("--symbols", type=int, default=200)
+    p.add_argument("--latency-ms", type=float, default=80)
+    p.add_argument("--bars", type=int, default=250)
+    p.add_argument("--max-workers", type=int, default=8)
+    p.add_argument("--concurrency", type=int, default=64)
+    args = p.parse_args()
+
+    server, url = start_server(args.latency_ms, args.bars)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    norm = Normalizer()
+    normalize_one = lambda raw, s: norm.normalize_twelvedata_timeseries(raw, s)
+    results = {}
+
+    # Sin límite de peticiones: se mide solo el motor
+    ex = TwelveDataExtractor("bench", max_workers=args.max_workers, rate_limiter=RateLimiter())
+    ex.BASE = url
+    t0 = time.perf_counter()
+    fetch_many(symbols, lambda s: ex.history(s), normalize_one, max_workers=args.max_workers)
+    results["thread"] = time.perf_counter() - t0
+
+    ex = TwelveDataExtractor("bench", rate_limiter=RateLimiter())
+    ex.BASE = url
+    t0 = time.perf_counter()
+    fetch_many_async(symbols, lambda s: ex.ahistory(s), normalize_one,
+                     concurrency=args.concurrency, on_close=ex.aclose)
+    results["async"] = time.perf_counter() - t0
+    server.shutdown()
+
+    print("\n" + "=" * 50)
+    print(f"{args.symbols} símbolos | latencia {args.latency_ms:.0f} ms | {args.bars} barras")
+    for engine, secs in results.items():
+        print(f"  {engine:<7} {secs:8.2f} s  ({args.symbols / secs:8.1f} símbolos/s)")
+    print(f"  Aceleración async/thread: x{results['thread'] / results['async']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
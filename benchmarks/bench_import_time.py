@@ -0,0 +1,75 @@
+"""
+Presupuesto de tiempo de arranque de la CLI. Ejecuta `python -X importtime -m src.cli --help`
+en un proceso nuevo, suma el tiempo de importación y falla (código de salida 1) si se
+supera el presupuesto o si se carga algún módulo que solo deben usar los gráficos o
+el informe (matplotlib, seaborn, tabulate):
+
+    python -m benchmarks.bench_import_time --budget-ms 800 --runs 5
+    python -m benchmarks.bench_import_time -- -m src.cli --from-csv datos.csv   # otro comando
+"""
+from __future__ import annotations
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Módulos que no deben importarse en un arranque sin gráficos ni informe
+FORBIDDEN = ("matplotlib", "seaborn", "tabulate")
+DEFAULT_BUDGET_MS = 800.0
+
+
+def import_times(args: List[str]) -> Dict[str, Tuple[int, int, int]]:
+    """{módulo: (propio_us, acumulado_us, nivel)} de una ejecución con -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args],
+                          capture_output=True, text=True, check=True)
+    out = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        out[name.strip()] = (int(self_us), int(cum_us), level)
+    return out
+
+
+def total_ms(times: Dict[str, Tuple[int, int, int]]) -> float:
+    # Los módulos de nivel superior (sin indentación) suman el tiempo total de importación
+    return sum(cum for _, cum, level in times.values() if level == 0) / 1000
+
+
+def main():
+    p = argparse.ArgumentParser(description="Tiempo de importación de la CLI")
+    p.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                   help=f"Máximo tiempo de importación en ms (def: {DEFAULT_BUDGET_MS:.0f})")
+    p.add_argument("--runs", type=int, default=5, help="Ejecuciones; se toma la más rápida (def: 5)")
+    p.add_argument("--top", type=int, default=10, help="Módulos más lentos a mostrar (def: 10)")
+    p.add_argument("cmd", nargs="*", default=["-m", "src.cli", "--help"],
+                   help="Comando a medir (def: -m src.cli --help)")
+    args = p.parse_args()
+
+    runs = [import_times(args.cmd) for _ in range(args.runs)]
+    best = min(runs, key=total_ms)
+    elapsed = total_ms(best)
+
+    print(f"Importación de '{' '.join(args.cmd)}': {elapsed:,.0f} ms "
+          f"(mejor de {args.runs}, presupuesto {args.budget_ms:,.0f} ms)")
+    print("\nMódulos más lentos (acumulado):")
+    top = sorted(((cum, name) for name, (_, cum, level) in best.items() if level == 0), reverse=True)
+    for cum, name in top[:args.top]:
+        print(f"   {cum / 1000:8.1f} ms  {name}")
+
+    failed = False
+    loaded = sorted({name.split(".")[0] for name in best} & set(FORBIDDEN))
+    if loaded:
+        print(f"\n⛔ Se importan módulos pesados que solo deberían cargarse bajo demanda: {', '.join(loaded)}")
+        failed = True
+    if elapsed > args.budget_ms:
+        print(f"\n⛔ Presupuesto superado: {elapsed:,.0f} ms > {args.budget_ms:,.0f} ms")
+        failed = True
+    if not failed:
+        print("\n✅ Dentro del presupuesto.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compara el Normalizer columnar con la implementación anterior fila a fila
+(un dict por barra + dateutil.isoparse por fila), sobre payloads sintéticos
+de AlphaVantage, MarketStack y TwelveData:
+
+    python -m benchmarks.bench_normalizer --bars 5000 --tickers 20
+"""
+from __future__ import annotations
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from dateutil import parser
+
+from src.normalization.normalizer import Normalizer
+
+
+# --- Implementación anterior (fila a fila), solo como referencia ---
+def _legacy_dt(s):
+    if isinstance(s, datetime):
+        return s
+    dt = parser.isoparse(s)
+    return dt.replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def _legacy_finalize(rows):
+    df = pd.DataFrame(sorted(rows, key=lambda x: x["date"]))
+    df["date"] = pd.to_datetime(df["date"])
+    return df.set_index("date")
+
+
+def _num(v):
+    return float(v) if v is not None else float("nan")
+
+
+def legacy_alphavantage(raw, ticker):
+    ts = raw["Time Series (Daily)"]
+    return _legacy_finalize([{
+        "date": _legacy_dt(d), "open": float(r.get("1. open", "nan")), "high": float(r.get("2. high", "nan")),
+        "low": float(r.get("3. low", "nan")), "close": float(r.get("4. close", "nan")),
+        "volume": float(r.get("5. volume", "nan")), "ticker": ticker, "source": "alphavantage",
+    } for d, r in ts.items()])
+
+
+def legacy_marketstack(raw):
+    return _legacy_finalize([{
+        "date": _legacy_dt(r.get("date")), "open": _num(r.get("open")), "high": _num(r.get("high")),
+        "low": _num(r.get("low")), "close": _num(r.get("close")), "volume": _num(r.get("volume")),
+        "ticker": r.get("symbol"), "source": "marketstack",
+    } for r in raw.get("data", [])])
+
+
+def legacy_twelvedata(raw, ticker):
+    return _legacy_finalize([{
+        "date": _legacy_dt(r.get("datetime")), "open": _num(r.get("open")), "high": _num(r.get("high")),
+        "low": _num(r.get("low")), "close": _num(r.get("close")), "volume": _num(r.get("volume")),
+        "ticker": ticker, "source": "twelvedata",
+    } for r in raw.get("values", [])])
+
+
+# --- Payloads sintéticos (más reciente primero, como las APIs) ---
+def _bars(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-12-31", periods=n)[::-1]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({"open": close * 0.99, "high": close * 1.01, "low": close * 0.98,
+                         "close": close, "volume": rng.integers(1e5, 1e7, n)}, index=dates)
+
+
+def payloads(n_bars: int, seed: int = 0):
+    b = _bars(n_bars, seed)
+    av = {"Time Series (Daily)": {d.strftime("%Y-%m-%d"): {
+        "1. open": f"{r.open:.4f}", "2. high": f"{r.high:.4f}", "3. low": f"{r.low:.4f}",
+        "4. close": f"{r.close:.4f}", "5. volume": str(int(r.volume))} for d, r in b.iterrows()}}
+    ms = {"data": [{"date": d.strftime("%Y-%m-%dT00:00:00+0000"), "symbol": "SYM", "open": r.open,
+                    "high": r.high, "low": r.low, "close": r.close, "volume": float(r.volume)}
+                   for d, r in b.iterrows()]}
+    td = {"values": [{"datetime": d.strftime("%Y-%m-%d"), "open": f"{r.open:.5f}", "high": f"{r.high:.5f}",
+                      "low": f"{r.low:.5f}", "close": f"{r.close:.5f}", "volume": str(int(r.volume))}
+                     for d, r in b.iterrows()]}
+    return av, ms, td
+
+
+def _time(fn, payload_list) -> float:
+    t0 = time.perf_counter()
+    for p in payload_list:
+        fn(p)
+    return time.perf_counter() - t0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark del Normalizer: columnar vs fila a fila")
+    p.add_argument("--bars", type=int, default=5000, help="Barras por ticker (def: 5000, ~20 años)")
+    p.add_argument("--tickers", type=int, default=20)
+    args = p.parse_args()
+
+    norm = Normalizer()
+    generated = [payloads(args.bars, seed) for seed in range(args.tickers)]
+    cases = {
+        "alphavantage": (0, lambda raw: legacy_alphavantage(raw, "SYM"),
+                         lambda raw: norm.normalize_alphavantage_daily(raw, "SYM")),
+        "marketstack": (1, legacy_marketstack, norm.normalize_marketstack_eod),
+        "twelvedata": (2, lambda raw: legacy_twelvedata(raw, "SYM"),
+                       lambda raw: norm.normalize_twelvedata_timeseries(raw, "SYM")),
+    }
+
+    print(f"{args.tickers} tickers x {args.bars} barras")
+    print(f"{'proveedor':<14}{'fila a fila':>14}{'columnar':>12}{'aceleración':>14}")
+    for name, (i, legacy, columnar) in cases.items():
+        raws = [g[i] for g in generated]
+        pd.testing.assert_frame_equal(legacy(raws[0]), columnar(raws[0]))  # mismo resultado
+        t_old = _time(legacy, raws)
+        t_new = _time(columnar, raws)
+        print(f"{name:<14}{t_old:>12.3f} s{t_new:>10.3f} s{t_old / t_new:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
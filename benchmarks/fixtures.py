@@ -0,0 +1,49 @@
+"""
+Payloads JSON grabados (benchmarks/fixtures/) en el formato de cada proveedor, a partir
+de los precios reales de apple_data.csv. Se regeneran con:
+
+    python -m benchmarks.fixtures --csv apple_data.csv --bars 1000
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+
+from src.storage.offline import read_long_csv
+from .synthetic import PROVIDER_FORMATS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURE_TICKER = "AAPL"
+
+
+def fixture_path(provider: str, ticker: str = FIXTURE_TICKER) -> str:
+    return os.path.join(FIXTURE_DIR, f"{provider}_{ticker}.json")
+
+
+def load(provider: str, ticker: str = FIXTURE_TICKER) -> dict:
+    with open(fixture_path(provider, ticker), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record(csv_path: str, n_bars: int, ticker: str = FIXTURE_TICKER):
+    """Escribe un fixture por proveedor con las últimas `n_bars` barras del CSV."""
+    bars = read_long_csv(csv_path, symbols=[ticker]).iloc[-n_bars:]
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for provider, convert in PROVIDER_FORMATS.items():
+        path = fixture_path(provider, ticker)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(convert(bars, ticker), f, separators=(",", ":"))
+        print(f"💾 {path} ({len(bars)} barras)")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Regenera los fixtures JSON de los proveedores")
+    p.add_argument("--csv", default="apple_data.csv", help="CSV largo de origen (def: apple_data.csv)")
+    p.add_argument("--bars", type=int, default=1000, help="Últimas barras a grabar (def: 1000)")
+    p.add_argument("--ticker", default=FIXTURE_TICKER)
+    args = p.parse_args()
+    record(args.csv, args.bars, args.ticker)
+
+
+if __name__ == "__main__":
+    main()
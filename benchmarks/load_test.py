@@ -0,0 +1,125 @@
+"""
+Prueba de carga del pipeline de descarga contra el simulador local (provider_sim):
+extractor real + fetch_many (hilos) o fetch_many_async, sin límite de peticiones, y
+mide el rendimiento de extremo a extremo y la latencia de cola (p50/p95/p99):
+
+    python -m benchmarks.load_test --provider twelvedata --symbols 500 --max-workers 16
+    python -m benchmarks.load_test --provider marketstack --engine async --throttle-rate 0.05 --truncate-rate 0.01
+    python -m benchmarks.load_test --symbols 1000 --max-p99-ms 250 --max-error-rate 0.01 --output carga.json
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from src.extractors.alphavantage_extractor import AlphaVantageExtractor
+from src.extractors.httpclient import RateLimiter
+from src.extractors.marketstack_extractor import MarketStackExtractor
+from src.extractors.runner import fetch_many, fetch_many_async
+from src.extractors.twelvedata_extractor import TwelveDataExtractor
+from src.normalization.normalizer import Normalizer
+from .provider_sim import add_sim_args, config_from_args, start_simulator, warm
+
+_NORMALIZERS = {
+    "alpha": lambda n: n.normalize_alphavantage_daily,
+    "twelvedata": lambda n: n.normalize_twelvedata_timeseries,
+    "marketstack": lambda n: (lambda raw, s: n.normalize_marketstack_eod(raw)),
+}
+_EXTRACTORS = {"alpha": AlphaVantageExtractor, "twelvedata": TwelveDataExtractor,
+               "marketstack": MarketStackExtractor}
+
+
+def symbol_names(n: int):
+    return [f"S{i:05d}" for i in range(n)]
+
+
+def run_load(provider: str, base_url: str, n_symbols: int, engine: str = "thread",
+             max_workers: int = 8, concurrency: int = 64) -> dict:
+    # Sin límite de peticiones ni caché: se mide el motor, la red local y la normalización
+    ex = _EXTRACTORS[provider]("demo", max_workers=max_workers, rate_limiter=RateLimiter(),
+                               base_url=base_url)
+    normalize_one = _NORMALIZERS[provider](Normalizer())
+    symbols = symbol_names(n_symbols)
+
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if engine == "async":
+            out = fetch_many_async(symbols, ex.ahistory, normalize_one, concurrency=concurrency,
+                                   on_close=ex.aclose)
+        else:
+            out = fetch_many(symbols, ex.history, normalize_one, max_workers=max_workers)
+    elapsed = time.perf_counter() - t0
+
+    ok = sum(not df.empty for df in out.values())
+    lat = np.array(ex.stats.latencies) * 1000
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (np.nan,) * 3
+    return {
+        "provider": provider, "engine": engine, "symbols": n_symbols,
+        "max_workers": max_workers, "concurrency": concurrency,
+        "wall_s": elapsed, "symbols_ok": ok, "symbols_error": n_symbols - ok,
+        "error_rate": (n_symbols - ok) / n_symbols if n_symbols else 0.0,
+        "symbols_per_s": n_symbols / elapsed, "requests": len(lat), "requests_per_s": len(lat) / elapsed,
+        "rows": int(sum(len(df) for df in out.values())),
+        "status_counts": {str(k): v for k, v in sorted(ex.stats.status_counts.items())},
+        "retries": ex.stats.retries,
+        "latency_ms": {"mean": float(lat.mean()) if len(lat) else None, "p50": float(p50),
+                       "p95": float(p95), "p99": float(p99), "max": float(lat.max()) if len(lat) else None},
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Prueba de carga de fetch_many contra el simulador local")
+    p.add_argument("--provider", choices=list(_EXTRACTORS), default="twelvedata")
+    p.add_argument("--engine", choices=["thread", "async"], default="thread")
+    p.add_argument("--symbols", type=int, default=200)
+    p.add_argument("--max-workers", type=int, default=8)
+    p.add_argument("--concurrency", type=int, default=64)
+    p.add_argument("--output", default=None, metavar="FICHERO", help="Guarda el resultado en JSON")
+    p.add_argument("--max-p99-ms", type=float, default=None, help="Falla si la latencia p99 lo supera")
+    p.add_argument("--max-error-rate", type=float, default=None,
+                   help="Falla si la fracción de símbolos con error lo supera")
+    add_sim_args(p)
+    args = p.parse_args()
+
+    config = config_from_args(args)
+    server, url, sim_stats = start_simulator(config)
+    warm(_EXTRACTORS[args.provider].PROVIDER, symbol_names(args.symbols), config.bars)
+    try:
+        result = run_load(args.provider, url, args.symbols, args.engine, args.max_workers, args.concurrency)
+    finally:
+        server.shutdown()
+    result["simulator"] = {"config": vars(config), "served": sim_stats.counts}
+
+    lat = result["latency_ms"]
+    print(f"{args.provider} | {args.engine} | {args.symbols} símbolos | workers {args.max_workers} | "
+          f"latencia simulada {config.latency_ms:.0f}±{config.jitter_ms:.0f} ms")
+    print(f"   Tiempo total:   {result['wall_s']:.2f} s  ({result['symbols_per_s']:.1f} símbolos/s, "
+          f"{result['requests_per_s']:.1f} peticiones/s)")
+    print(f"   Símbolos:       {result['symbols_ok']} ok, {result['symbols_error']} con error "
+          f"({result['error_rate']:.1%}) | filas: {result['rows']:,}")
+    print(f"   Peticiones:     {result['requests']} {result['status_counts']} | reintentos: {result['retries']}")
+    print(f"   Latencia (ms):  p50 {lat['p50']:.1f} | p95 {lat['p95']:.1f} | p99 {lat['p99']:.1f} | máx {lat['max']:.1f}")
+    print(f"   Simulador:      {sim_stats.counts}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Resultado guardado en {args.output}")
+
+    failures = []
+    if args.max_p99_ms is not None and lat["p99"] > args.max_p99_ms:
+        failures.append(f"p99 {lat['p99']:.1f} ms > {args.max_p99_ms:.1f} ms")
+    if args.max_error_rate is not None and result["error_rate"] > args.max_error_rate:
+        failures.append(f"errores {result['error_rate']:.1%} > {args.max_error_rate:.1%}")
+    if failures:
+        print(f"⛔ {'; '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
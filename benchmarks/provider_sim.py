@@ -0,0 +1,218 @@
+"""
+Simulador local de las APIs de AlphaVantage, TwelveData y MarketStack para pruebas de
+carga sin red ni API keys. Sirve payloads con el formato de cada proveedor (precios
+sintéticos deterministas por símbolo) en las mismas rutas que las APIs reales, e
+inyecta latencia, errores HTTP 500, límites HTTP 429 y respuestas truncadas:
+
+    python -m benchmarks.provider_sim --port 8080 --latency-ms 50 --throttle-rate 0.05
+    python -m src.cli --provider twelvedata --apikey demo --symbols "AAA,BBB" --base-url http://127.0.0.1:8080
+"""
+from __future__ import annotations
+import argparse
+import json
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from src.models.indicators import rsi
+from .synthetic import ohlcv, to_alphavantage, to_marketstack, to_twelvedata
+
+
+@dataclass
+class SimConfig:
+    latency_ms: float = 20.0      # latencia media de cada respuesta
+    jitter_ms: float = 10.0       # desviación típica de la latencia
+    error_rate: float = 0.0       # fracción de respuestas HTTP 500
+    throttle_rate: float = 0.0    # fracción de respuestas HTTP 429 (con Retry-After: 0)
+    truncate_rate: float = 0.0    # fracción de respuestas cortadas a mitad del JSON
+    bars: int = 1000              # barras por símbolo
+    page_limit: int = 1000        # máximo de filas por página (MarketStack)
+    seed: int = 0
+
+
+@dataclass
+class SimStats:
+    """Peticiones servidas por el simulador, por resultado."""
+    counts: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+
+# --- PAYLOADS (deterministas por símbolo; se generan una vez y se reutilizan) ---
+@lru_cache(maxsize=4096)
+def _bars(symbol: str, n_bars: int):
+    return ohlcv(n_bars, seed=zlib.crc32(symbol.encode()))
+
+
+@lru_cache(maxsize=4096)
+def _encoded(provider: str, kind: str, symbol: str, n_bars: int) -> bytes:
+    bars = _bars(symbol, n_bars)
+    if kind == "rsi":
+        values = rsi(bars["close"], 14).dropna().iloc[::-1]
+        dates = values.index.strftime("%Y-%m-%d")
+        if provider == "alphavantage":
+            payload = {"Meta Data": {"1: Symbol": symbol, "2: Indicator": "Relative Strength Index (RSI)"},
+                       "Technical Analysis: RSI": {d: {"RSI": f"{v:.4f}"} for d, v in zip(dates, values)}}
+        else:
+            payload = {"meta": {"symbol": symbol, "interval": "1day", "indicator": {"name": "RSI"}},
+                       "values": [{"datetime": d, "rsi": f"{v:.5f}"} for d, v in zip(dates, values)],
+                       "status": "ok"}
+    elif kind == "quote":
+        last = bars.iloc[-1]
+        payload = ({"Global Quote": {"01. symbol": symbol, "05. price": f"{last.close:.4f}"}}
+                   if provider == "alphavantage" else {"symbol": symbol, "close": f"{last.close:.5f}"})
+    else:
+        payload = (to_alphavantage if provider == "alphavantage" else to_twelvedata)(bars, symbol)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+@lru_cache(maxsize=1024)
+def _marketstack_rows(symbols: str, n_bars: int) -> Tuple[dict, ...]:
+    rows: List[dict] = []
+    for sym in symbols.split(","):
+        rows.extend(to_marketstack(_bars(sym, n_bars), sym)["data"])
+    return tuple(rows)
+
+
+def _marketstack_page(symbols: str, n_bars: int, limit: int, offset: int) -> bytes:
+    rows = _marketstack_rows(symbols, n_bars)
+    page = list(rows[offset:offset + limit])
+    return json.dumps({"pagination": {"limit": limit, "offset": offset, "count": len(page), "total": len(rows)},
+                       "data": page}, separators=(",", ":")).encode()
+
+
+def warm(provider: str, symbols: List[str], n_bars: int):
+    """Genera de antemano los payloads para que la prueba de carga no mida su construcción."""
+    for sym in symbols:
+        if provider == "marketstack":
+            _marketstack_rows(sym, n_bars)
+        else:
+            _encoded(provider, "history", sym, n_bars)
+
+
+# --- SERVIDOR ---
+def make_handler(config: SimConfig, stats: SimStats):
+    rng = np.random.default_rng(config.seed)
+    rng_lock = threading.Lock()
+
+    def draw() -> Tuple[float, float]:
+        with rng_lock:
+            return float(rng.random()), float(rng.normal(config.latency_ms, config.jitter_ms))
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, como las APIs reales
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            roll, latency = draw()
+            time.sleep(max(0.0, latency) / 1000)
+
+            # Fallos inyectados: los umbrales se acumulan sobre un único número aleatorio
+            if roll < config.throttle_rate:
+                stats.add("429")
+                return self._send(429, b'{"status":"error","code":429,"message":"Too many requests"}',
+                                  {"Retry-After": "0"})
+            if roll < config.throttle_rate + config.error_rate:
+                stats.add("500")
+                return self._send(500, b'{"status":"error","code":500,"message":"Internal error"}')
+
+            body = self._route(url.path, q)
+            if body is None:
+                stats.add("404")
+                return self._send(404, b'{"status":"error","code":404,"message":"Not found"}')
+            if roll < config.throttle_rate + config.error_rate + config.truncate_rate:
+                stats.add("truncated")
+                return self._send(200, body[:len(body) // 2])
+            stats.add("200")
+            self._send(200, body)
+
+        def _route(self, path: str, q: dict):
+            symbol = q.get("symbol", "")
+            if path.endswith("/query"):
+                kind = {"TIME_SERIES_DAILY": "history", "RSI": "rsi", "GLOBAL_QUOTE": "quote"}.get(q.get("function"))
+                return _encoded("alphavantage", kind, symbol, config.bars) if kind else None
+            if path.endswith("/time_series"):
+                return _encoded("twelvedata", "history", symbol, config.bars)
+            if path.endswith("/rsi"):
+                return _encoded("twelvedata", "rsi", symbol, config.bars)
+            if path.endswith("/quote"):
+                return _encoded("twelvedata", "quote", symbol, config.bars)
+            if path.endswith("/eod"):
+                limit = min(int(q.get("limit", config.page_limit)), config.page_limit)
+                return _marketstack_page(q.get("symbols", ""), config.bars, limit, int(q.get("offset", 0)))
+            return None
+
+        def _send(self, status: int, body: bytes, headers: Dict[str, str] | None = None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_simulator(config: SimConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+    """Arranca el simulador en un hilo. Devuelve (servidor, url_base, estadísticas)."""
+    config = config or SimConfig()
+    stats = SimStats()
+    server = ThreadingHTTPServer((host, port), make_handler(config, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}", stats
+
+
+def add_sim_args(p: argparse.ArgumentParser):
+    d = SimConfig()
+    p.add_argument("--latency-ms", type=float, default=d.latency_ms)
+    p.add_argument("--jitter-ms", type=float, default=d.jitter_ms)
+    p.add_argument("--error-rate", type=float, default=d.error_rate, help="Fracción de HTTP 500")
+    p.add_argument("--throttle-rate", type=float, default=d.throttle_rate, help="Fracción de HTTP 429")
+    p.add_argument("--truncate-rate", type=float, default=d.truncate_rate, help="Fracción de JSON truncados")
+    p.add_argument("--bars", type=int, default=d.bars, help="Barras por símbolo")
+    p.add_argument("--page-limit", type=int, default=d.page_limit, help="Filas por página (MarketStack)")
+    p.add_argument("--seed", type=int, default=d.seed)
+
+
+def config_from_args(args) -> SimConfig:
+    return SimConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                     throttle_rate=args.throttle_rate, truncate_rate=args.truncate_rate, bars=args.bars,
+                     page_limit=args.page_limit, seed=args.seed)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Simulador local de las APIs de precios")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    add_sim_args(p)
+    args = p.parse_args()
+
+    server, url, stats = start_simulator(config_from_args(args), args.host, args.port)
+    print(f"🧪 Simulador escuchando en {url} (Ctrl+C para parar)")
+    print(f"   Rutas: /query (AlphaVantage), /time_series, /rsi, /quote (TwelveData), /v1/eod (MarketStack)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\nPeticiones servidas: {stats.counts}")
+
+
+if __name__ == "__main__":
+    main()
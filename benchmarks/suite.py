@@ -0,0 +1,289 @@
+"""
+Suite de benchmarks sin red: Normalizer (con los fixtures grabados de cada proveedor),
+fetch_many, Portfolio.report y los dos run_monte_carlo, a varias escalas. Mide tiempo
+(el mejor de `--repeat`), pico de memoria (tracemalloc) y rendimiento por etapa, lo
+guarda en JSON y lo compara con una línea base: sale con código 1 si alguna etapa
+empeora más del umbral.
+
+    python -m benchmarks.suite --scale small --output resultados.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.suite --scale large --stages mc_series,mc_portfolio --save-baseline base.json
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.extractors.runner import fetch_many
+from src.normalization.normalizer import Normalizer
+from src.models.series import PriceSeries
+from . import fixtures
+from .synthetic import portfolio, standard_frame
+
+# Escalas: nº de tickers (normalización, descarga, informe) y de simulaciones (Monte Carlo)
+SCALES = {
+    "small": {"tickers": [1, 10, 100], "simulations": [1_000, 10_000]},
+    "medium": {"tickers": [1, 100, 1_000], "simulations": [1_000, 100_000]},
+    "large": {"tickers": [1, 100, 1_000, 5_000], "simulations": [1_000, 100_000, 1_000_000]},
+}
+STAGES = ("normalize", "fetch_many", "report", "mc_series", "mc_portfolio")
+REPORT_BARS = 1_000       # barras por ticker en el informe de cartera
+MC_BARS = 2_500           # histórico (~10 años) del que se estiman mu/sigma
+MC_DAYS = 252
+MC_PORTFOLIO_ASSETS = 10
+DEFAULT_THRESHOLD = 0.20  # +20% de tiempo o memoria = regresión
+DEFAULT_MIN_DELTA_MS = 5.0
+
+
+# --- MEDICIÓN ---
+def measure(fn: Callable, setup: Optional[Callable] = None, repeat: int = 3, memory: bool = True) -> dict:
+    """
+    Ejecuta fn(setup()) `repeat` veces y devuelve el mejor tiempo. El pico de memoria se
+    mide en una ejecución aparte con tracemalloc (que ralentiza), contando solo lo que
+    reserva fn y no la preparación.
+    """
+    setup = setup or (lambda: None)
+    best = float("inf")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            arg = setup()
+            t0 = time.perf_counter()
+            fn(arg)
+            best = min(best, time.perf_counter() - t0)
+        peak = None
+        if memory:
+            arg = setup()
+            tracemalloc.start()
+            try:
+                fn(arg)
+                peak = tracemalloc.get_traced_memory()[1] / 2**20
+            finally:
+                tracemalloc.stop()
+    return {"wall_s": best, "peak_mb": peak}
+
+
+def _result(stage: str, params: dict, m: dict, work: float, unit: str) -> dict:
+    key = f"{stage}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+    return {"key": key, "stage": stage, "params": params, **m,
+            "throughput": work / m["wall_s"] if m["wall_s"] > 0 else None, "unit": unit}
+
+
+# --- ETAPAS ---
+def bench_normalize(tickers: List[int], repeat: int, memory: bool) -> List[dict]:
+    norm = Normalizer()
+    cases = {
+        "alphavantage": lambda raw: norm.normalize_alphavantage_daily(raw, "AAPL"),
+        "marketstack": norm.normalize_marketstack_eod,
+        "twelvedata": lambda raw: norm.normalize_twelvedata_timeseries(raw, "AAPL"),
+    }
+    out = []
+    for provider, normalize in cases.items():
+        raw = fixtures.load(provider)
+        bars = len(normalize(raw))
+        for n in tickers:
+            m = measure(lambda _: [normalize(raw) for _ in range(n)], repeat=repeat, memory=memory)
+            out.append(_result("normalize", {"provider": provider, "tickers": n}, m, n * bars, "barras/s"))
+    return out
+
+
+def bench_fetch_many(tickers: List[int], repeat: int, memory: bool) -> List[dict]:
+    # Sin HTTP: fetch_one devuelve el fixture grabado, así se mide el runner + normalización
+    raw = fixtures.load("twelvedata")
+    norm = Normalizer()
+    out = []
+    for n in tickers:
+        symbols = [f"T{i:04d}" for i in range(n)]
+        m = measure(lambda _: fetch_many(symbols, lambda s: raw, norm.normalize_twelvedata_timeseries),
+                    repeat=repeat, memory=memory)
+        out.append(_result("fetch_many", {"tickers": n}, m, n, "tickers/s"))
+    return out
+
+
+def bench_report(tickers: List[int], repeat: int, memory: bool) -> List[dict]:
+    out = []
+    for n in tickers:
+        if n < 2:
+            continue  # el informe de correlación necesita al menos 2 activos
+        # Cartera nueva en cada repetición: si no, report() reutilizaría la caché de aligned()
+        m = measure(lambda p: p.report(), setup=lambda: portfolio(n, REPORT_BARS),
+                    repeat=repeat, memory=memory)
+        out.append(_result("report", {"tickers": n, "bars": REPORT_BARS}, m, n, "tickers/s"))
+    return out
+
+
+def bench_mc_series(simulations: List[int], repeat: int, memory: bool) -> List[dict]:
+    series = PriceSeries("SYN", "synthetic", standard_frame(MC_BARS, "SYN"))
+    out = []
+    for n in simulations:
+        m = measure(lambda _: series.run_monte_carlo(MC_DAYS, n, seed=0, summary=True),
+                    repeat=repeat, memory=memory)
+        out.append(_result("mc_series", {"simulations": n, "days": MC_DAYS}, m, n, "simulaciones/s"))
+    return out
+
+
+def bench_mc_portfolio(simulations: List[int], repeat: int, memory: bool) -> List[dict]:
+    cartera = portfolio(MC_PORTFOLIO_ASSETS, MC_BARS)
+    out = []
+    for n in simulations:
+        m = measure(lambda _: cartera.run_monte_carlo(MC_DAYS, n, seed=0, summary=True),
+                    repeat=repeat, memory=memory)
+        out.append(_result("mc_portfolio", {"simulations": n, "assets": MC_PORTFOLIO_ASSETS,
+                                            "days": MC_DAYS}, m, n, "simulaciones/s"))
+    return out
+
+
+def run(stages: List[str], tickers: List[int], simulations: List[int], repeat: int = 3,
+        memory: bool = True) -> List[dict]:
+    runners = {
+        "normalize": lambda: bench_normalize(tickers, repeat, memory),
+        "fetch_many": lambda: bench_fetch_many(tickers, repeat, memory),
+        "report": lambda: bench_report(tickers, repeat, memory),
+        "mc_series": lambda: bench_mc_series(simulations, repeat, memory),
+        "mc_portfolio": lambda: bench_mc_portfolio(simulations, repeat, memory),
+    }
+    results = []
+    for stage in stages:
+        print(f"⏱️  {stage}...", file=sys.stderr)
+        results.extend(runners[stage]())
+    return results
+
+
+# --- COMPARACIÓN CON LA LÍNEA BASE ---
+# Campos de "meta" que deben coincidir para que los tiempos sean comparables
+MACHINE_KEYS = ("machine", "cpus")
+
+
+def machine_info() -> dict:
+    return {"machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def machine_mismatch(meta: dict) -> List[str]:
+    """Diferencias entre la máquina actual y la que generó la línea base (vacío = comparable)."""
+    current = machine_info()
+    return [f"{k}: base={meta.get(k)!r}, actual={current[k]!r}"
+            for k in MACHINE_KEYS if meta.get(k) != current[k]]
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float,
+            min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[dict]:
+    """
+    Añade a cada resultado la variación frente a la línea base (misma clave) y marca
+    como regresión lo que empeore más de `threshold` en tiempo o memoria. Las etapas
+    cuyo tiempo cambia menos de `min_delta_ms` no cuentan (ruido de medición).
+    """
+    base = {r["key"]: r for r in baseline}
+    for r in results:
+        b = base.get(r["key"])
+        r["regression"] = False
+        if b is None:
+            continue
+        r["baseline_wall_s"] = b["wall_s"]
+        r["wall_change"] = r["wall_s"] / b["wall_s"] - 1 if b["wall_s"] else None
+        slower = (r["wall_change"] is not None and r["wall_change"] > threshold
+                  and (r["wall_s"] - b["wall_s"]) * 1000 > min_delta_ms)
+        heavier = False
+        if r.get("peak_mb") is not None and b.get("peak_mb"):
+            r["baseline_peak_mb"] = b["peak_mb"]
+            r["peak_change"] = r["peak_mb"] / b["peak_mb"] - 1
+            heavier = r["peak_change"] > threshold and r["peak_mb"] - b["peak_mb"] > 1.0
+        r["regression"] = slower or heavier
+    return results
+
+
+def _fmt_change(value: Optional[float]) -> str:
+    return f"{value:+.0%}" if value is not None else "-"
+
+
+def print_table(results: List[dict], file=sys.stdout):
+    print(f"{'etapa':<52}{'tiempo':>11}{'vs base':>9}{'pico MB':>10}{'vs base':>9}{'rendimiento':>24}",
+          file=file)
+    for r in results:
+        peak = f"{r['peak_mb']:.1f}" if r.get("peak_mb") is not None else "-"
+        flag = "  ⛔" if r.get("regression") else ""
+        print(f"{r['key']:<52}{r['wall_s'] * 1000:>9.1f}ms{_fmt_change(r.get('wall_change')):>9}"
+              f"{peak:>10}{_fmt_change(r.get('peak_change')):>9}"
+              f"{r['throughput']:>14,.0f} {r['unit']:<9}{flag}", file=file)
+
+
+def _ints(text: str) -> List[int]:
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Suite de benchmarks (sin red)")
+    p.add_argument("--scale", choices=list(SCALES), default="small",
+                   help="Escala predefinida de tickers y simulaciones (def: small)")
+    p.add_argument("--tickers", type=_ints, default=None, help="Sustituye los tickers de la escala: 1,100,5000")
+    p.add_argument("--simulations", type=_ints, default=None,
+                   help="Sustituye las simulaciones de la escala: 1000,1000000")
+    p.add_argument("--stages", default=",".join(STAGES), help=f"Etapas separadas por comas (def: todas)")
+    p.add_argument("--repeat", type=int, default=3, help="Repeticiones por medida; se toma la mejor (def: 3)")
+    p.add_argument("--no-memory", action="store_true", help="No medir el pico de memoria (más rápido)")
+    p.add_argument("--output", default=None, metavar="FICHERO", help="Guarda los resultados en JSON ('-' = stdout)")
+    p.add_argument("--baseline", default=None, metavar="FICHERO", help="JSON de una ejecución anterior")
+    p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                   help=f"Empeoramiento máximo permitido frente a la base (def: {DEFAULT_THRESHOLD})")
+    p.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                   help=f"Diferencias de tiempo menores no cuentan como regresión (def: {DEFAULT_MIN_DELTA_MS})")
+    p.add_argument("--save-baseline", default=None, metavar="FICHERO",
+                   help="Guarda esta ejecución como nueva línea base")
+    args = p.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        p.error(f"Etapas desconocidas: {', '.join(sorted(unknown))} (disponibles: {', '.join(STAGES)})")
+    tickers = args.tickers or SCALES[args.scale]["tickers"]
+    simulations = args.simulations or SCALES[args.scale]["simulations"]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        mismatch = machine_mismatch(baseline.get("meta", {}))
+        if mismatch:
+            print(f"⛔ La línea base {args.baseline} es de otra máquina ({'; '.join(mismatch)}). "
+                  f"Regenérala aquí con --save-baseline antes de comparar.", file=sys.stderr)
+            sys.exit(2)
+
+    results = run(stages, tickers, simulations, repeat=args.repeat, memory=not args.no_memory)
+    if baseline is not None:
+        compare(results, baseline["results"], args.threshold, args.min_delta_ms)
+
+    doc = {
+        "meta": {"date": datetime.now().isoformat(timespec="seconds"), "scale": args.scale,
+                 "tickers": tickers, "simulations": simulations, "repeat": args.repeat,
+                 "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                 **machine_info()},
+        "results": results,
+    }
+    print_table(results, file=sys.stderr if args.output == "-" else sys.stdout)
+    if args.output == "-":
+        json.dump(doc, sys.stdout, indent=2)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"💾 Línea base guardada en {args.save_baseline}", file=sys.stderr)
+
+    regressions = [r["key"] for r in results if r.get("regression")]
+    if regressions:
+        print(f"\n⛔ {len(regressions)} regresiones por encima del {args.threshold:.0%}: {', '.join(regressions)}",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
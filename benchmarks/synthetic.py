@@ -0,0 +1,91 @@
+"""
+Datos sintéticos para los benchmarks: barras OHLCV con un paseo aleatorio geométrico,
+universos de N tickers en el formato estándar del Normalizer y conversión de unas
+barras a los JSON crudos de AlphaVantage, MarketStack y TwelveData.
+"""
+from __future__ import annotations
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.models.series import PriceSeries, Portfolio
+
+
+def ohlcv(n_bars: int, seed: int = 0, end: str = "2024-12-31", start_price: float = 100.0,
+          vol: float = 0.01) -> pd.DataFrame:
+    """Barras diarias (días hábiles) con índice `date` ascendente y columnas OHLCV."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=end, periods=n_bars, name="date")
+    close = start_price * np.exp(np.cumsum(rng.normal(0, vol, n_bars)))
+    spread = np.abs(rng.normal(0, vol, n_bars))
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, vol / 2, n_bars)),
+        "high": close * (1 + spread),
+        "low": close * (1 - spread),
+        "close": close,
+        "volume": rng.integers(100_000, 10_000_000, n_bars).astype(np.float64),
+    }, index=dates)
+
+
+def standard_frame(n_bars: int, ticker: str, source: str = "synthetic", seed: int = 0) -> pd.DataFrame:
+    """Igual que ohlcv() pero con las columnas ticker/source que añade el Normalizer."""
+    df = ohlcv(n_bars, seed)
+    df["ticker"] = ticker
+    df["source"] = source
+    return df
+
+
+def universe(n_tickers: int, n_bars: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """{ticker: DataFrame estándar} con tickers T0000, T0001, ..."""
+    return {f"T{i:04d}": standard_frame(n_bars, f"T{i:04d}", seed=seed + i) for i in range(n_tickers)}
+
+
+def portfolio(n_tickers: int, n_bars: int, seed: int = 0) -> Portfolio:
+    """Cartera con pesos iguales sobre un universo sintético (sin los mensajes de add_series)."""
+    assets = {t: PriceSeries(t, "synthetic", df) for t, df in universe(n_tickers, n_bars, seed).items()}
+    return Portfolio(f"Sintética {n_tickers}x{n_bars}", assets=assets,
+                     weights={t: 1 / n_tickers for t in assets})
+
+
+# --- JSON CRUDO DE CADA PROVEEDOR (más reciente primero, como las APIs) ---
+def to_alphavantage(bars: pd.DataFrame, ticker: str = "SYM") -> dict:
+    b = bars.iloc[::-1]
+    dates = b.index.strftime("%Y-%m-%d")
+    cols = {key: [f"{v:.4f}" for v in b[col]] for col, key in
+            (("open", "1. open"), ("high", "2. high"), ("low", "3. low"), ("close", "4. close"))}
+    volume = [str(int(v)) for v in b["volume"]]
+    return {
+        "Meta Data": {"1. Information": "Daily Prices (open, high, low, close) and Volumes",
+                      "2. Symbol": ticker, "3. Last Refreshed": dates[0], "4. Output Size": "Full size",
+                      "5. Time Zone": "US/Eastern"},
+        "Time Series (Daily)": {d: {"1. open": cols["1. open"][i], "2. high": cols["2. high"][i],
+                                    "3. low": cols["3. low"][i], "4. close": cols["4. close"][i],
+                                    "5. volume": volume[i]} for i, d in enumerate(dates)},
+    }
+
+
+def to_marketstack(bars: pd.DataFrame, ticker: str = "SYM") -> dict:
+    b = bars.iloc[::-1]
+    dates = b.index.strftime("%Y-%m-%dT00:00:00+0000")
+    data = [{"open": o, "high": h, "low": l, "close": c, "volume": v, "symbol": ticker,
+             "exchange": "XNAS", "date": d}
+            for d, o, h, l, c, v in zip(dates, *(b[col].round(4).tolist() for col in
+                                                 ("open", "high", "low", "close", "volume")))]
+    return {"pagination": {"limit": 1000, "offset": 0, "count": len(data), "total": len(data)},
+            "data": data}
+
+
+def to_twelvedata(bars: pd.DataFrame, ticker: str = "SYM") -> dict:
+    b = bars.iloc[::-1]
+    dates = b.index.strftime("%Y-%m-%d")
+    fmt = {col: [f"{v:.5f}" for v in b[col]] for col in ("open", "high", "low", "close")}
+    volume = [str(int(v)) for v in b["volume"]]
+    values = [{"datetime": d, "open": fmt["open"][i], "high": fmt["high"][i], "low": fmt["low"][i],
+               "close": fmt["close"][i], "volume": volume[i]} for i, d in enumerate(dates)]
+    return {"meta": {"symbol": ticker, "interval": "1day", "currency": "USD", "type": "Common Stock"},
+            "values": values, "status": "ok"}
+
+
+PROVIDER_FORMATS = {"alphavantage": to_alphavantage, "marketstack": to_marketstack,
+                    "twelvedata": to_twelvedata}
@@ -1,4 +1,5 @@
 import argparse
+import atexit
 import os
 import sys
 import pandas as pd
@@ -7,20 +8,41 @@ import numpy as np
 from .extractors.alphavantage_extractor import AlphaVantageExtractor
 from .extractors.marketstack_extractor import MarketStackExtractor
 from .extractors.twelvedata_extractor import TwelveDataExtractor
-from .extractors.runner import fetch_many
-from .normalization.normalizer import Normalizer
+from .extractors.runner import fetch_many, fetch_many_async
+from .extractors.cache import ResponseCache, DEFAULT_MAX_MB
+from .extractors.httpclient import get_limiter
+from . import metrics
+from .normalization.normalizer import Normalizer, compact_frame
+from .storage.store import PriceStore
+from .storage.sync import sync_history
+from .storage.offline import load_csv, load_store
+from .storage.writers import PartitionedWriter, open_writer
 from .models.series import PriceSeries, Portfolio
+from .models.montecarlo import MonteCarloSummary
+from .models.indicators import INDICATORS, DEFAULT_PERIODS
 
 
-def _get_extractor(provider: str, apikey: str):
-    if provider == "alpha":
-        return AlphaVantageExtractor(apikey)
-    elif provider == "marketstack":
-        return MarketStackExtractor(apikey)
-    elif provider == "twelvedata":
-        return TwelveDataExtractor(apikey)
-    else:
+_EXTRACTORS = {
+    "alpha": AlphaVantageExtractor,
+    "marketstack": MarketStackExtractor,
+    "twelvedata": TwelveDataExtractor,
+}
+
+
+def _get_extractor(provider: str, apikey: str, cache: ResponseCache | None = None,
+                   max_workers: int = 8, per_second: float | None = None,
+                   per_minute: float | None = None, base_url: str | None = None):
+    if provider not in _EXTRACTORS:
         raise SystemExit(f"Proveedor no soportado: {provider}")
+    cls = _EXTRACTORS[provider]
+    # Límites del proveedor, sobrescribibles desde el CLI (p. ej. con un plan de pago)
+    limits = dict(cls.RATE_LIMIT)
+    if per_second is not None:
+        limits["per_second"] = per_second or None
+    if per_minute is not None:
+        limits["per_minute"] = per_minute or None
+    limiter = get_limiter(cls.PROVIDER, **limits)
+    return cls(apikey, cache=cache, max_workers=max_workers, rate_limiter=limiter, base_url=base_url)
 
 
 def _resolve_api_key(provider: str, apikey_arg: str | None) -> str:
@@ -37,27 +59,129 @@ def _resolve_api_key(provider: str, apikey_arg: str | None) -> str:
     return key
 
 
-def _concat_or_single(dfs: list[pd.DataFrame]) -> pd.DataFrame:
-    dfs = [df for df in dfs if df is not None and not df.empty]
-    if not dfs:
-        return pd.DataFrame()
-    return pd.concat(dfs).sort_index()
+async def _empty_payload(symbol: str) -> dict:
+    return {}
+
+
+def _run_fetch(symbols, fetch_one, afetch_one, normalize_one, ex, args,
+               on_result=None, keep_results: bool = True) -> dict[str, pd.DataFrame]:
+    """Descarga y normaliza con el motor elegido (--engine) o en secuencia si --max-workers 1.
+    `on_result(sym, df)` recibe cada símbolo en cuanto está listo (escritura en streaming);
+    con keep_results=False los DataFrames no se guardan en el dict devuelto."""
+    with metrics.timer("stage.fetch"):
+        return _fetch(symbols, fetch_one, afetch_one, normalize_one, ex, args, on_result, keep_results)
+
+
+def _fetch(symbols, fetch_one, afetch_one, normalize_one, ex, args, on_result=None,
+           keep_results: bool = True) -> dict[str, pd.DataFrame]:
+    if args.engine == "async":
+        return fetch_many_async(symbols, afetch_one, normalize_one, concurrency=args.concurrency,
+                                on_close=ex.aclose, on_result=on_result, keep_results=keep_results)
+    if args.max_workers != 1:
+        return fetch_many(symbols, fetch_one, normalize_one, max_workers=args.max_workers,
+                          on_result=on_result, keep_results=keep_results)
+
+    out_by_symbol: dict[str, pd.DataFrame] = {}
+    for sym in symbols:
+        try:
+            raw = fetch_one(sym)
+            with metrics.timer("normalize"):
+                df = normalize_one(raw, sym)
+            metrics.incr("rows.normalized", len(df))
+        except Exception as e:
+            print(f"Error con {sym}: {e}", file=sys.stderr)
+            df = pd.DataFrame()
+        if on_result is not None and not df.empty:
+            on_result(sym, df)
+        if keep_results:
+            out_by_symbol[sym] = df
+    return out_by_symbol
+
+
+def _fetch_marketstack_batches(ex, norm, symbols, args, on_result=None,
+                               keep_results: bool = True) -> dict[str, pd.DataFrame]:
+    """
+    MarketStack por lotes (varios símbolos por petición): cada lote se normaliza, se
+    separa por símbolo y se entrega a `on_result` en cuanto llegan todas sus páginas.
+    """
+    out_by_symbol: dict[str, pd.DataFrame] = {}
+    for group, raw, error in ex.iter_history_batches(symbols, start=args.start, end=args.end):
+        if error is not None:
+            metrics.incr("symbols.error", len(group))
+            print(f"⚠️ Error al descargar el lote {','.join(group)}: {error}")
+            if keep_results:
+                out_by_symbol.update({sym: pd.DataFrame() for sym in group})
+            continue
+        with metrics.timer("normalize"):
+            frames = norm.split_marketstack_eod(raw, group)
+        metrics.incr("rows.normalized", sum(len(df) for df in frames.values()))
+        for sym, df in frames.items():
+            if df.empty:
+                metrics.incr("symbols.error")
+                print(f"⚠️ Error al descargar {sym}: MarketStack no devolvió datos.")
+            else:
+                metrics.incr("symbols.ok")
+                print(f"✅ {sym} descargado correctamente ({len(df)} filas).")
+                if on_result is not None:
+                    on_result(sym, df)
+            if keep_results:
+                out_by_symbol[sym] = df
+    return out_by_symbol
+
+
+# --- SALIDA EN STREAMING (--to-csv / --to-json) ---
+def _open_writers(args) -> list:
+    """Un escritor incremental por salida pedida; el formato sale del sufijo de la ruta."""
+    writers = []
+    try:
+        if args.to_csv:
+            writers.append(open_writer(args.to_csv, default_fmt="csv"))
+        if args.to_json:
+            writers.append(open_writer(args.to_json, default_fmt="json"))
+    except (OSError, ValueError) as e:
+        for w in writers:
+            w.close()
+        raise SystemExit(f"No se pudo abrir la salida: {e}")
+    return writers
+
+
+def _close_writers(writers: list):
+    for w in writers:
+        w.close()
+        if isinstance(w, PartitionedWriter):
+            print(f" Guardadas {w.rows} filas en {len(w.files)} ficheros: {w.template}")
+        else:
+            print(f" Guardadas {w.rows} filas en: {w.path}")
+
+
+# --- PERFIL DE LA EJECUCIÓN (--profile / --metrics-json) ---
+def _report_metrics(args):
+    """Se registra con atexit: también se ejecuta si la CLI termina antes de tiempo."""
+    if args.metrics_json:
+        try:
+            metrics.dump_json(args.metrics_json)
+            print(f"\n💾 Métricas guardadas en {args.metrics_json}")
+        except OSError as e:
+            print(f"No se pudieron guardar las métricas: {e}", file=sys.stderr)
+    if args.profile:
+        print("\n" + metrics.summary())
 
 
 # --- FUNCIÓN PARA IMPRIMIR RESULTADOS DE MONTE CARLO ---
-def _print_mc_results(paths: np.ndarray, name: str):
-    """Imprime estadísticas de un resultado de Monte Carlo."""
-    if paths is None or paths.size == 0:
+def _print_mc_results(result: np.ndarray | MonteCarloSummary, name: str):
+    """Imprime estadísticas de un resultado de Monte Carlo (matriz de caminos o resumen)."""
+    if result is None or (isinstance(result, np.ndarray) and result.size == 0):
         print(f"   -> {name}: No hay resultados.")
         return
+    if isinstance(result, np.ndarray):
+        result = MonteCarloSummary.from_paths(result)
     
-    ultimo_precio_real = paths[0, 0] 
-    precios_finales = paths[-1, :]   
+    ultimo_precio_real = result.initial_value
     
-    media_final = np.mean(precios_finales)
-    mediana_final = np.median(precios_finales)
-    percentil_5 = np.percentile(precios_finales, 5)
-    percentil_95 = np.percentile(precios_finales, 95)
+    media_final = result.mean[-1]
+    mediana_final = result.p50[-1]
+    percentil_5 = result.p5[-1]
+    percentil_95 = result.p95[-1]
     
     retorno_medio_pct = (media_final / ultimo_precio_real - 1) * 100
 
@@ -72,23 +196,60 @@ def main():
     p = argparse.ArgumentParser(description="Extractor multi-API de OHLCV y RSI (formato estandarizado)")
     
     # --- ARGUMENTOS INICIALES ---
-    p.add_argument("--provider", choices=["alpha","marketstack","twelvedata"], required=True,
-                   help="Proveedor de datos")
-    p.add_argument("--symbols", required=True,
-                   help="Símbolos separados por comas (ej. AAPL,MSFT o índices como ^GSPC, EUR/USD en TwelveData)")
+    p.add_argument("--provider", choices=["alpha","marketstack","twelvedata"], default=None,
+                   help="Proveedor de datos (obligatorio salvo con --from-csv / --from-store)")
+    p.add_argument("--symbols", default=None,
+                   help="Símbolos separados por comas (ej. AAPL,MSFT o índices como ^GSPC, EUR/USD en TwelveData). "
+                        "En modo offline es opcional: por defecto se cargan todos")
     p.add_argument("--datatype", choices=["history","indicator"], default="history",
                    help="Tipo de dato: histórico OHLCV o indicador")
-    p.add_argument("--indicator", choices=["rsi"], default="rsi",
+    p.add_argument("--indicator", choices=list(INDICATORS), default="rsi",
                    help="Indicador (si datatype=indicator)")
-    p.add_argument("--time_period", type=int, default=14,
-                   help="Periodo del indicador (por defecto 14)")
+    p.add_argument("--indicator-source", choices=["local", "remote"], default="local",
+                   help="local (def): se calcula a partir del histórico OHLCV; remote: se pide a la API (solo RSI)")
+    p.add_argument("--time_period", type=str, default=None,
+                   help="Periodo(s) del indicador separados por comas, ej. 14 o 14,28 (por defecto el habitual del indicador)")
     p.add_argument("--start", default=None, help="YYYY-MM-DD (si la API lo soporta)")
     p.add_argument("--end", default=None, help="YYYY-MM-DD (si la API lo soporta)")
     p.add_argument("--apikey", default=None, help="API key (si no, se leerá de variable de entorno)")
     p.add_argument("--to-csv", default=None, help="Ruta de salida CSV (opcional)")
     p.add_argument("--to-json", default=None, help="Ruta de salida JSON (opcional)")
+    p.add_argument("--from-csv", default=None, metavar="FICHERO",
+                   help="Modo offline: carga un CSV largo (como el de --to-csv) sin llamar a ninguna API")
+    p.add_argument("--from-store", default=None, metavar="DIR",
+                   help="Modo offline: carga el histórico del almacén local DIR sin llamar a ninguna API")
+    p.add_argument("--to-store", default=None, metavar="DIR",
+                   help="Guarda el histórico descargado en el almacén columnar local DIR")
     p.add_argument("--max-workers", type=int, default=4,
                    help="Nº de descargas simultáneas (1 = secuencial)")
+    p.add_argument("--engine", choices=["thread", "async"], default="thread",
+                   help="Motor de descarga: hilos (def) o asyncio (requiere aiohttp)")
+    p.add_argument("--concurrency", type=int, default=64,
+                   help="Nº máximo de peticiones en vuelo con --engine async (def: 64)")
+    p.add_argument("--rate-per-second", type=float, default=None,
+                   help="Máx. peticiones por segundo al proveedor (0 = sin límite; def: el del plan gratuito)")
+    p.add_argument("--rate-per-minute", type=float, default=None,
+                   help="Máx. peticiones por minuto al proveedor (0 = sin límite; def: el del plan gratuito)")
+    p.add_argument("--base-url", default=None, metavar="URL",
+                   help="Servidor alternativo de la API, p. ej. el simulador local "
+                        "(python -m benchmarks.provider_sim); también <PROVEEDOR>_BASE_URL")
+    p.add_argument("--sync-store", default=None, metavar="DIR",
+                   help="Sincroniza de forma incremental con un almacén local (solo descarga las barras nuevas)")
+
+    p.add_argument("--compact", action="store_true",
+                   help="Modo compacto en memoria: ticker/source categóricos, precios en float32 y volumen entero")
+    p.add_argument("--compact-prices", choices=["float32", "float64"], default="float32",
+                   help="Tipo de los precios con --compact (def: float32)")
+
+    # --- ARGUMENTOS DE CACHÉ ---
+    p.add_argument("--cache-dir", default=".cache/api",
+                   help="Carpeta de la caché en disco de respuestas de las APIs (def: .cache/api)")
+    p.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB,
+                   help=f"Tamaño máximo de la caché en MB; expulsa las menos usadas (def: {DEFAULT_MAX_MB:g})")
+    p.add_argument("--no-cache", action="store_true",
+                   help="No lee ni escribe la caché (siempre descarga)")
+    p.add_argument("--refresh-cache", action="store_true",
+                   help="Ignora lo guardado, descarga de nuevo y actualiza la caché")
     
     # --- ARGUMENTOS DE ESTADÍSTICAS ---
     p.add_argument("--show-stats", action="store_true", 
@@ -109,6 +270,20 @@ def main():
                    help="Pesos de cartera '0.6,0.4' (auto-normaliza, si no, pesos iguales)")
     p.add_argument("--mc-plot", action="store_true", 
                    help="Mostrar un gráfico de la simulación (requiere matplotlib)")
+    p.add_argument("--mc-float32", action="store_true",
+                   help="Simula en float32 (mitad de memoria, algo menos de precisión)")
+    p.add_argument("--mc-memory-mb", type=float, default=256.0,
+                   help="Memoria máxima (MB) para los buffers de la simulación de cartera (def: 256)")
+    p.add_argument("--mc-workers", type=int, default=1,
+                   help="Nº de procesos para repartir las simulaciones (def: 1)")
+    p.add_argument("--mc-seed", type=int, default=None,
+                   help="Semilla para resultados reproducibles (mismo resultado con el mismo nº de procesos)")
+    p.add_argument("--mc-full-paths", action="store_true",
+                   help="Guarda la matriz completa de caminos (percentiles exactos, mucha más memoria)")
+    p.add_argument("--mc-cov-window", type=int, default=None, metavar="N",
+                   help="Cartera: usa la covarianza de las últimas N sesiones (ej. 60 o 252) en vez de todo el histórico")
+    p.add_argument("--mc-cov-ewma", type=float, default=None, metavar="LAMBDA",
+                   help="Cartera: usa la covarianza EWMA con decaimiento LAMBDA (ej. 0.94)")
 
     # --- ARGUMENTOS LIMPIEZA ---
     p.add_argument("--clean-na", action="store_true", 
@@ -125,19 +300,97 @@ def main():
     # --- ARGUMENTO DE GRÁFICOS ---
     p.add_argument("--show-plots", action="store_true", 
                    help="Genera y muestra gráficos de análisis de la cartera")
+    p.add_argument("--plots-dir", default=None, metavar="DIR",
+                   help="Guarda los gráficos (--mc-plot, --show-plots) en DIR en vez de mostrarlos (sin pantalla)")
+    p.add_argument("--plot-format", choices=["png", "svg"], default="png",
+                   help="Formato de los gráficos guardados con --plots-dir (def: png)")
+
+    # --- ARGUMENTOS DE PERFIL ---
+    p.add_argument("--profile", action="store_true",
+                   help="Al terminar, muestra una tabla con el tiempo de cada etapa, latencias HTTP y contadores")
+    p.add_argument("--metrics-json", default=None, metavar="FICHERO",
+                   help="Guarda las métricas de la ejecución en JSON (para monitorización)")
     
     args = p.parse_args()
-
-    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
-    apikey = _resolve_api_key(args.provider, args.apikey)
-    ex = _get_extractor(args.provider, apikey)
-    norm = Normalizer()
+    if args.profile or args.metrics_json:
+        metrics.enable()
+        atexit.register(_report_metrics, args)
+    if args.mc_cov_window and args.mc_cov_ewma:
+        p.error("--mc-cov-window y --mc-cov-ewma son excluyentes")
+    if args.plots_dir and (args.mc_plot or args.show_plots):
+        from .plots.plots import configure
+        configure(args.plots_dir, args.plot_format)
+
+    offline = bool(args.from_csv or args.from_store)
+    remote_indicator = args.datatype == "indicator" and args.indicator_source == "remote"
+    if args.from_csv and args.from_store:
+        p.error("--from-csv y --from-store son excluyentes")
+    if offline and remote_indicator:
+        p.error("En modo offline los indicadores solo se pueden calcular en local (--indicator-source local)")
+    try:
+        periods = ([int(x) for x in args.time_period.split(",") if x.strip()] if args.time_period
+                   else [DEFAULT_PERIODS[args.indicator]])
+    except ValueError:
+        p.error(f"--time_period debe ser una lista de enteros separados por comas: {args.time_period}")
+    if not offline and (not args.provider or not args.symbols):
+        p.error("--provider y --symbols son obligatorios salvo con --from-csv / --from-store")
+
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] if args.symbols else None
+    ex = None
+    norm = Normalizer(compact=args.compact, price_dtype=args.compact_prices)
+    if not offline:
+        apikey = _resolve_api_key(args.provider, args.apikey)
+        cache = None
+        if not args.no_cache:
+            cache = ResponseCache(args.cache_dir, max_mb=args.cache_max_mb, refresh=args.refresh_cache)
+        ex = _get_extractor(args.provider, apikey, cache, max_workers=args.max_workers,
+                            per_second=args.rate_per_second, per_minute=args.rate_per_minute,
+                            base_url=args.base_url)
+
+    # --- SALIDAS POR SÍMBOLO (--to-csv / --to-json / --to-store) ---
+    writers = _open_writers(args)
+    store = PriceStore(args.to_store) if args.to_store and args.datatype == "history" else None
+    stored: dict[str, int] = {}
+
+    def emit(sym: str, df: pd.DataFrame, to_store: bool = True):
+        for w in writers:
+            w.write(df, sym)
+        if store is not None and to_store:
+            provider = str(df['source'].iloc[0]) if 'source' in df.columns else (ex.PROVIDER if ex else args.provider)
+            stored[sym] = store.merge(df, sym, provider)
+
+    # Los históricos y el RSI remoto se guardan según llegan; el resto, ya procesado.
+    # Si después no hay ningún análisis en memoria, los DataFrames no se conservan.
+    stream = bool(writers or store) and not offline and (args.datatype == "history" or remote_indicator)
+    needs_frames = any((args.show_stats, args.sma, args.monte_carlo, args.mc_weights,
+                        args.report, args.show_plots))
+    keep_results = needs_frames or not stream
     
     out_by_symbol: dict[str, pd.DataFrame] = {} 
+    streamed = False
+    synced = False  # histórico completo leído de --sync-store: ya está en un almacén
 
-    # --- PRECIOS (OHLCV) ---
-    if args.datatype == "history":
+    # --- MODO OFFLINE (CSV largo o almacén local, sin peticiones HTTP) ---
+    if offline:
+        try:
+            with metrics.timer("stage.load"):
+                if args.from_csv:
+                    out_by_symbol = load_csv(args.from_csv, symbols, start=args.start, end=args.end)
+                else:
+                    provider = _EXTRACTORS[args.provider].PROVIDER if args.provider else None
+                    out_by_symbol = load_store(args.from_store, provider, symbols, start=args.start, end=args.end)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"No se pudieron cargar los datos: {e}")
+        for sym in symbols or []:
+            if sym not in out_by_symbol or out_by_symbol[sym].empty:
+                print(f"⚠️ {sym} no está en los datos cargados.")
+        print(f"📂 Cargados {len(out_by_symbol)} símbolos "
+              f"({sum(len(df) for df in out_by_symbol.values())} filas) en modo offline.")
+
+    # --- PRECIOS (OHLCV), también como base de los indicadores calculados en local ---
+    elif not remote_indicator:
         fetch_one = lambda s: ex.history(s, start=args.start, end=args.end)
+        afetch_one = lambda s: ex.ahistory(s, start=args.start, end=args.end)
         if args.provider == "alpha":
             normalize_one = lambda raw, s: norm.normalize_alphavantage_daily(raw, s)
         elif args.provider == "marketstack":
@@ -145,79 +398,139 @@ def main():
         else:  
             normalize_one = lambda raw, s: norm.normalize_twelvedata_timeseries(raw, s)
 
-        if args.max_workers == 1:
-            for sym in symbols:
-                try:
-                    raw = fetch_one(sym)
-                    out_by_symbol[sym] = normalize_one(raw, sym)
-                except Exception as e:
-                    print(f"Error con {sym}: {e}", file=sys.stderr)
-                    out_by_symbol[sym] = pd.DataFrame()
+        if args.sync_store:
+            # Sincronización incremental: solo se piden las barras que faltan en el almacén
+            sync_store = PriceStore(args.sync_store)
+            with metrics.timer("stage.fetch"):
+                out_by_symbol = sync_history(sync_store, ex, symbols, normalize_one, end=args.end,
+                                             max_workers=args.max_workers, engine=args.engine,
+                                             concurrency=args.concurrency)
+            synced = True
+        elif args.provider == "marketstack" and args.engine == "thread" and args.max_workers != 1:
+            # MarketStack admite varios símbolos por petición: lotes + paginación completa.
+            # Con --engine async o --max-workers 1 se descarga símbolo a símbolo (rama de abajo).
+            with metrics.timer("stage.fetch"):
+                out_by_symbol = _fetch_marketstack_batches(ex, norm, symbols, args,
+                                                           on_result=emit if stream else None,
+                                                           keep_results=keep_results)
+            streamed = stream
         else:
-            out_by_symbol = fetch_many(symbols, fetch_one, normalize_one, max_workers=args.max_workers)
+            out_by_symbol = _run_fetch(symbols, fetch_one, afetch_one, normalize_one, ex, args,
+                                       on_result=emit if stream else None, keep_results=keep_results)
+            streamed = stream
 
-    # --- INDICADORES (RSI) ---
+    # --- INDICADORES REMOTOS (RSI de la API) ---
     else:
         if args.indicator != "rsi":
-            raise SystemExit("Por ahora solo se implementa RSI en modo indicador.")
+            raise SystemExit("Las APIs solo ofrecen RSI; usa --indicator-source local para el resto.")
+        if len(periods) > 1:
+            raise SystemExit("Con --indicator-source remote se pide un solo periodo por ejecución.")
+        args.time_period = periods[0]
         if args.provider == "alpha":
             fetch_one = lambda s: ex.rsi(s, time_period=args.time_period, interval="daily", series_type="close")
+            afetch_one = lambda s: ex.arsi(s, time_period=args.time_period, interval="daily", series_type="close")
             normalize_one = lambda raw, s: norm.normalize_alphavantage_rsi(raw, s)
         elif args.provider == "twelvedata":
             fetch_one = lambda s: ex.rsi(s, time_period=args.time_period, interval="1day")
+            afetch_one = lambda s: ex.arsi(s, time_period=args.time_period, interval="1day")
             normalize_one = lambda raw, s: norm.normalize_twelvedata_rsi(raw, s)
         else:
             print(" MarketStack no ofrece RSI gratuito.", file=sys.stderr)
             fetch_one = lambda s: {}
+            afetch_one = _empty_payload
             normalize_one = lambda raw, s: pd.DataFrame()
 
-        if args.max_workers == 1:
-            for sym in symbols:
-                try:
-                    raw = fetch_one(sym)
-                    out_by_symbol[sym] = normalize_one(raw, sym)
-                except Exception as e:
-                    print(f"Error con {sym}: {e}", file=sys.stderr)
-                    out_by_symbol[sym] = pd.DataFrame()
-        else:
-            out_by_symbol = fetch_many(symbols, fetch_one, normalize_one, max_workers=args.max_workers)
+        out_by_symbol = _run_fetch(symbols, fetch_one, afetch_one, normalize_one, ex, args,
+                                   on_result=emit if stream else None, keep_results=keep_results)
+        streamed = stream
     
     
+    # --- INDICADORES LOCALES: se calculan sobre las barras ya descargadas ---
+    if args.datatype == "indicator" and not remote_indicator:
+        spec = {args.indicator: periods}
+        for sym, df in out_by_symbol.items():
+            if df is None or df.empty:
+                continue
+            source = df['source'].iloc[0] if 'source' in df.columns else args.provider
+            try:
+                with metrics.timer("stage.indicators"):
+                    out_by_symbol[sym] = PriceSeries(ticker=sym, source=source, data=df).compute_indicators(spec)
+            except ValueError as e:
+                print(f"⚠️ {e}")
+                out_by_symbol[sym] = pd.DataFrame()
+        print(f"📐 {args.indicator.upper()} {','.join(map(str, periods))} calculado en local "
+              f"para {sum(not df.empty for df in out_by_symbol.values())} símbolos.")
+
+    # Lo que no se guardó durante la descarga (offline, sincronización, indicadores locales)
+    if (writers or store) and not streamed:
+        for sym, df in out_by_symbol.items():
+            if df is not None and not df.empty:
+                emit(sym, df, to_store=not synced)
+
     # --- Portfolio y PriceSeries --- 
-    portfolio_name = f"Cartera CLI ({args.provider} - {args.datatype})"
+    origin = args.provider or os.path.basename(args.from_csv or args.from_store.rstrip("/\\"))
+    portfolio_name = f"Cartera CLI ({origin} - {args.datatype})"
     cartera = Portfolio(name=portfolio_name)
     
     for sym, df in out_by_symbol.items():
         if df is not None and not df.empty:
+            if args.compact:
+                # Modo offline, almacén e indicadores locales llegan sin compactar
+                df = out_by_symbol[sym] = compact_frame(df, args.compact_prices)
             source = df['source'].iloc[0] if 'source' in df.columns else args.provider
-            serie = PriceSeries(ticker=sym, source=source, data=df)
+            with metrics.timer("stage.series"):  # incluye las estadísticas de __post_init__
+                serie = PriceSeries(ticker=sym, source=source, data=df)
 
-            if args.negative_prices:
-                serie.negative_prices()
+            with metrics.timer("stage.clean"):
+                if args.negative_prices:
+                    serie.negative_prices()
 
-            if args.clean_na:
-                serie.fillna() # Llama al método que usa 'ffill' por defecto
+                if args.clean_na:
+                    serie.fillna() # Llama al método que usa 'ffill' por defecto
             
-            if args.resample_daily:
-                serie.resample_daily() # Llama al método que re-muestrea y usa 'ffill'
+                if args.resample_daily:
+                    serie.resample_daily() # Llama al método que re-muestrea y usa 'ffill'
 
             cartera.add_series(serie)
 
-    out = _concat_or_single(list(out_by_symbol.values()))
+    if ex is not None:
+        print(f"\n{ex.stats.summary()}")
 
 
     # --- Salida por pantalla --- 
-    if not cartera.assets: 
+    if not keep_results:
+        print("\n Datos guardados según se descargaban; sin análisis en memoria "
+              "(usa --show-stats, --report, --monte-carlo... para analizarlos).")
+    elif not cartera.assets: 
         print("\n No hay datos para mostrar.")
     else:
         print("\n" + "="*40)
         print(f"Resumen de la Cartera: '{cartera.name}'")
         print(f"Total de activos: {len(cartera)}")
+        if args.compact or args.show_stats or metrics.enabled():
+            mem = cartera.memory_usage().loc["TOTAL"]
+            metrics.incr("memory.portfolio_bytes", mem["bytes"])
+            print(f"Memoria de los datos: {mem['bytes'] / 1e6:,.1f} MB ({mem['rows']:,} filas"
+                  f"{', modo compacto' if args.compact else ''})")
         print("="*40)
 
+        # SMA de todos los activos de una vez sobre la matriz (fechas, tickers)
+        sma_table = None
+        if args.sma:
+            try:
+                sma_table = cartera.screen({"sma": [args.sma]})
+            except ValueError:
+                sma_table = None
+
         for ticker, series in cartera.assets.items():
             print(f"\n  -> {series.get_summary()}")
-            if args.sma:
+            if args.sma and sma_table is not None and ticker in sma_table.index:
+                value = sma_table.at[ticker, f"sma_{args.sma}"]
+                if np.isnan(value):
+                    print(f"     SMA({args.sma}d): N/A (no hay suficientes datos)")
+                else:
+                    print(f"     SMA({args.sma}d): {value:.2f}")
+            elif args.sma:
                 sma = series.calculate_sma(args.sma)
                 if sma is not None and not sma.empty:
                     print(f"     SMA({args.sma}d): {sma.iloc[-1]:.2f}") 
@@ -265,6 +578,7 @@ def main():
         print(f"Ejecutando Simulación Monte Carlo")
         print(f"   Simulaciones: {args.monte_carlo} | Días a futuro: {args.mc_days}")
         print("="*40)
+        mc_dtype = np.float32 if args.mc_float32 else np.float64
         
         # --- SIMULACIÓN DE LA CARTERA ---
         if args.mc_portfolio:
@@ -275,7 +589,12 @@ def main():
             else:
                 print(f"Simulando cartera completa. Pesos: {cartera.weights}")
                 try:
-                    paths = cartera.run_monte_carlo(args.mc_days, args.monte_carlo)
+                    paths = cartera.run_monte_carlo(args.mc_days, args.monte_carlo, dtype=mc_dtype,
+                                                    memory_budget_mb=args.mc_memory_mb,
+                                                    summary=not args.mc_full_paths,
+                                                    seed=args.mc_seed, workers=args.mc_workers,
+                                                    cov_window=args.mc_cov_window,
+                                                    cov_lambda=args.mc_cov_ewma)
                     _print_mc_results(paths, f"Cartera '{cartera.name}'")
                     
                     if args.mc_plot:
@@ -293,7 +612,9 @@ def main():
                     continue
                 
                 try:
-                    paths = series.run_monte_carlo(args.mc_days, args.monte_carlo)
+                    paths = series.run_monte_carlo(args.mc_days, args.monte_carlo, dtype=mc_dtype,
+                                                   summary=not args.mc_full_paths,
+                                                   seed=args.mc_seed, workers=args.mc_workers)
                     _print_mc_results(paths, ticker)
                     
                     if args.mc_plot:
@@ -311,7 +632,8 @@ def main():
         print("="*50 + "\n")
         
         try:
-            informe_md = cartera.report()
+            with metrics.timer("stage.report"):
+                informe_md = cartera.report()
             print(informe_md)
         except Exception as e:
             print(f" Error al generar el informe: {e}")
@@ -329,7 +651,8 @@ def main():
         print("="*50 + "\n")
         
         try:
-            cartera.plots_report()
+            with metrics.timer("stage.plots"):
+                cartera.plots_report()
         except Exception as e:
             print(f"Error al generar los gráficos: {e}")
             import traceback
@@ -340,12 +663,12 @@ def main():
         print("="*50)
 
 
-    if args.to_csv:
-        out.to_csv(args.to_csv, index=True)
-        print(f" Guardado CSV combinado en: {args.to_csv}")
-    if args.to_json:
-        out.to_json(args.to_json, orient="records", date_format="iso")
-        print(f" Guardado JSON combinado en: {args.to_json}")
+    if store is not None and synced:
+        print(f" --to-store omitido: el histórico ya está en el almacén de --sync-store ({args.sync_store}).")
+    elif store is not None:
+        print(f" Guardado en el almacén {args.to_store}: {sum(stored.values())} barras nuevas "
+              f"({len(stored)} símbolos).")
+    _close_writers(writers)
 
 
 if __name__ == "__main__":
@@ -1,28 +1,38 @@
-import requests
+from datetime import date
 from .base import BaseExtractor
 
 class AlphaVantageExtractor(BaseExtractor):
     BASE = "https://www.alphavantage.co/query"
-    def __init__(self, apikey: str):
-        self.apikey = apikey
+    PROVIDER = "alphavantage"
+    RATE_LIMIT = {"per_second": 1, "per_minute": 5}
+    ERROR_KEYS = ("Error Message", "Note", "Information")
+    # "compact" devuelve las últimas 100 sesiones (~140 días naturales)
+    COMPACT_DAYS = 100
 
     def history(self, ticker: str, start: str | None = None, end: str | None = None):
+        return self._get_json(*self._history_request(ticker, start, end))
+
+    def _history_request(self, ticker: str, start: str | None = None, end: str | None = None):
+        # AlphaVantage no filtra por fechas: si el inicio es reciente basta con "compact"
+        outputsize = "full"
+        if start and (date.today() - date.fromisoformat(start[:10])).days <= self.COMPACT_DAYS:
+            outputsize = "compact"
         params = {
             "function": "TIME_SERIES_DAILY",
             "symbol": ticker,
             "apikey": self.apikey,
-            "outputsize": "full",
+            "outputsize": outputsize,
         }
-        r = requests.get(self.BASE, params=params, timeout=30)
-        r.raise_for_status()
-        return r.json()
+        return "history", self.BASE, params, False
     
     def quote(self, symbol: str):
         params = {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": self.apikey}
-        r = requests.get(self.BASE, params=params, timeout=30); r.raise_for_status()
-        return r.json()
+        return self._get_json("quote", self.BASE, params)
     
     def rsi(self, symbol: str, time_period: int = 14, interval: str = "daily", series_type: str = "close"):
+        return self._get_json(*self._rsi_request(symbol, time_period, interval, series_type))
+
+    def _rsi_request(self, symbol: str, time_period: int = 14, interval: str = "daily", series_type: str = "close"):
         params = {
             "function": "RSI",
             "symbol": symbol,
@@ -31,7 +41,4 @@ class AlphaVantageExtractor(BaseExtractor):
             "series_type": series_type,
              "apikey": self.apikey,
         }
-        r = requests.get(self.BASE, params=params, timeout=30)
-        r.raise_for_status()
-        return r.json()
-
+        return "rsi", self.BASE, params, False
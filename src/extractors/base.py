@@ -1,3 +1,173 @@
+from __future__ import annotations
+from datetime import date
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from .. import metrics
+from .cache import ResponseCache
+from .httpclient import HttpStats, RateLimiter, get_limiter, make_session
+
+
 class BaseExtractor:
+    PROVIDER = "base"
+    # Claves que el proveedor devuelve (con HTTP 200) cuando hay error o límite de cuota
+    ERROR_KEYS: tuple = ()
+    # Límite de peticiones por defecto del plan gratuito de cada proveedor
+    RATE_LIMIT: dict = {"per_second": None, "per_minute": None}
+    MAX_RETRIES = 3
+    # Atributos con las URLs de la API; base_url sustituye su esquema y host
+    URL_ATTRS: tuple = ("BASE",)
+
+    def __init__(self, apikey: str, cache: ResponseCache | None = None, max_workers: int = 8,
+                 rate_limiter: RateLimiter | None = None, base_url: str | None = None):
+        self.apikey = apikey
+        # Servidor alternativo (p. ej. el simulador local de benchmarks/provider_sim.py):
+        # argumento o variable de entorno <PROVEEDOR>_BASE_URL, como TWELVEDATA_BASE_URL
+        base_url = base_url or os.getenv(f"{self.PROVIDER.upper()}_BASE_URL")
+        if base_url:
+            self._rebase(base_url)
+        self.cache = cache
+        # Una Session por extractor: conexiones TCP/TLS reutilizadas entre peticiones e hilos
+        self.session = make_session(pool_size=max_workers)
+        self.limiter = rate_limiter or get_limiter(self.PROVIDER, **self.RATE_LIMIT)
+        self.stats = HttpStats()
+        self.max_workers = max_workers
+        self._asession = None
+
+    def _rebase(self, base_url: str):
+        """Apunta las URLs de la API a otro servidor conservando sus rutas (/query, /v1/eod...)."""
+        base = urlsplit(base_url.rstrip("/"))
+        if not base.scheme or not base.netloc:
+            raise ValueError(f"URL base no válida: {base_url} (ej. http://127.0.0.1:8080)")
+        for attr in self.URL_ATTRS:
+            url = urlsplit(getattr(self, attr))
+            setattr(self, attr, urlunsplit((base.scheme, base.netloc, base.path + url.path, "", "")))
+
     def history(self, ticker: str, start: str | None = None, end: str | None = None):
         raise NotImplementedError("Implementa este método en tu extractor concreto.")
+
+    # Cada extractor describe sus peticiones como (endpoint, url, params, closed);
+    # así la versión síncrona y la asíncrona comparten los mismos parámetros.
+    def _history_request(self, ticker: str, start: str | None = None, end: str | None = None):
+        raise NotImplementedError("Implementa este método en tu extractor concreto.")
+
+    def _rsi_request(self, symbol: str, *args, **kwargs):
+        raise NotImplementedError(f"{type(self).__name__} no ofrece RSI.")
+
+    # --- Versiones asíncronas (motor asyncio, requiere aiohttp) ---
+    async def ahistory(self, ticker: str, start: str | None = None, end: str | None = None):
+        return await self._aget_json(*self._history_request(ticker, start, end))
+
+    async def arsi(self, symbol: str, *args, **kwargs):
+        return await self._aget_json(*self._rsi_request(symbol, *args, **kwargs))
+
+    # --- Petición HTTP común (con caché en disco opcional) ---
+    def _get_json(self, endpoint: str, url: str, params: dict, closed: bool = False) -> dict:
+        if self.cache is not None:
+            cached = self.cache.get(self.PROVIDER, endpoint, params, closed=closed)
+            if cached is not None:
+                metrics.incr(f"cache.hit.{self.PROVIDER}")
+                return cached
+            metrics.incr(f"cache.miss.{self.PROVIDER}")
+
+        r = self._request(url, params)
+        with metrics.timer(f"decode.{self.PROVIDER}"):
+            raw = r.json()
+
+        if self.cache is not None and self._is_cacheable(raw):
+            self.cache.set(self.PROVIDER, endpoint, params, raw)
+        return raw
+
+    def _request(self, url: str, params: dict):
+        """GET respetando el limitador; reintenta los HTTP 429 con espera exponencial."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            self.limiter.acquire()
+            t0 = time.perf_counter()
+            r = self.session.get(url, params=params, timeout=30)
+            latency = time.perf_counter() - t0
+            self.stats.record(latency, r.status_code)
+            self._record_metrics(latency, r.status_code, len(r.content))
+            if r.status_code != 429 or attempt == self.MAX_RETRIES:
+                break
+            self.stats.record_retry()
+            retry_after = r.headers.get("Retry-After", "")
+            time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+        r.raise_for_status()
+        return r
+
+    async def _aget_json(self, endpoint: str, url: str, params: dict, closed: bool = False) -> dict:
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, self.PROVIDER, endpoint, params, closed)
+            if cached is not None:
+                metrics.incr(f"cache.hit.{self.PROVIDER}")
+                return cached
+            metrics.incr(f"cache.miss.{self.PROVIDER}")
+
+        raw = await self._arequest(url, params)
+
+        if self.cache is not None and self._is_cacheable(raw):
+            await asyncio.to_thread(self.cache.set, self.PROVIDER, endpoint, params, raw)
+        return raw
+
+    async def _arequest(self, url: str, params: dict):
+        session = self._async_session()
+        # aiohttp no acepta None en la query
+        query = {k: str(v) for k, v in params.items() if v is not None}
+        for attempt in range(self.MAX_RETRIES + 1):
+            wait = self.limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            t0 = time.perf_counter()
+            async with session.get(url, params=query) as r:
+                body = await r.read()
+                latency = time.perf_counter() - t0
+                self.stats.record(latency, r.status)
+                self._record_metrics(latency, r.status, len(body))
+                if r.status == 429 and attempt < self.MAX_RETRIES:
+                    self.stats.record_retry()
+                    retry_after = r.headers.get("Retry-After", "")
+                    await asyncio.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+                    continue
+                r.raise_for_status()
+                with metrics.timer(f"decode.{self.PROVIDER}"):
+                    return json.loads(body)
+
+    def _record_metrics(self, latency: float, status: int, n_bytes: int):
+        if not metrics.enabled():
+            return
+        metrics.observe(f"http.latency_ms.{self.PROVIDER}", latency * 1000)
+        metrics.incr(f"http.bytes.{self.PROVIDER}", n_bytes)
+        metrics.incr(f"http.status.{status}")
+
+    def _async_session(self):
+        if self._asession is None:
+            import aiohttp  # dependencia solo del motor asíncrono
+            connector = aiohttp.TCPConnector(limit=0, keepalive_timeout=30)
+            self._asession = aiohttp.ClientSession(connector=connector,
+                                                   timeout=aiohttp.ClientTimeout(total=30))
+        return self._asession
+
+    async def aclose(self):
+        if self._asession is not None:
+            await self._asession.close()
+            self._asession = None
+
+    def _is_cacheable(self, raw) -> bool:
+        if not isinstance(raw, dict):
+            return False
+        if raw.get("status") == "error":
+            return False
+        return not any(k in raw for k in self.ERROR_KEYS)
+
+    @staticmethod
+    def _is_closed_range(end: str | None) -> bool:
+        """True si el rango pedido termina antes de hoy (barras diarias ya cerradas)."""
+        if not end:
+            return False
+        try:
+            return date.fromisoformat(end[:10]) < date.today()
+        except ValueError:
+            return False
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+# Parámetros que nunca forman parte de la clave (credenciales)
+_SECRET_PARAMS = {"apikey", "access_key"}
+
+# Caducidad por defecto (segundos) de cada endpoint. None = no caduca nunca.
+DEFAULT_TTLS: Dict[str, Optional[float]] = {
+    "quote": 60,             # cotización intradía: caduca rápido
+    "history": 6 * 3600,     # histórico que incluye el día actual
+    "rsi": 6 * 3600,
+}
+DEFAULT_MAX_MB = 500.0
+# Cada cuántas escrituras se vuelve a medir la carpeta (por si otro proceso la comparte)
+RESYNC_EVERY = 1000
+
+
+class ResponseCache:
+    """
+    Caché en disco de respuestas JSON crudas, una por fichero, con clave
+    (proveedor, endpoint, parámetros normalizados).
+
+    - TTL por endpoint; los rangos históricos ya cerrados no caducan.
+    - Expulsión LRU por tamaño total (se usa el mtime como "último uso"). El total se
+      lleva en memoria (un recorrido al abrirla) y la carpeta solo se recorre al pasar
+      de `max_bytes` o cada RESYNC_EVERY escrituras.
+    - Escrituras atómicas (fichero temporal + os.replace), de modo que varios
+      hilos de fetch_many pueden compartirla sin leer ficheros a medias.
+    """
+
+    def __init__(self, root: str, max_mb: float = DEFAULT_MAX_MB,
+                 ttls: Optional[Dict[str, Optional[float]]] = None, refresh: bool = False):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024**2)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.refresh = refresh  # True: ignora lo guardado pero sigue escribiendo
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._total = self._scan()[1]
+
+    # --- Claves y rutas ---
+    @staticmethod
+    def _normalize_params(params: dict) -> dict:
+        return {str(k): str(v) for k, v in sorted(params.items())
+                if v is not None and k not in _SECRET_PARAMS}
+
+    def _path(self, provider: str, endpoint: str, params: dict) -> str:
+        key = json.dumps([provider, endpoint, self._normalize_params(params)], sort_keys=True)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, provider, f"{endpoint}-{digest}.json")
+
+    def ttl_for(self, endpoint: str, closed: bool = False) -> Optional[float]:
+        if closed:
+            return None
+        return self.ttls.get(endpoint, DEFAULT_TTLS["history"])
+
+    # --- Lectura / escritura ---
+    def get(self, provider: str, endpoint: str, params: dict, closed: bool = False):
+        if self.refresh:
+            return None
+        path = self._path(provider, endpoint, params)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        ttl = self.ttl_for(endpoint, closed)
+        if ttl is not None and time.time() - entry.get("created", 0) > ttl:
+            return None
+        try:
+            os.utime(path)  # marca de último uso para la expulsión LRU
+        except OSError:
+            pass
+        return entry.get("payload")
+
+    def set(self, provider: str, endpoint: str, params: dict, payload) -> None:
+        path = self._path(provider, endpoint, params)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        entry = {
+            "created": time.time(),
+            "provider": provider,
+            "endpoint": endpoint,
+            "params": self._normalize_params(params),
+            "payload": payload,
+        }
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+                new_size = f.tell()
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._total += new_size - old_size
+            self._writes += 1
+            if self._total > self.max_bytes or self._writes % RESYNC_EVERY == 0:
+                self._evict()
+
+    def _scan(self):
+        """(entradas [(mtime, tamaño, ruta)], bytes totales) recorriendo la carpeta."""
+        files = []
+        total = 0
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # otro hilo lo ha borrado
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        return files, total
+
+    def _evict(self) -> None:
+        """Se llama con el lock tomado: mide de nuevo y borra los menos usados hasta max_bytes."""
+        files, total = self._scan()
+        self._total = total
+        if total <= self.max_bytes:
+            return
+        # Los menos usados recientemente primero
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+            if total <= self.max_bytes:
+                break
+        self._total = total
+
+    def clear(self) -> None:
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(folder, name))
+                    except OSError:
+                        pass
+        with self._lock:
+            self._total = 0
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def make_session(pool_size: int = 8) -> requests.Session:
+    """Session con conexiones keep-alive reutilizables; el pool se ajusta al nº de hilos."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# --- LIMITADOR DE PETICIONES (TOKEN BUCKET) ---
+class _Bucket:
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate  # tokens por segundo
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Consume un token (puede quedar en deuda) y devuelve cuánto hay que esperar."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+
+class RateLimiter:
+    """Token bucket con límite por segundo y/o por minuto, seguro entre hilos."""
+
+    def __init__(self, per_second: Optional[float] = None, per_minute: Optional[float] = None):
+        self.per_second = per_second
+        self.per_minute = per_minute
+        self._buckets: List[_Bucket] = []
+        if per_second:
+            self._buckets.append(_Bucket(per_second, per_second))
+        if per_minute:
+            self._buckets.append(_Bucket(per_minute, per_minute / 60))
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Reserva un hueco y devuelve los segundos a esperar antes de usarlo."""
+        if not self._buckets:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            return max(b.take(now) for b in self._buckets)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+_LIMITERS: Dict[Tuple, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(provider: str, per_second: Optional[float] = None,
+                per_minute: Optional[float] = None) -> RateLimiter:
+    """Limitador compartido por todos los extractores de un mismo proveedor y configuración."""
+    key = (provider, per_second, per_minute)
+    with _LIMITERS_LOCK:
+        if key not in _LIMITERS:
+            _LIMITERS[key] = RateLimiter(per_second, per_minute)
+        return _LIMITERS[key]
+
+
+# --- ESTADÍSTICAS DE PETICIONES ---
+class HttpStats:
+    """Latencias y códigos de estado de las peticiones de una ejecución."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.status_counts: Dict[int, int] = {}
+        self.retries = 0
+
+    def record(self, latency: float, status: int):
+        with self._lock:
+            self.latencies.append(latency)
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    @property
+    def throttled(self) -> int:
+        return self.status_counts.get(429, 0)
+
+    def summary(self) -> str:
+        if not self.latencies:
+            return "Peticiones HTTP: 0"
+        lat = np.array(self.latencies) * 1000
+        p50, p95 = np.percentile(lat, [50, 95])
+        codes = ", ".join(f"{code}: {n}" for code, n in sorted(self.status_counts.items()))
+        return (f"Peticiones HTTP: {len(lat)} ({codes}) | HTTP 429: {self.throttled} | Reintentos: {self.retries}\n"
+                f"Latencia (ms): media {lat.mean():.0f} | p50 {p50:.0f} | p95 {p95:.0f} | máx {lat.max():.0f}")
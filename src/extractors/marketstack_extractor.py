@@ -1,20 +1,128 @@
-import requests
+from __future__ import annotations
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
 from .base import BaseExtractor
 
 class MarketStackExtractor(BaseExtractor):
     BASE = "http://api.marketstack.com/v1/eod"
-    def __init__(self, apikey: str):
-        self.apikey = apikey
+    PROVIDER = "marketstack"
+    RATE_LIMIT = {"per_second": 5, "per_minute": None}
+    ERROR_KEYS = ("error",)
+    PAGE_LIMIT = 1000   # máximo de filas por página que admite la API
+    BATCH_SIZE = 100    # símbolos por petición (parámetro "symbols" separado por comas)
 
     def history(self, ticker: str, start: str | None = None, end: str | None = None):
+        """Histórico completo: sigue la paginación pidiendo en paralelo las páginas restantes."""
+        first = self._get_page(ticker, start, end, 0)
+        offsets = self._remaining_offsets(first)
+        if not offsets:
+            return self._combine([first])
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(offsets))) as pool:
+            pages = list(pool.map(lambda off: self._get_page(ticker, start, end, off), offsets))
+        return self._combine([first, *pages])
+
+    def history_many(self, symbols: List[str], start: str | None = None, end: str | None = None,
+                     batch_size: int | None = None):
+        """
+        Histórico de varios símbolos empaquetados en lotes de `batch_size` por petición.
+        Devuelve un único payload con todas las filas (cada una con su "symbol").
+        """
+        payloads = []
+        for _, payload, error in self.iter_history_batches(symbols, start, end, batch_size):
+            if error is not None:
+                raise error
+            payloads.append(payload)
+        return self._combine(payloads)
+
+    def iter_history_batches(self, symbols: List[str], start: str | None = None, end: str | None = None,
+                             batch_size: int | None = None
+                             ) -> Iterator[Tuple[List[str], Optional[dict], Optional[Exception]]]:
+        """
+        Igual que history_many, pero entrega cada lote en cuanto tiene todas sus páginas:
+        (símbolos del lote, payload, None), o (símbolos, None, excepción) si el lote falla.
+        Las primeras páginas y las restantes de todos los lotes comparten un único pool.
+        """
+        batch_size = batch_size or self.BATCH_SIZE
+        groups = [",".join(symbols[i:i + batch_size]) for i in range(0, len(symbols), batch_size)]
+        if not groups:
+            return
+        pages: Dict[str, Dict[int, dict]] = {g: {} for g in groups}
+        left: Dict[str, int] = {}
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # 1. Primera página de cada lote (nos da el total de filas)
+            pending = {pool.submit(self._get_page, g, start, end, 0): (g, 0) for g in groups}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    group, offset = pending.pop(future)
+                    if group in failed:
+                        continue
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        failed.add(group)
+                        pages.pop(group, None)
+                        yield group.split(","), None, e
+                        continue
+                    pages[group][offset] = page
+                    if offset == 0:
+                        # 2. Resto de páginas del lote, en el mismo pool que los demás lotes
+                        offsets = self._remaining_offsets(page)
+                        left[group] = len(offsets)
+                        for off in offsets:
+                            pending[pool.submit(self._get_page, group, start, end, off)] = (group, off)
+                    else:
+                        left[group] -= 1
+                    if left[group] == 0:
+                        done_pages = pages.pop(group)
+                        yield group.split(","), self._combine([done_pages[o] for o in sorted(done_pages)]), None
+
+    async def ahistory(self, ticker: str, start: str | None = None, end: str | None = None):
+        first = await self._aget_json(*self._history_request(ticker, start, end))
+        self._check_page(first)
+        pages = await asyncio.gather(*(self._aget_json(*self._history_request(ticker, start, end, off))
+                                       for off in self._remaining_offsets(first)))
+        for page in pages:
+            self._check_page(page)
+        return self._combine([first, *pages])
+
+    def _history_request(self, ticker: str, start: str | None = None, end: str | None = None,
+                         offset: int = 0):
         params = {
             "access_key": self.apikey,
             "symbols": ticker,
             "date_from": start,
             "date_to": end,
-            "limit": 1000,
+            "limit": self.PAGE_LIMIT,
+            "offset": offset,
+        }
+        return "history", self.BASE, params, self._is_closed_range(end)
+
+    # --- Paginación ---
+    def _get_page(self, symbols: str, start: str | None, end: str | None, offset: int) -> dict:
+        page = self._get_json(*self._history_request(symbols, start, end, offset))
+        self._check_page(page)
+        return page
+
+    @staticmethod
+    def _check_page(page: dict):
+        if "error" in page:
+            err = page["error"]
+            msg = err.get("message", err) if isinstance(err, dict) else err
+            raise RuntimeError(f"MarketStack devolvió un error: {msg}")
+
+    def _remaining_offsets(self, first: dict) -> List[int]:
+        pagination = first.get("pagination") or {}
+        total = int(pagination.get("total") or 0)
+        limit = int(pagination.get("limit") or self.PAGE_LIMIT)
+        return list(range(limit, total, limit))
+
+    @staticmethod
+    def _combine(pages: List[dict]) -> dict:
+        data = [row for page in pages for row in (page.get("data") or [])]
+        return {
+            "pagination": {"offset": 0, "limit": len(data), "count": len(data), "total": len(data)},
+            "data": data,
         }
-        r = requests.get(self.BASE, params=params, timeout=30)
-        r.raise_for_status()
-        return r.json()
-    
@@ -1,16 +1,32 @@
 from __future__ import annotations
+import asyncio
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, Iterable, Dict
+from typing import Awaitable, Callable, Iterable, Dict, Optional
 import pandas as pd
 
+from .. import metrics
+
+
+def _normalize(normalize_one: Callable[[dict, str], pd.DataFrame], raw: dict, sym: str) -> pd.DataFrame:
+    with metrics.timer("normalize"):
+        df = normalize_one(raw, sym)
+    metrics.incr("rows.normalized", len(df))
+    return df
+
 
 def fetch_many(
     symbols: Iterable[str],
     fetch_one: Callable[[str], dict],
     normalize_one: Callable[[dict, str], pd.DataFrame],
     max_workers: int = 8,
+    on_result: Optional[Callable[[str, pd.DataFrame], None]] = None,
+    keep_results: bool = True,
 ) -> Dict[str, pd.DataFrame]:
-
+    """
+    Descarga y normaliza `symbols` en paralelo. `on_result(sym, df)` se llama (en el hilo
+    principal) con cada símbolo en cuanto termina, p. ej. para escribirlo a disco. Con
+    keep_results=False el DataFrame se libera tras el callback y se devuelve un dict vacío.
+    """
     results: Dict[str, pd.DataFrame] = {}
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
@@ -22,13 +38,73 @@ def fetch_many(
                 # Obtenemos el JSON crudo desde la API
                 raw = future.result()
                 # Lo normalizamos usando la función pasada
-                df = normalize_one(raw, sym)
-                # Guardamos el DataFrame en el diccionario de resultados
-                results[sym] = df
+                df = _normalize(normalize_one, raw, sym)
+                metrics.incr("symbols.ok")
                 print(f"✅ {sym} descargado correctamente ({len(df)} filas).")
             except Exception as e:
                 # Si hay error, seguimos sin romper el proceso completo
-                results[sym] = pd.DataFrame()
+                df = pd.DataFrame()
+                metrics.incr("symbols.error")
                 print(f"⚠️ Error al descargar {sym}: {e}")
+            _deliver(results, sym, df, on_result, keep_results)
+
+    return results
+
+
+def _deliver(results, sym, df, on_result, keep_results):
+    if on_result is not None and not df.empty:
+        on_result(sym, df)
+    if keep_results:
+        # Guardamos el DataFrame en el diccionario de resultados
+        results[sym] = df
+
+
+# --- MOTOR ASÍNCRONO ---
+def fetch_many_async(
+    symbols: Iterable[str],
+    fetch_one: Callable[[str], Awaitable[dict]],
+    normalize_one: Callable[[dict, str], pd.DataFrame],
+    concurrency: int = 64,
+    max_workers: int = 4,
+    on_close: Optional[Callable[[], Awaitable[None]]] = None,
+    on_result: Optional[Callable[[str, pd.DataFrame], None]] = None,
+    keep_results: bool = True,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Igual que fetch_many pero con asyncio: fetch_one es una corrutina y se mantienen
+    hasta `concurrency` descargas en vuelo. La normalización (CPU) se ejecuta en un
+    pool de `max_workers` hilos para no bloquear el bucle de eventos. `on_close` se
+    espera al final (p. ej. para cerrar la sesión HTTP asíncrona del extractor).
+    `on_result` y `keep_results` funcionan como en fetch_many (el callback corre en el bucle).
+    """
+    return asyncio.run(_fetch_all_async(list(symbols), fetch_one, normalize_one, concurrency,
+                                        max_workers, on_close, on_result, keep_results))
+
+
+async def _fetch_all_async(symbols, fetch_one, normalize_one, concurrency, max_workers, on_close,
+                           on_result=None, keep_results=True):
+    results: Dict[str, pd.DataFrame] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def one(sym: str):
+        try:
+            # Solo la descarga ocupa un hueco del semáforo
+            async with semaphore:
+                raw = await fetch_one(sym)
+            df = await loop.run_in_executor(pool, _normalize, normalize_one, raw, sym)
+            metrics.incr("symbols.ok")
+            print(f"✅ {sym} descargado correctamente ({len(df)} filas).")
+        except Exception as e:
+            df = pd.DataFrame()
+            metrics.incr("symbols.error")
+            print(f"⚠️ Error al descargar {sym}: {e}")
+        _deliver(results, sym, df, on_result, keep_results)
 
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            await asyncio.gather(*(one(s) for s in symbols))
+        finally:
+            if on_close is not None:
+                await on_close()
     return results
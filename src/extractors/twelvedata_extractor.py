@@ -1,12 +1,17 @@
-import requests
 from .base import BaseExtractor
 
 class TwelveDataExtractor(BaseExtractor):
     BASE = "https://api.twelvedata.com/time_series"
-    def __init__(self, apikey: str):
-        self.apikey = apikey
+    QUOTE = "https://api.twelvedata.com/quote"
+    RSI = "https://api.twelvedata.com/rsi"
+    PROVIDER = "twelvedata"
+    URL_ATTRS = ("BASE", "QUOTE", "RSI")
+    RATE_LIMIT = {"per_second": None, "per_minute": 8}
 
     def history(self, symbol: str, start: str | None = None, end: str | None = None):
+        return self._get_json(*self._history_request(symbol, start, end))
+
+    def _history_request(self, symbol: str, start: str | None = None, end: str | None = None):
         params = {
             "symbol": symbol,
             "interval": "1day",
@@ -15,23 +20,21 @@ class TwelveDataExtractor(BaseExtractor):
         }
         if start: params["start_date"] = start
         if end: params["end_date"] = end
-        r = requests.get(self.BASE, params=params, timeout=30)
-        r.raise_for_status()
-        return r.json()
+        return "history", self.BASE, params, self._is_closed_range(end)
     
     def quote(self, symbol: str):
         params = {"symbol": symbol, "apikey": self.apikey}
-        r = requests.get(self.QUOTE, params=params, timeout=30); r.raise_for_status()
-        return r.json()
+        return self._get_json("quote", self.QUOTE, params)
     
     def rsi(self, symbol: str, time_period: int = 14, interval: str = "1day"):
+        return self._get_json(*self._rsi_request(symbol, time_period, interval))
+
+    def _rsi_request(self, symbol: str, time_period: int = 14, interval: str = "1day"):
         params = {
             "symbol": symbol,
             "interval": interval,
             "time_period": time_period,
             "apikey": self.apikey,
         }
-        r = requests.get("https://api.twelvedata.com/rsi", params=params, timeout=30)
-        r.raise_for_status()
-        return r.json()
+        return "rsi", self.RSI, params, False
 
@@ -0,0 +1,185 @@
+from __future__ import annotations
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+
+# Instrumentación de la CLI: temporizadores, contadores e histogramas por etapa.
+# Desactivada por defecto: cada llamada comprueba un único booleano y sale, de modo
+# que los ganchos repartidos por el código no cuestan nada sin --profile/--metrics-json.
+#
+# Nombres con puntos: "http.latency.twelvedata", "stage.fetch", "rows.normalized"...
+
+_enabled = False
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_histograms: Dict[str, "_Histogram"] = {}   # valores observados (latencias, rendimientos...)
+_timers: Dict[str, "_Histogram"] = {}       # duraciones en segundos
+_started: Optional[float] = None
+_rng = random.Random()
+
+# Muestras que se guardan por métrica para los percentiles; el resto se resume
+# en count/sum/min/max, así una ejecución larga no acumula cada observación.
+RESERVOIR_SIZE = 1024
+
+
+class _Histogram:
+    """Recuento, suma, mínimo y máximo exactos más una muestra acotada (reservoir sampling)."""
+    __slots__ = ("count", "sum", "min", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.samples: List[float] = []
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(value)
+        else:
+            i = _rng.randrange(self.count)
+            if i < RESERVOIR_SIZE:
+                self.samples[i] = value
+
+    def copy(self) -> "_Histogram":
+        h = _Histogram()
+        h.count, h.sum, h.min, h.max, h.samples = self.count, self.sum, self.min, self.max, list(self.samples)
+        return h
+
+
+def enable(on: bool = True):
+    global _enabled, _started
+    _enabled = on
+    if on and _started is None:
+        _started = time.perf_counter()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _timers.clear()
+    _started = time.perf_counter() if _enabled else None
+
+
+# --- REGISTRO ---
+def incr(name: str, value: float = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, value: float):
+    if not _enabled:
+        return
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = _histograms[name] = _Histogram()
+        h.add(value)
+
+
+def record_time(name: str, seconds: float):
+    if not _enabled:
+        return
+    with _lock:
+        h = _timers.get(name)
+        if h is None:
+            h = _timers[name] = _Histogram()
+        h.add(seconds)
+
+
+class _Timer:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_time(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """`with metrics.timer("stage.fetch"): ...` (sin instrumentación devuelve un contexto vacío)."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+# --- RESUMEN ---
+def _describe(h: _Histogram) -> dict:
+    """count/sum/mean/min/max exactos; los percentiles salen de la muestra (aproximados si count > RESERVOIR_SIZE)."""
+    p50, p95, p99 = np.percentile(np.asarray(h.samples, dtype=np.float64), [50, 95, 99])
+    return {"count": h.count, "sum": float(h.sum), "mean": float(h.sum / h.count),
+            "p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "min": float(h.min), "max": float(h.max)}
+
+
+def snapshot() -> dict:
+    """Todas las métricas en un dict serializable a JSON."""
+    with _lock:
+        counters = dict(_counters)
+        timers = {k: v.copy() for k, v in _timers.items()}
+        histograms = {k: v.copy() for k, v in _histograms.items()}
+    return {
+        "wall_s": time.perf_counter() - _started if _started is not None else None,
+        "timers": {k: _describe(v) for k, v in sorted(timers.items())},
+        "counters": dict(sorted(counters.items())),
+        "histograms": {k: _describe(v) for k, v in sorted(histograms.items())},
+    }
+
+
+def dump_json(path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+def summary() -> str:
+    snap = snapshot()
+    lines = [f"Perfil de la ejecución ({snap['wall_s'] or 0:.2f} s)"]
+    if snap["timers"]:
+        lines.append(f"\n{'Etapa':<34}{'llamadas':>9}{'total (s)':>11}{'media (ms)':>12}{'p95 (ms)':>10}{'máx (ms)':>10}")
+        for name, d in snap["timers"].items():
+            lines.append(f"{name:<34}{d['count']:>9}{d['sum']:>11.3f}{d['mean'] * 1000:>12.1f}"
+                         f"{d['p95'] * 1000:>10.1f}{d['max'] * 1000:>10.1f}")
+    if snap["histograms"]:
+        lines.append(f"\n{'Histograma':<34}{'n':>9}{'media':>11}{'p50':>12}{'p95':>10}{'p99':>10}")
+        for name, d in snap["histograms"].items():
+            lines.append(f"{name:<34}{d['count']:>9}{d['mean']:>11.4g}{d['p50']:>12.4g}"
+                         f"{d['p95']:>10.4g}{d['p99']:>10.4g}")
+    if snap["counters"]:
+        lines.append(f"\n{'Contador':<34}{'valor':>14}")
+        for name, value in snap["counters"].items():
+            lines.append(f"{name:<34}{value:>14,.0f}")
+    return "\n".join(lines)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+# Columnas por bloque: cada bloque es una matriz block_size x n_activos de correlaciones
+# (~16 MB en float64 con 512 x 4.000), en lugar de la matriz completa n x n.
+DEFAULT_BLOCK_SIZE = 512
+DEFAULT_TOP_K = 5
+
+
+@dataclass
+class CorrelationSummary:
+    """Resumen de la correlación de un universo grande sin guardar la matriz completa."""
+    n_assets: int
+    n_pairs: int
+    mean: float             # correlación media de todos los pares
+    top: pd.DataFrame       # k pares más correlacionados (asset_1, asset_2, corr)
+    bottom: pd.DataFrame    # k pares menos correlacionados
+    avg_by_asset: pd.Series # correlación media de cada activo con el resto
+
+
+def standardize(returns: np.ndarray, dtype=np.float64) -> np.ndarray:
+    """
+    Centra y escala cada columna para que corr = Z.T @ Z. Las columnas con
+    varianza nula quedan a NaN (su correlación no está definida).
+    """
+    x = np.asarray(returns, dtype=dtype)
+    x = x - x.mean(axis=0)
+    norm = np.sqrt((x * x).sum(axis=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / np.where(norm > 0, norm, np.nan)
+
+
+def _select(values: np.ndarray, k: int, largest: bool) -> np.ndarray:
+    """Posiciones de los k mayores (o menores) por selección parcial, sin ordenar todo. Ignora NaN."""
+    key = np.where(np.isnan(values), -np.inf if largest else np.inf, values)
+    if largest:
+        key = -key
+    pos = np.argpartition(key, k - 1)[:k] if len(key) > k else np.arange(len(key))
+    return pos[np.isfinite(key[pos])]
+
+
+def _merge(best, values: np.ndarray, rows: np.ndarray, cols: np.ndarray, k: int, largest: bool):
+    values = np.concatenate([best[0], values])
+    rows = np.concatenate([best[1], rows])
+    cols = np.concatenate([best[2], cols])
+    keep = _select(values, k, largest)
+    return values[keep], rows[keep], cols[keep]
+
+
+def correlation_summary(returns: pd.DataFrame, k: int = DEFAULT_TOP_K,
+                        block_size: int = DEFAULT_BLOCK_SIZE, dtype=np.float64) -> CorrelationSummary:
+    """
+    Recorre la matriz de correlaciones por bloques de filas (solo el triángulo superior)
+    y se queda con los k pares más y menos correlacionados, la media global y la media
+    por activo. La memoria es O(block_size x n_activos) en lugar de O(n_activos²).
+    """
+    z = standardize(returns.to_numpy(), dtype)
+    tickers = np.asarray(returns.columns)
+    A = z.shape[1]
+    if A < 2:
+        raise ValueError("Se necesitan al menos 2 activos para la correlación.")
+
+    sums = np.zeros(A)      # suma de correlaciones de cada activo con el resto
+    counts = np.zeros(A)    # nº de pares válidos de cada activo
+    top = bottom = (np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    for i0 in range(0, A, block_size):
+        i1 = min(i0 + block_size, A)
+        block = (z[:, i0:i1].T @ z[:, i0:]).astype(np.float64)   # filas i0:i1, columnas i0:A
+        # Solo pares con j > i: se descarta la diagonal y lo que queda por debajo
+        block[np.tril_indices(i1 - i0, 0, block.shape[1])] = np.nan
+        valid = ~np.isnan(block)
+
+        filled = np.where(valid, block, 0.0)
+        sums[i0:i1] += filled.sum(axis=1)
+        sums[i0:] += filled.sum(axis=0)
+        counts[i0:i1] += valid.sum(axis=1)
+        counts[i0:] += valid.sum(axis=0)
+
+        # Candidatos del bloque por selección parcial y fusión con los mejores hasta ahora
+        flat = block.ravel()
+        width = block.shape[1]
+        for largest in (True, False):
+            pos = _select(flat, k, largest)
+            cand = (flat[pos], pos // width + i0, pos % width + i0)
+            if largest:
+                top = _merge(top, *cand, k, largest)
+            else:
+                bottom = _merge(bottom, *cand, k, largest)
+
+    def to_frame(sel: Tuple[np.ndarray, np.ndarray, np.ndarray], ascending: bool) -> pd.DataFrame:
+        values, rows, cols = sel
+        order = np.argsort(values if ascending else -values, kind="stable")
+        return pd.DataFrame({"asset_1": tickers[rows[order]], "asset_2": tickers[cols[order]],
+                             "corr": values[order]})
+
+    n_pairs = int(counts.sum() // 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = pd.Series(sums / counts, index=tickers, name="avg_corr")
+    return CorrelationSummary(
+        n_assets=A,
+        n_pairs=n_pairs,
+        mean=float(sums.sum() / 2 / n_pairs) if n_pairs else float("nan"),
+        top=to_frame(top, ascending=False),
+        bottom=to_frame(bottom, ascending=True),
+        avg_by_asset=avg,
+    )
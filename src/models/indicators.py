@@ -0,0 +1,200 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Union
+import numpy as np
+import pandas as pd
+
+# Todas las funciones aceptan una Series (un activo) o un DataFrame con una
+# columna por activo, y devuelven el mismo tipo con el mismo índice.
+# Los NaN se tratan como huecos: las ventanas cuentan observaciones válidas, no
+# filas, de modo que un activo dentro de una matriz alineada (con huecos donde
+# no cotiza) da el mismo resultado que calculado sobre su propia serie.
+Frame = Union[pd.Series, pd.DataFrame]
+
+# Periodos por defecto de cada indicador (los mismos que usan AlphaVantage/TwelveData)
+DEFAULT_PERIODS = {"rsi": 14, "sma": 20, "ema": 20, "bollinger": 20, "atr": 14, "macd": 12}
+INDICATORS = tuple(DEFAULT_PERIODS)
+
+
+# --- VENTANAS SOBRE OBSERVACIONES VÁLIDAS ---
+def _as_2d(x: Frame):
+    values = x.to_numpy(dtype=np.float64, na_value=np.nan)
+    if isinstance(x, pd.DataFrame):
+        return values, lambda out: pd.DataFrame(out, index=x.index, columns=x.columns)
+    return values[:, None], lambda out: pd.Series(out[:, 0], index=x.index, name=x.name)
+
+
+def _window_sums(values: np.ndarray, window: int, powers=(1,)):
+    """
+    Suma de las `window` últimas observaciones válidas de cada columna (y de sus
+    potencias), para todas las filas a la vez: se compactan los valores válidos
+    de cada columna al principio, se hace la suma acumulada y se devuelve cada
+    resultado a su fila. Devuelve las sumas y la máscara de filas con ventana completa.
+    """
+    T, A = values.shape
+    valid = ~np.isnan(values)
+    rank = np.cumsum(valid, axis=0)  # nº de observaciones válidas hasta cada fila (incluida)
+    full = valid & (rank >= window)
+    if T < window:
+        return [np.full((T, A), np.nan) for _ in powers], full
+
+    dest = ((rank - 1) * A + np.arange(A))[valid]
+    src = values[valid]
+    idx = np.clip(rank - window, 0, T - window)
+    sums = []
+    for p in powers:
+        compact = np.zeros((T, A))
+        compact.ravel()[dest] = src ** p
+        acc = np.zeros((T + 1, A))
+        np.cumsum(compact, axis=0, out=acc[1:])
+        sums.append(np.take_along_axis(acc[window:] - acc[:-window], idx, axis=0))
+    return sums, full
+
+
+def rolling_valid_mean(x: Frame, window: int) -> Frame:
+    values, wrap = _as_2d(x)
+    (total,), full = _window_sums(values, window)
+    return wrap(np.where(full, total / window, np.nan))
+
+
+def rolling_valid_std(x: Frame, window: int, ddof: int = 1) -> Frame:
+    values, wrap = _as_2d(x)
+    # Centrar por columna reduce la cancelación al restar sumas de cuadrados
+    with np.errstate(invalid="ignore"):
+        center = np.nanmean(values, axis=0) if len(values) else 0.0
+    (s1, s2), full = _window_sums(values - center, window, powers=(1, 2))
+    var = (s2 - s1 ** 2 / window) / (window - ddof)
+    return wrap(np.where(full, np.sqrt(np.maximum(var, 0.0)), np.nan))
+
+
+def diff_valid(x: Frame) -> Frame:
+    """Diferencia con la observación válida anterior (en una serie sin huecos, igual que diff())."""
+    return x - x.ffill().shift(1)
+
+
+# --- MEDIAS ---
+def sma(x: Frame, window: int) -> Frame:
+    return rolling_valid_mean(x, window)
+
+
+def ema(x: Frame, span: int) -> Frame:
+    # Sembrada con la SMA de las primeras `span` barras, como TA-Lib y las APIs
+    return _seeded_ewm(x, 2.0 / (span + 1), span)
+
+
+def wilder(x: Frame, period: int) -> Frame:
+    """Suavizado de Wilder: EMA con alpha = 1/period sembrada con la media de las primeras `period` barras."""
+    return _seeded_ewm(x, 1.0 / period, period)
+
+
+def _seeded_ewm(x: Frame, alpha: float, period: int) -> Frame:
+    seed = rolling_valid_mean(x, period)
+    started = seed.notna().cummax()
+    first = started & ~started.shift(1, fill_value=False)
+    # Antes de la semilla: NaN; en la semilla: la media; después: los valores originales.
+    # ignore_na=True: los huecos no cuentan como pasos de la recursión.
+    y = x.where(started & ~first).where(~first, seed)
+    return y.ewm(alpha=alpha, adjust=False, ignore_na=True).mean().where(x.notna())
+
+
+# --- OSCILADORES Y BANDAS ---
+def rsi(close: Frame, period: int = 14) -> Frame:
+    return rsi_many(close, [period])[period]
+
+
+def rsi_many(close: Frame, periods: Iterable[int]) -> Dict[int, Frame]:
+    """RSI de Wilder para varios periodos; las diferencias y ganancias/pérdidas se calculan una sola vez."""
+    delta = diff_valid(close)
+    gains = delta.clip(lower=0)
+    losses = -delta.clip(upper=0)
+    out = {}
+    for period in periods:
+        avg_gain = wilder(gains, period)
+        avg_loss = wilder(losses, period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = 100 - 100 / (1 + avg_gain / avg_loss)
+        # Sin pérdidas en la ventana el RSI es 100
+        out[period] = value.where(avg_loss != 0, 100.0).where(avg_gain.notna())
+    return out
+
+
+def macd(close: Frame, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, Frame]:
+    line = ema(close, fast) - ema(close, slow)
+    sig = ema(line, signal)
+    return {"macd": line, "macd_signal": sig, "macd_hist": line - sig}
+
+
+def bollinger(close: Frame, window: int = 20, k: float = 2.0) -> Dict[str, Frame]:
+    mid = sma(close, window)
+    std = rolling_valid_std(close, window, ddof=0)
+    return {"bb_mid": mid, "bb_upper": mid + k * std, "bb_lower": mid - k * std}
+
+
+def log_returns(close: Frame) -> Frame:
+    return np.log(close / close.ffill().shift(1))
+
+
+def volatility(close: Frame, window: int) -> Frame:
+    """Desviación típica de los retornos logarítmicos diarios de las últimas `window` observaciones."""
+    return rolling_valid_std(log_returns(close), window)
+
+
+def period_return(close: Frame, window: int) -> Frame:
+    """Retorno logarítmico acumulado de las últimas `window` observaciones."""
+    return rolling_valid_mean(log_returns(close), window) * window
+
+
+def true_range(high: Frame, low: Frame, close: Frame) -> Frame:
+    prev = close.ffill().shift(1).where(close.notna())
+    ranges = [high - low, (high - prev).abs(), (low - prev).abs()]
+    # fmax ignora los NaN (la primera barra se queda con high - low)
+    values = np.fmax(np.fmax(ranges[0].to_numpy(), ranges[1].to_numpy()), ranges[2].to_numpy())
+    if isinstance(close, pd.DataFrame):
+        return pd.DataFrame(values, index=close.index, columns=close.columns)
+    return pd.Series(values, index=close.index, name=close.name)
+
+
+def atr(high: Frame, low: Frame, close: Frame, period: int = 14) -> Frame:
+    tr = true_range(high, low, close)
+    # La primera barra no tiene cierre previo: su rango verdadero no cuenta
+    return wilder(tr.where(close.ffill().shift(1).notna() & close.notna()), period)
+
+
+# --- VARIOS INDICADORES Y PERIODOS DE UNA VEZ ---
+def _col(name: str, period: int, periods: List[int]) -> str:
+    # Con un solo periodo se mantiene el nombre simple ("rsi"), como en attach_indicator
+    return name if len(periods) == 1 else f"{name}_{period}"
+
+
+def compute_indicators(bars: pd.DataFrame, indicators: Dict[str, Iterable[int]]) -> pd.DataFrame:
+    """
+    Calcula varios indicadores sobre un DataFrame OHLCV estándar (un activo) y devuelve
+    un DataFrame con el mismo índice y una columna por indicador y periodo.
+    Ej: {"rsi": [14, 28], "sma": [50]} -> columnas rsi_14, rsi_28, sma.
+    """
+    close = bars["close"]
+    out: Dict[str, pd.Series] = {}
+    for name, periods in indicators.items():
+        if name not in INDICATORS:
+            raise ValueError(f"Indicador no soportado: {name} (disponibles: {', '.join(INDICATORS)})")
+        periods = list(periods) or [DEFAULT_PERIODS[name]]
+        if name == "rsi":
+            for period, values in rsi_many(close, periods).items():
+                out[_col("rsi", period, periods)] = values
+        elif name in ("sma", "ema"):
+            fn = sma if name == "sma" else ema
+            for period in periods:
+                out[_col(name, period, periods)] = fn(close, period)
+        elif name == "bollinger":
+            for period in periods:
+                for key, values in bollinger(close, period).items():
+                    out[_col(key, period, periods)] = values
+        elif name == "macd":
+            # El periodo indica la EMA rápida; la lenta y la señal mantienen la proporción 12/26/9
+            for period in periods:
+                res = macd(close, period, round(period * 26 / 12), round(period * 9 / 12))
+                for key, values in res.items():
+                    out[_col(key, period, periods)] = values
+        elif name == "atr":
+            for period in periods:
+                out[_col("atr", period, periods)] = atr(bars["high"], bars["low"], close, period)
+    return pd.DataFrame(out, index=bars.index)
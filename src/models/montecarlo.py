@@ -0,0 +1,473 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Union
+import numpy as np
+
+# Nº de simulaciones que se procesan de golpe. Acota la memoria temporal:
+# (days + 1) x chunk_size valores por bloque (~20 MB en float64 con 252 días).
+DEFAULT_CHUNK_SIZE = 10_000
+
+SeedLike = Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+
+def make_rng(seed: SeedLike = None) -> np.random.Generator:
+    """Devuelve un Generator de numpy a partir de una semilla (o lo reutiliza)."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def spawn_seeds(seed: SeedLike, workers: int) -> list:
+    """Una semilla independiente por proceso, derivadas todas de una misma SeedSequence."""
+    if isinstance(seed, (np.random.Generator, np.random.SeedSequence)):
+        return seed.spawn(workers)
+    return np.random.SeedSequence(seed).spawn(workers)
+
+
+def _split(total: int, parts: int) -> List[int]:
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def _run_in_pool(task: Callable, simulations: int, workers: int, seed: SeedLike, **kwargs) -> list:
+    """
+    Reparte las simulaciones entre `workers` procesos, cada uno con su propio flujo
+    aleatorio, y devuelve los resultados parciales en el orden de los procesos
+    (no en el de finalización) para que la fusión sea reproducible.
+    """
+    shares = _split(simulations, workers)
+    seeds = spawn_seeds(seed, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(task, simulations=n, seed=child, **kwargs)
+                   for n, child in zip(shares, seeds) if n > 0]
+        return [f.result() for f in futures]
+
+
+def _chunk_sizes(total: int, chunk_size: int) -> Iterator[int]:
+    if chunk_size <= 0:
+        raise ValueError("chunk_size debe ser mayor que 0.")
+    done = 0
+    while done < total:
+        n = min(chunk_size, total - done)
+        yield n
+        done += n
+
+
+# --- MOTOR GBM PARA UN ACTIVO ---
+def iter_gbm_chunks(
+    last_price: float,
+    mu: float,
+    sigma: float,
+    days: int,
+    simulations: int,
+    rng: np.random.Generator,
+    dtype=np.float64,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[np.ndarray]:
+    """Genera bloques (days + 1, n) de trayectorias GBM, con n <= chunk_size."""
+    drift = float(mu) - 0.5 * float(sigma) ** 2
+    sigma = float(sigma)
+    last_price = float(last_price)
+
+    for n in _chunk_sizes(simulations, chunk_size):
+        # 1. Todos los shocks del bloque en una sola llamada. Se generan por simulación
+        #    (n, days) para que el resultado no dependa del tamaño de bloque elegido.
+        shocks = rng.standard_normal(size=(n, days), dtype=dtype)
+        # 2. Rentabilidad logarítmica diaria: drift + sigma * shock
+        shocks *= sigma
+        shocks += drift
+        # 3. Suma acumulada en el eje temporal -> log(precio / precio inicial)
+        np.cumsum(shocks, axis=1, out=shocks)
+        np.exp(shocks, out=shocks)
+        block = np.empty((days + 1, n), dtype=dtype)
+        block[0] = last_price
+        np.multiply(shocks.T, last_price, out=block[1:])
+        yield block
+
+
+def simulate_gbm(
+    last_price: float,
+    mu: float,
+    sigma: float,
+    days: int,
+    simulations: int,
+    seed: SeedLike = None,
+    dtype=np.float64,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+) -> np.ndarray:
+    """Matriz (days + 1, simulations) de trayectorias GBM, calculada por bloques."""
+    if workers > 1:
+        parts = _run_in_pool(simulate_gbm, simulations, workers, seed, last_price=last_price,
+                             mu=mu, sigma=sigma, days=days, dtype=dtype, chunk_size=chunk_size)
+        return np.concatenate(parts, axis=1)
+
+    rng = make_rng(seed)
+    paths = np.empty((days + 1, simulations), dtype=dtype)
+    col = 0
+    for block in iter_gbm_chunks(last_price, mu, sigma, days, simulations, rng, dtype, chunk_size):
+        n = block.shape[1]
+        paths[:, col:col + n] = block
+        col += n
+    return paths
+
+
+# Nº de desviaciones típicas (del logaritmo del precio) que cubre el histograma de cada día.
+_HIST_SIGMAS = 6.0
+DEFAULT_BINS = 2048
+DEFAULT_SAMPLE_PATHS = 100
+QUANTILES = (5, 50, 95)
+
+
+# --- RESUMEN COMPACTO DE UNA SIMULACIÓN ---
+@dataclass
+class MonteCarloSummary:
+    """Estadísticas por día de una simulación: lo único que necesitan el CLI y los gráficos."""
+    n_simulations: int
+    mean: np.ndarray
+    std: np.ndarray
+    p5: np.ndarray
+    p50: np.ndarray
+    p95: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    sample_paths: np.ndarray  # (days + 1, k) con k <= DEFAULT_SAMPLE_PATHS
+
+    @property
+    def days(self) -> int:
+        return len(self.mean) - 1
+
+    @property
+    def initial_value(self) -> float:
+        return float(self.mean[0])
+
+    @classmethod
+    def from_paths(cls, paths: np.ndarray, n_samples: int = DEFAULT_SAMPLE_PATHS) -> "MonteCarloSummary":
+        """Resumen exacto de una matriz (days + 1, simulations) ya calculada."""
+        # Una sola llamada a percentile (una ordenación) para los tres cuantiles
+        p5, p50, p95 = np.percentile(paths, QUANTILES, axis=1)
+        return cls(
+            n_simulations=paths.shape[1],
+            mean=paths.mean(axis=1, dtype=np.float64),
+            std=paths.std(axis=1, ddof=0, dtype=np.float64),
+            p5=p5, p50=p50, p95=p95,
+            min=paths.min(axis=1).astype(np.float64),
+            max=paths.max(axis=1).astype(np.float64),
+            sample_paths=np.array(paths[:, :n_samples]),
+        )
+
+
+class StreamingStats:
+    """
+    Acumula, bloque a bloque, media y varianza por día (fórmulas de Chan/Welford) y un
+    histograma de bins fijos por día para aproximar los percentiles, sin guardar la matriz
+    de trayectorias. Los bordes [lower, upper] de cada día deben conocerse de antemano
+    para que dos acumuladores se puedan fusionar con merge().
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, bins: int = DEFAULT_BINS,
+                 n_samples: int = DEFAULT_SAMPLE_PATHS):
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+        # Bins en escala logarítmica si todos los valores posibles son positivos
+        self.log_scale = bool(np.all(lower > 0))
+        if self.log_scale:
+            lower, upper = np.log(lower), np.log(upper)
+        self.lower = lower
+        self.width = np.where(upper > lower, (upper - lower) / bins, 1.0)
+        self.bins = bins
+        self.n_samples = n_samples
+
+        n_days = len(lower)
+        self.count = 0
+        self.mean = np.zeros(n_days)
+        self.m2 = np.zeros(n_days)
+        self.min = np.full(n_days, np.inf)
+        self.max = np.full(n_days, -np.inf)
+        self.hist = np.zeros((n_days, bins), dtype=np.int64)
+        self.samples: list[np.ndarray] = []
+        self._n_sampled = 0
+
+    def update(self, block: np.ndarray):
+        """Añade un bloque (days + 1, n) de trayectorias."""
+        n = block.shape[1]
+        if n == 0:
+            return
+        # 1. Media y M2 del bloque y fusión con lo acumulado
+        block_mean = block.mean(axis=1, dtype=np.float64)
+        block_m2 = ((block - block_mean[:, None].astype(block.dtype)) ** 2).sum(axis=1, dtype=np.float64)
+        self._merge_moments(n, block_mean, block_m2)
+        np.minimum(self.min, block.min(axis=1), out=self.min)
+        np.maximum(self.max, block.max(axis=1), out=self.max)
+
+        # 2. Histograma: un único bincount sobre índices (día, bin) aplanados
+        values = np.log(block) if self.log_scale else block
+        idx = ((values - self.lower[:, None]) / self.width[:, None]).astype(np.int64)
+        np.clip(idx, 0, self.bins - 1, out=idx)
+        idx += (np.arange(len(self.lower)) * self.bins)[:, None]
+        self.hist += np.bincount(idx.ravel(), minlength=self.hist.size).reshape(self.hist.shape)
+
+        # 3. Trayectorias de muestra para los gráficos
+        if self._n_sampled < self.n_samples:
+            take = block[:, :self.n_samples - self._n_sampled]
+            self.samples.append(np.array(take))
+            self._n_sampled += take.shape[1]
+
+    def _merge_moments(self, n: int, mean: np.ndarray, m2: np.ndarray):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta**2 * (self.count * n / total)
+        self.count = total
+
+    def merge(self, other: "StreamingStats"):
+        """Fusiona otro acumulador con los mismos bordes (p. ej. el de otro proceso)."""
+        if other.count == 0:
+            return self
+        self._merge_moments(other.count, other.mean, other.m2)
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        self.hist += other.hist
+        for sample in other.samples:
+            if self._n_sampled >= self.n_samples:
+                break
+            take = sample[:, :self.n_samples - self._n_sampled]
+            self.samples.append(take)
+            self._n_sampled += take.shape[1]
+        return self
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Percentil q (0-100) aproximado de cada día, interpolando dentro del bin."""
+        cum = np.cumsum(self.hist, axis=1)
+        target = q / 100 * self.count
+        idx = np.argmax(cum >= target, axis=1)
+        rows = np.arange(len(idx))
+        in_bin = self.hist[rows, idx]
+        before = cum[rows, idx] - in_bin
+        frac = np.divide(target - before, in_bin, out=np.zeros(len(idx)), where=in_bin > 0)
+        values = self.lower + (idx + frac) * self.width
+        if self.log_scale:
+            values = np.exp(values)
+        return np.clip(values, self.min, self.max)
+
+    def summary(self) -> MonteCarloSummary:
+        if self.count == 0:
+            raise ValueError("No hay simulaciones acumuladas.")
+        p5, p50, p95 = (self.quantile(q) for q in QUANTILES)
+        samples = np.concatenate(self.samples, axis=1) if self.samples else np.empty((len(self.mean), 0))
+        return MonteCarloSummary(
+            n_simulations=self.count,
+            mean=self.mean.copy(),
+            std=np.sqrt(self.m2 / self.count),
+            p5=p5, p50=p50, p95=p95,
+            min=self.min.copy(),
+            max=self.max.copy(),
+            sample_paths=samples,
+        )
+
+
+def _gbm_bounds(last_price, drift, sigma, days: int):
+    """Rango [lower, upper] por día que cubre +-_HIST_SIGMAS desviaciones del log-precio."""
+    t = np.arange(days + 1)
+    center = np.multiply.outer(t, np.asarray(drift, dtype=np.float64))
+    spread = _HIST_SIGMAS * np.multiply.outer(np.sqrt(t), np.asarray(sigma, dtype=np.float64))
+    lower = np.asarray(last_price, dtype=np.float64) * np.exp(center - spread)
+    upper = np.asarray(last_price, dtype=np.float64) * np.exp(center + spread)
+    return lower, upper
+
+
+def gbm_stats(last_price: float, mu: float, sigma: float, days: int,
+              bins: int = DEFAULT_BINS) -> StreamingStats:
+    drift = float(mu) - 0.5 * float(sigma) ** 2
+    lower, upper = _gbm_bounds(float(last_price), drift, float(sigma), days)
+    return StreamingStats(lower, upper, bins=bins)
+
+
+def portfolio_stats(last_prices: np.ndarray, drift: np.ndarray, cov_diag: np.ndarray,
+                    weights: np.ndarray, days: int, bins: int = DEFAULT_BINS) -> StreamingStats:
+    # Cota conservadora: cada activo en su extremo (el inferior o el superior según el signo del peso)
+    lower_i, upper_i = _gbm_bounds(last_prices, drift, np.sqrt(cov_diag), days)
+    weights = np.asarray(weights, dtype=np.float64)
+    pos, neg = np.clip(weights, 0, None), np.clip(weights, None, 0)
+    lower = lower_i @ pos + upper_i @ neg
+    upper = upper_i @ pos + lower_i @ neg
+    return StreamingStats(lower, upper, bins=bins)
+
+
+def accumulate_gbm(last_price: float, mu: float, sigma: float, days: int, simulations: int,
+                   seed: SeedLike = None, dtype=np.float64,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> StreamingStats:
+    rng = make_rng(seed)
+    stats = gbm_stats(last_price, mu, sigma, days)
+    for block in iter_gbm_chunks(last_price, mu, sigma, days, simulations, rng, dtype, chunk_size):
+        stats.update(block)
+    return stats
+
+
+def summarize_gbm(last_price: float, mu: float, sigma: float, days: int, simulations: int,
+                  seed: SeedLike = None, dtype=np.float64,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1) -> MonteCarloSummary:
+    """Igual que simulate_gbm pero devolviendo solo un MonteCarloSummary (memoria acotada)."""
+    if workers > 1:
+        parts = _run_in_pool(accumulate_gbm, simulations, workers, seed, last_price=last_price,
+                             mu=mu, sigma=sigma, days=days, dtype=dtype, chunk_size=chunk_size)
+        return _merge_stats(parts).summary()
+    return accumulate_gbm(last_price, mu, sigma, days, simulations, seed, dtype, chunk_size).summary()
+
+
+def _merge_stats(parts: List[StreamingStats]) -> StreamingStats:
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    return merged
+
+
+# Presupuesto por defecto para los buffers de trabajo de la simulación de cartera.
+DEFAULT_MEMORY_BUDGET_MB = 256.0
+
+
+def portfolio_chunk_size(days: int, n_assets: int, dtype=np.float64,
+                         memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB) -> int:
+    """Nº de simulaciones por bloque para que los buffers de trabajo quepan en el presupuesto."""
+    itemsize = np.dtype(dtype).itemsize
+    # Shocks Z y shocks correlacionados (n, days, n_assets) + valores de cartera (days + 1, n)
+    # y su producto con los pesos antes de trasponer (n, days)
+    bytes_per_sim = (2 * days * n_assets + 2 * days + 1) * itemsize
+    return max(1, int(memory_budget_mb * 1024**2) // bytes_per_sim)
+
+
+def iter_portfolio_chunks(
+    last_prices: np.ndarray,
+    drift: np.ndarray,
+    L: np.ndarray,
+    weights: np.ndarray,
+    days: int,
+    simulations: int,
+    rng: np.random.Generator,
+    dtype=np.float64,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    with_assets: bool = False,
+):
+    """
+    Genera tuplas (valores_cartera, precios_activos) por bloques de simulaciones.
+    valores_cartera tiene forma (days + 1, n); precios_activos es (n, days, n_assets)
+    si with_assets=True y None en caso contrario.
+    """
+    n_assets = len(last_prices)
+    last_prices = np.asarray(last_prices, dtype=dtype)
+    drift = np.asarray(drift, dtype=dtype)
+    L_T = np.asarray(L, dtype=dtype).T
+    weights = np.asarray(weights, dtype=dtype)
+    initial_value = last_prices @ weights
+
+    for n in _chunk_sizes(simulations, chunk_size):
+        # 1. Shocks independientes de todo el bloque (por simulación, igual que en
+        #    iter_gbm_chunks) y correlación vía Cholesky
+        Z = rng.standard_normal(size=(n, days, n_assets), dtype=dtype)
+        shocks = Z @ L_T
+        del Z
+        # 2. Rentabilidades logarítmicas acumuladas -> precios de cada activo
+        shocks += drift
+        np.cumsum(shocks, axis=1, out=shocks)
+        np.exp(shocks, out=shocks)
+        shocks *= last_prices
+        # 3. Reducción directa a valor de cartera (sin guardar trayectorias por activo)
+        values = np.empty((days + 1, n), dtype=dtype)
+        values[0] = initial_value
+        values[1:] = (shocks @ weights).T
+        yield values, (shocks if with_assets else None)
+
+
+def simulate_portfolio(
+    last_prices: np.ndarray,
+    drift: np.ndarray,
+    L: np.ndarray,
+    weights: np.ndarray,
+    days: int,
+    simulations: int,
+    seed: SeedLike = None,
+    dtype=np.float64,
+    memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+    return_asset_paths: bool = False,
+    workers: int = 1,
+):
+    """
+    Matriz (days + 1, simulations) con el valor de la cartera. Si return_asset_paths=True
+    devuelve además las trayectorias por activo con forma (days + 1, n_assets, simulations).
+    Con workers > 1 el presupuesto de memoria se reparte entre los procesos.
+    """
+    if workers > 1:
+        parts = _run_in_pool(simulate_portfolio, simulations, workers, seed, last_prices=last_prices,
+                             drift=drift, L=L, weights=weights, days=days, dtype=dtype,
+                             memory_budget_mb=memory_budget_mb / workers,
+                             return_asset_paths=return_asset_paths)
+        if return_asset_paths:
+            return (np.concatenate([p for p, _ in parts], axis=1),
+                    np.concatenate([a for _, a in parts], axis=2))
+        return np.concatenate(parts, axis=1)
+
+    rng = make_rng(seed)
+    n_assets = len(last_prices)
+    chunk_size = portfolio_chunk_size(days, n_assets, dtype, memory_budget_mb)
+
+    portfolio_paths = np.empty((days + 1, simulations), dtype=dtype)
+    asset_paths = None
+    if return_asset_paths:
+        asset_paths = np.empty((days + 1, n_assets, simulations), dtype=dtype)
+        asset_paths[0] = np.asarray(last_prices, dtype=dtype).reshape(-1, 1)
+
+    col = 0
+    for values, prices in iter_portfolio_chunks(last_prices, drift, L, weights, days, simulations,
+                                                rng, dtype, chunk_size, with_assets=return_asset_paths):
+        n = values.shape[1]
+        portfolio_paths[:, col:col + n] = values
+        if prices is not None:
+            asset_paths[1:, :, col:col + n] = prices.transpose(1, 2, 0)
+        col += n
+
+    if return_asset_paths:
+        return portfolio_paths, asset_paths
+    return portfolio_paths
+
+
+def accumulate_portfolio(
+    last_prices: np.ndarray,
+    drift: np.ndarray,
+    L: np.ndarray,
+    weights: np.ndarray,
+    days: int,
+    simulations: int,
+    seed: SeedLike = None,
+    dtype=np.float64,
+    memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+) -> StreamingStats:
+    rng = make_rng(seed)
+    chunk_size = portfolio_chunk_size(days, len(last_prices), dtype, memory_budget_mb)
+    stats = portfolio_stats(last_prices, drift, np.sum(np.asarray(L) ** 2, axis=1), weights, days)
+    for values, _ in iter_portfolio_chunks(last_prices, drift, L, weights, days, simulations,
+                                           rng, dtype, chunk_size):
+        stats.update(values)
+    return stats
+
+
+def summarize_portfolio(
+    last_prices: np.ndarray,
+    drift: np.ndarray,
+    L: np.ndarray,
+    weights: np.ndarray,
+    days: int,
+    simulations: int,
+    seed: SeedLike = None,
+    dtype=np.float64,
+    memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+    workers: int = 1,
+) -> MonteCarloSummary:
+    """Igual que simulate_portfolio pero devolviendo solo un MonteCarloSummary."""
+    if workers > 1:
+        parts = _run_in_pool(accumulate_portfolio, simulations, workers, seed, last_prices=last_prices,
+                             drift=drift, L=L, weights=weights, days=days, dtype=dtype,
+                             memory_budget_mb=memory_budget_mb / workers)
+        return _merge_stats(parts).summary()
+    return accumulate_portfolio(last_prices, drift, L, weights, days, simulations,
+                                seed, dtype, memory_budget_mb).summary()
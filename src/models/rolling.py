@@ -0,0 +1,142 @@
+from __future__ import annotations
+from typing import Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOWS = (60, 252)   # ~3 meses y ~1 año bursátil
+DEFAULT_LAMBDA = 0.94         # decaimiento diario de RiskMetrics para EWMA
+
+# Cada cuántos pasos se recalculan las sumas de la ventana desde cero, para que
+# el error de redondeo de sumar y restar no se acumule en series muy largas.
+RESYNC_EVERY = 1000
+
+Pair = Tuple[str, str]
+
+
+def cov_to_corr(cov: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(std, std)
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+# --- MATRICES COMPLETAS (una por paso, en streaming) ---
+def iter_rolling_cov(returns: np.ndarray, window: int,
+                     resync: int = RESYNC_EVERY) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Covarianza de ventana móvil actualizada de forma incremental: al avanzar un paso
+    se suma la observación que entra y se resta la que sale de las sumas y de los
+    productos cruzados, O(n²) por paso en lugar de O(window x n²).
+    Devuelve (fila, matriz) para cada fila con la ventana completa.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    T, A = x.shape
+    if window < 2:
+        raise ValueError("La ventana debe tener al menos 2 observaciones.")
+    if T < window:
+        return
+    # Centrar con la media global no cambia la covarianza y reduce la cancelación
+    x = x - x.mean(axis=0)
+
+    s = x[:window].sum(axis=0)
+    ss = x[:window].T @ x[:window]
+    for t in range(window - 1, T):
+        if t >= window:
+            new, old = x[t], x[t - window]
+            if (t - window + 1) % resync == 0:
+                block = x[t - window + 1:t + 1]
+                s, ss = block.sum(axis=0), block.T @ block
+            else:
+                s += new - old
+                ss += np.outer(new, new) - np.outer(old, old)
+        yield t, (ss - np.outer(s, s) / window) / (window - 1)
+
+
+def iter_ewma_cov(returns: np.ndarray, lam: float = DEFAULT_LAMBDA,
+                  min_periods: int = 2) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Covarianza exponencial (EWMA) incremental: media y covarianza se actualizan con
+    cada observación, dando peso (1 - lam) a la nueva. Igual que ewm(alpha=1-lam,
+    adjust=False).cov(bias=True) de pandas, pero para la matriz completa.
+    """
+    if not 0 < lam < 1:
+        raise ValueError("lam debe estar entre 0 y 1.")
+    x = np.asarray(returns, dtype=np.float64)
+    alpha = 1.0 - lam
+    mean = x[0].copy()
+    cov = np.zeros((x.shape[1], x.shape[1]))
+    for t in range(1, len(x)):
+        diff = x[t] - mean
+        incr = alpha * diff
+        mean += incr
+        cov = (1.0 - alpha) * (cov + np.outer(diff, incr))
+        if t + 1 >= min_periods:
+            yield t, cov
+
+
+def last_cov(returns: np.ndarray, window: Optional[int] = None, lam: Optional[float] = None) -> np.ndarray:
+    """Covarianza de la última ventana (o la EWMA al final de la serie)."""
+    x = np.asarray(returns, dtype=np.float64)
+    if lam is not None:
+        cov = None
+        for _, cov in iter_ewma_cov(x, lam):
+            pass
+        if cov is None:
+            raise ValueError("No hay suficientes datos para la covarianza EWMA.")
+        return cov.copy()
+    if window is not None:
+        if len(x) < window:
+            raise ValueError(f"No hay suficientes datos ({len(x)}) para una ventana de {window}.")
+        x = x[-window:]
+    return np.atleast_2d(np.cov(x, rowvar=False))
+
+
+# --- PARES SELECCIONADOS (series temporales, vectorizado en el tiempo) ---
+def _pair_index(columns: Sequence[str], pairs: List[Pair]) -> Tuple[np.ndarray, np.ndarray]:
+    pos = {c: i for i, c in enumerate(columns)}
+    missing = [p for pair in pairs for p in pair if p not in pos]
+    if missing:
+        raise ValueError(f"Activos no encontrados en la cartera: {', '.join(sorted(set(missing)))}")
+    return np.array([pos[a] for a, _ in pairs]), np.array([pos[b] for _, b in pairs])
+
+
+def rolling_pairs(returns: pd.DataFrame, pairs: List[Pair], window: Optional[int] = None,
+                  lam: Optional[float] = None, corr: bool = True) -> pd.DataFrame:
+    """
+    Covarianza o correlación móvil (ventana fija o EWMA) de unos pares concretos, como
+    series temporales: una columna "A/B" por par. Las sumas móviles se calculan
+    con sumas acumuladas, así que el coste es O(T x pares) sin bucle en el tiempo.
+    """
+    if (window is None) == (lam is None):
+        raise ValueError("Indica una ventana (window) o un decaimiento EWMA (lam), no ambos.")
+    x = returns.to_numpy(dtype=np.float64)
+    x = x - x.mean(axis=0)
+    i, j = _pair_index(returns.columns, pairs)
+    names = [f"{a}/{b}" for a, b in pairs]
+    cross = x[:, i] * x[:, j]
+
+    if window is not None:
+        def rolled(values: np.ndarray) -> np.ndarray:
+            acc = np.zeros((len(values) + 1, values.shape[1]))
+            np.cumsum(values, axis=0, out=acc[1:])
+            out = np.full(values.shape, np.nan)
+            out[window - 1:] = acc[window:] - acc[:-window]
+            return out
+        s_i, s_j = rolled(x[:, i]), rolled(x[:, j])
+        cov = (rolled(cross) - s_i * s_j / window) / (window - 1)
+        var_i = (rolled(x[:, i] ** 2) - s_i ** 2 / window) / (window - 1)
+        var_j = (rolled(x[:, j] ** 2) - s_j ** 2 / window) / (window - 1)
+    else:
+        ew = lambda values: pd.DataFrame(values).ewm(alpha=1 - lam, adjust=False).mean().to_numpy()
+        m_i, m_j = ew(x[:, i]), ew(x[:, j])
+        cov = ew(cross) - m_i * m_j
+        var_i = ew(x[:, i] ** 2) - m_i ** 2
+        var_j = ew(x[:, j] ** 2) - m_j ** 2
+
+    if corr:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.clip(cov / np.sqrt(np.maximum(var_i, 0) * np.maximum(var_j, 0)), -1.0, 1.0)
+    else:
+        values = cov
+    return pd.DataFrame(values, index=returns.index, columns=names)
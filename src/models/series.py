@@ -4,36 +4,138 @@ from datetime import datetime
 import pandas as pd
 from typing import Optional, Dict, List, Union
 import numpy as np 
-from tabulate import tabulate
-
-from src.plots.plots import (
-    plot_prices, 
-    plot_monte_carlo,
-    plot_normalized_prices,      
-    plot_correlation_heatmap,    
-    plot_weights_pie_chart      
+import time
+
+from src import metrics
+
+# matplotlib, seaborn (src.plots) y tabulate se importan dentro de los métodos que
+# los usan: cargarlos aquí costaba ~0,5 s en cada ejecución de la CLI, aunque no
+# se pidiera ningún gráfico ni informe.
+from src.models.correlation import correlation_summary, CorrelationSummary, DEFAULT_BLOCK_SIZE, DEFAULT_TOP_K
+from src.models.rolling import (
+    iter_rolling_cov, iter_ewma_cov, last_cov, cov_to_corr, rolling_pairs,
+    ROLLING_WINDOWS, DEFAULT_LAMBDA, Pair,
+)
+from src.normalization.normalizer import compact_frame
+from src.models.indicators import compute_indicators, rsi_many, sma, ema, volatility, period_return
+from src.models.montecarlo import (
+    simulate_gbm,
+    simulate_portfolio,
+    summarize_gbm,
+    summarize_portfolio,
+    MonteCarloSummary,
+    SeedLike,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_MEMORY_BUDGET_MB,
 )
 
 
-@dataclass
+class _RunningStats:
+    """Media, varianza (Welford/Chan), mínimo y máximo de una columna, actualizables por bloques."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min_value = float('nan')
+        self.min_date = None
+        self.max_value = float('nan')
+        self.max_date = None
+
+    def update(self, values: pd.Series):
+        x = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(x)
+        n_b = int(valid.sum())
+        if n_b == 0:
+            return
+        x_valid = x[valid]
+        mean_b = x_valid.mean()
+        m2_b = ((x_valid - mean_b) ** 2).sum()
+
+        # Combinación de los acumuladores de los dos bloques (Chan et al.)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+
+        # Mínimo y máximo: en empate se queda la primera fecha, como idxmin/idxmax
+        i_min, i_max = np.nanargmin(x), np.nanargmax(x)
+        if self.min_date is None or x[i_min] < self.min_value:
+            self.min_value, self.min_date = x[i_min], values.index[i_min]
+        if self.max_date is None or x[i_max] > self.max_value:
+            self.max_value, self.max_date = x[i_max], values.index[i_max]
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else float('nan')
+
+
+# Métodos de relleno admitidos (incluidos los alias 'pad'/'backfill' del antiguo fillna(method=...))
+_FILL_METHODS = {"ffill": "ffill", "pad": "ffill", "bfill": "bfill", "backfill": "bfill"}
+
+
+def _fill_method(method: str) -> str:
+    if method not in _FILL_METHODS:
+        raise ValueError(f"Método de relleno no soportado: {method} (usa 'ffill'/'pad' o 'bfill'/'backfill').")
+    return _FILL_METHODS[method]
+
+
+@dataclass(init=False)
 class PriceSeries:
     
-    # 1. CAMPOS QUE PASAMOS AL CREARLA
+    # 1. CAMPOS QUE PASAMOS AL CREARLA (más `data`, la propiedad de abajo)
     ticker: str
     source: str
-    data: pd.DataFrame
     
     # 2. CAMPOS CALCULADOS (no se pasan al crearla)
     start_date: Optional[datetime] = field(init=False)
     end_date: Optional[datetime] = field(init=False)
     
     # --- CAMPOS ESTADÍSTICOS AUTOMÁTICOS ---
-    # Se calcularán en __post_init__
+    # Se calculan en _compute_stats y se actualizan en cada append()
     main_col: Optional[str] = field(init=False, default=None) # (close o rsi)
     mean_value: Optional[float] = field(init=False, default=float('nan'))
     std_dev_value: Optional[float] = field(init=False, default=float('nan'))
 
-    def __post_init__(self):
+    # Se incrementa en cada limpieza que modifica `data` (invalida la caché de Portfolio)
+    _version: int = field(init=False, default=0, repr=False, compare=False)
+
+    # --- DATOS CON ANEXADO PEREZOSO ---
+    # Las barras de append() se guardan en `_chunks` y solo se concatenan con `_data`
+    # cuando alguien lee `data`; `_n_rows` cuenta las filas de ambos.
+    _data: pd.DataFrame = field(init=False, repr=False, compare=False)
+    _chunks: List[pd.DataFrame] = field(init=False, default_factory=list, repr=False, compare=False)
+    _n_rows: int = field(init=False, default=0, repr=False, compare=False)
+    _stats: _RunningStats = field(init=False, repr=False, compare=False)
+
+    # __init__ propio (dataclass(init=False)): `data` es una propiedad, no un campo
+    def __init__(self, ticker: str, source: str, data: pd.DataFrame):
+        self.ticker = ticker
+        self.source = source
+        self._version = 0
+        self.__post_init__(data)
+
+    def __post_init__(self, data: pd.DataFrame):
+        self.data = data
+        self._compute_stats()
+
+    @property
+    def data(self) -> pd.DataFrame:
+        if self._chunks:
+            self._data = pd.concat([self._data, *self._chunks])
+            self._chunks.clear()
+        return self._data
+
+    @data.setter
+    def data(self, df: pd.DataFrame):
+        self._data = df
+        self._chunks = []
+        self._n_rows = len(df)
+
+    def _compute_stats(self):
+        """Fechas, columna principal y estadísticas desde cero (al crear la serie o tras limpiarla)."""
+        self._stats = _RunningStats()
         if not self.data.empty:
             # --- Cálculo de fechas (existente) ---
             self.start_date = self.data.index.min()
@@ -45,14 +147,13 @@ class PriceSeries:
                 self.main_col = 'close'
             elif 'rsi' in self.data.columns:
                 self.main_col = 'rsi'
+            else:
+                self.main_col = None
             
             # 2. Calcular media y desviación si tenemos una columna principal
             if self.main_col:
-                self.mean_value = self.data[self.main_col].mean()
-                self.std_dev_value = self.data[self.main_col].std()
-            else:
-                self.mean_value = float('nan')
-                self.std_dev_value = float('nan')
+                self._stats.update(self.data[self.main_col])
+            self._sync_stats()
         else:
             # --- Caso de DataFrame vacío (existente) ---
             self.start_date = None
@@ -61,11 +162,64 @@ class PriceSeries:
             self.std_dev_value = float('nan')
             self.main_col = None
 
+    def _sync_stats(self):
+        if self._stats.n:
+            self.mean_value = self._stats.mean
+            self.std_dev_value = self._stats.std
+        else:
+            self.mean_value = float('nan')
+            self.std_dev_value = float('nan')
+
+    def append(self, bars: pd.DataFrame):
+        """
+        Añade barras nuevas (posteriores a end_date) sin copiar el histórico.
+        Fechas, media, desviación y mín/máx se actualizan solo con las barras nuevas.
+        """
+        if bars is None or bars.empty:
+            return self
+        if not bars.index.is_monotonic_increasing:
+            bars = bars.sort_index()
+        if self.end_date is not None and bars.index[0] <= self.end_date:
+            raise ValueError(f"[{self.ticker}] Las barras nuevas deben ser posteriores a {self.end_date}.")
+
+        if self._n_rows == 0:
+            # Serie vacía: no hay nada que conservar, se inicializa con las barras
+            self.__post_init__(bars.copy())
+        else:
+            self._chunks.append(bars.reindex(columns=self._data.columns))
+            self._n_rows += len(bars)
+            self.end_date = bars.index[-1]
+            if self.main_col and self.main_col in bars.columns:
+                self._stats.update(bars[self.main_col])
+                self._sync_stats()
+        self._version += 1
+        return self
+
     def __len__(self) -> int:
-        return len(self.data)
+        return self._n_rows
+
+    # --- MEMORIA ---
+    def memory_usage(self) -> int:
+        """Bytes que ocupan las barras (índice y strings incluidos)."""
+        return int(self.data.memory_usage(index=True, deep=True).sum())
+
+    def compact(self, price_dtype="float32", int_volume: bool = True):
+        """Pasa las barras al formato compacto (ver Normalizer / compact_frame)."""
+        compacted = compact_frame(self.data, price_dtype, int_volume)
+        if compacted is not self.data:
+            self.data = compacted
+            self._version += 1
+        return self
+
+    @classmethod
+    def from_store(cls, store, ticker: str, provider: str, start=None, end=None,
+                   columns: Optional[List[str]] = None) -> "PriceSeries":
+        """Crea la serie leyendo del almacén local (PriceStore), sin pasar por la API."""
+        df = store.read(ticker, provider, start=start, end=end, columns=columns)
+        return cls(ticker=ticker, source=provider, data=df)
 
     def get_summary(self) -> str: 
-        if self.data.empty:
+        if len(self) == 0:
             return f"Serie: {self.ticker} ({self.source}) - (Vacía)"
         else:
             stats_str = ""
@@ -96,21 +250,37 @@ class PriceSeries:
         return None
 
     def get_min_max(self):
-        if self.main_col:
-            min_val = self.data[self.main_col].min()
-            min_date = self.data[self.main_col].idxmin()
-            max_val = self.data[self.main_col].max()
-            max_date = self.data[self.main_col].idxmax()
+        if self.main_col and self._stats.n:
             return {
-                "min_value": min_val,
-                "min_date": min_date,
-                "max_value": max_val,
-                "max_date": max_date,
+                "min_value": self._stats.min_value,
+                "min_date": self._stats.min_date,
+                "max_value": self._stats.max_value,
+                "max_date": self._stats.max_date,
             }
         return None
 
+    # --- INDICADORES TÉCNICOS CALCULADOS EN LOCAL ---
+    def compute_indicators(self, indicators: Dict[str, List[int]], attach: bool = False) -> pd.DataFrame:
+        """
+        Calcula indicadores (rsi, sma, ema, macd, bollinger, atr) sobre las barras
+        de la serie, sin llamar a ninguna API. Con attach=True se añaden como
+        columnas a los precios (como Normalizer.attach_indicator); si no, se
+        devuelven en el formato de los normalizadores de indicadores.
+        """
+        if 'close' not in self.data.columns:
+            raise ValueError(f"[{self.ticker}] Los indicadores necesitan barras con 'close'.")
+        values = compute_indicators(self.data, indicators)
+        if attach:
+            return self.data.join(values, how="left")
+        values = values.dropna(how="all")
+        values["ticker"] = self.ticker
+        values["source"] = self.source
+        return values
+
     # --- MÉTODO DE MONTE CARLO PARA ACTIVOS ---
-    def run_monte_carlo(self, days: int, simulations: int):
+    def run_monte_carlo(self, days: int, simulations: int, seed: SeedLike = None,
+                        dtype=np.float64, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        summary: bool = False, workers: int = 1):
         if self.main_col != 'close' or self.data.empty:
             raise ValueError(f"Simulación solo aplicable a series 'close' con datos. (Activo: {self.ticker})")
 
@@ -124,35 +294,26 @@ class PriceSeries:
         mu = log_returns.mean()
         sigma = log_returns.std()
         
-        # 3. Preparar simulación
+        # 3. Ejecutar simulaciones (vectorizado y por bloques de simulaciones)
+        #    Con summary=True solo se acumulan estadísticas por día (MonteCarloSummary)
         last_price = self.data[self.main_col].iloc[-1]
-        simulation_paths = np.zeros((days + 1, simulations))
-        simulation_paths[0] = last_price
-
-        # 4. Ejecutar simulaciones
-        for i in range(simulations):
-            shock = np.random.normal(0, 1, days)
-            drift = mu - 0.5 * sigma**2
-            daily_returns = np.exp(drift + sigma * shock)
-            
-            path = np.zeros(days + 1)
-            path[0] = last_price
-            for t in range(1, days + 1):
-                path[t] = path[t - 1] * daily_returns[t - 1]
-            
-            simulation_paths[:, i] = path
-
-        return simulation_paths
+        engine = summarize_gbm if summary else simulate_gbm
+        return _simulate("series", simulations, engine, last_price, mu, sigma, days, simulations,
+                         seed=seed, dtype=dtype, chunk_size=chunk_size, workers=workers)
 
     # --- VISUALIZACIÓN ---
-    def plot_simulation(self, paths: np.ndarray, title: str):
+    def plot_simulation(self, paths: Union[np.ndarray, MonteCarloSummary], title: str):
         print(f"Mostrando gráfico para {self.ticker}...")
+        from src.plots.plots import plot_monte_carlo
         plot_monte_carlo(paths, title)
 
 # --- METODO DE LIMPIEZA 1: RELLENA LOS NaN CON ffill ---
     def fillna(self, method: str = 'ffill'):
+        fill = _fill_method(method)
         if not self.data.empty:
-            self.data.fillna(method=method, inplace=True)
+            self.data = getattr(self.data, fill)()
+            self._compute_stats()
+            self._version += 1
             print(f"[{self.ticker}] Datos NaN rellenados con método '{method}'.")
         return self
     
@@ -160,8 +321,9 @@ class PriceSeries:
     def resample_daily(self, fill_method: str = 'ffill'):
         if not self.data.empty:
             self.data.index = pd.to_datetime(self.data.index) # me aseguro de que el indice sea un datetime
-            self.data = self.data.resample('D').fillna(method=fill_method)
-            self.__post_init__() 
+            self.data = getattr(self.data.resample('D'), _fill_method(fill_method))()
+            self._compute_stats()
+            self._version += 1
             print(f"[{self.ticker}] Serie re-muestreada a diario ('D') con método '{fill_method}'.")
         return self
 
@@ -176,9 +338,93 @@ class PriceSeries:
                     count += non_positive_mask.sum()
                     self.data.loc[non_positive_mask, col] = np.nan
             if count > 0:
+                self._compute_stats()
+                self._version += 1
                 print(f"[{self.ticker}] Encontrados y eliminados {count} precios no positivos (<= 0)")
         return self 
 
+
+@dataclass
+class AlignedPrices:
+    """
+    Cierres de los activos de una cartera alineados sobre su rango común
+    (con ffill) y las estadísticas de sus retornos logarítmicos.
+    """
+    closes: pd.DataFrame       # (fechas, tickers)
+    log_returns: pd.DataFrame  # (fechas - 1, tickers)
+    mean: np.ndarray           # media diaria de los retornos logarítmicos
+    cov: np.ndarray            # matriz de covarianzas
+    _chol: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _corr: Optional[pd.DataFrame] = field(default=None, init=False, repr=False)
+
+    @classmethod
+    def from_closes(cls, closes: pd.DataFrame) -> "AlignedPrices":
+        values = closes.to_numpy(dtype=np.float64)
+        rets = np.diff(np.log(values), axis=0)
+        keep = ~np.isnan(rets).any(axis=1)
+        rets = rets[keep]
+        log_returns = pd.DataFrame(rets, index=closes.index[1:][keep], columns=closes.columns)
+        mean = rets.mean(axis=0) if len(rets) else np.full(values.shape[1], np.nan)
+        cov = np.atleast_2d(np.cov(rets, rowvar=False)) if len(rets) > 1 else np.full((values.shape[1],) * 2, np.nan)
+        return cls(closes=closes, log_returns=log_returns, mean=mean, cov=cov)
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self.closes.columns)
+
+    @property
+    def last_prices(self) -> np.ndarray:
+        return self.closes.iloc[-1].to_numpy(dtype=np.float64)
+
+    @property
+    def cholesky(self) -> np.ndarray:
+        if self._chol is None:
+            try:
+                self._chol = np.linalg.cholesky(self.cov)
+            except np.linalg.LinAlgError:
+                raise ValueError("Error: La matriz de covarianza no es positiva definida.")
+        return self._chol
+
+    def correlation_summary(self, k: int = DEFAULT_TOP_K, block_size: int = DEFAULT_BLOCK_SIZE,
+                            dtype=np.float64) -> CorrelationSummary:
+        """Pares más/menos correlacionados y medias, por bloques y sin la matriz completa."""
+        return correlation_summary(self.log_returns, k=k, block_size=block_size, dtype=dtype)
+
+    @property
+    def corr(self) -> pd.DataFrame:
+        if self._corr is None:
+            std = np.sqrt(np.diag(self.cov))
+            corr = np.clip(self.cov / np.outer(std, std), -1.0, 1.0)
+            np.fill_diagonal(corr, 1.0)
+            self._corr = pd.DataFrame(corr, index=self.tickers, columns=self.tickers)
+        return self._corr
+
+
+def _simulate(kind: str, simulations: int, engine, *args, **kwargs):
+    """Ejecuta el motor de Monte Carlo registrando su tiempo y rendimiento (con --profile)."""
+    if not metrics.enabled():
+        return engine(*args, **kwargs)
+    t0 = time.perf_counter()
+    result = engine(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    metrics.record_time(f"montecarlo.{kind}", elapsed)
+    metrics.incr("montecarlo.simulations", simulations)
+    if elapsed > 0:
+        metrics.observe("montecarlo.sims_per_s", simulations / elapsed)
+    return result
+
+
+def _last_valid_rows(frame: pd.DataFrame) -> np.ndarray:
+    # Fila del último valor no nulo de cada columna (cada activo tiene su propia última fecha)
+    valid = frame.notna().to_numpy()
+    return len(frame) - 1 - np.argmax(valid[::-1], axis=0)
+
+
+def _last_valid(frame: pd.DataFrame) -> np.ndarray:
+    values = frame.to_numpy(dtype=np.float64)
+    return values[_last_valid_rows(frame), np.arange(values.shape[1])]
+
+
 @dataclass
 class Portfolio: # Es una cartera, es decir, una coleccion de activos (PriceSeries)
     name: str # El nombre de la cartera
@@ -187,12 +433,19 @@ class Portfolio: # Es una cartera, es decir, una coleccion de activos (PriceSeri
     
     weights: Optional[Dict[str, float]] = None
 
+    # --- CACHÉ DE PRECIOS ALINEADOS (compartida por Monte Carlo, report y plots_report) ---
+    # {to_latest: (clave, AlignedPrices)}: vista recortada al rango común y vista de Monte Carlo
+    _aligned: Dict[bool, tuple] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _wide: Dict[str, tuple] = field(default_factory=dict, init=False, repr=False, compare=False)
+
     def add_series(self, series: PriceSeries):
         if not isinstance(series, PriceSeries):
             print(f"Error: Solo se pueden añadir objetos PriceSeries a la cartera.")
             return
             
         self.assets[series.ticker] = series
+        self._aligned.clear()
+        self._wide.clear()
         print(f"Activo {series.ticker} añadido a la cartera '{self.name}'.")
 
     @property
@@ -202,72 +455,242 @@ class Portfolio: # Es una cartera, es decir, una coleccion de activos (PriceSeri
     def __len__(self):
         return len(self.assets) # me dice el numeron de activos de la cartera
 
+    def memory_usage(self) -> pd.DataFrame:
+        """Filas y bytes de cada activo (una fila por ticker) más una fila 'TOTAL'."""
+        table = pd.DataFrame(
+            [(len(s), s.memory_usage()) for s in self.assets.values()],
+            index=pd.Index(self.tickers, name="ticker"), columns=["rows", "bytes"], dtype=np.int64,
+        )
+        table.loc["TOTAL"] = table.sum()
+        return table
+
+    def compact(self, price_dtype="float32", int_volume: bool = True):
+        """Formato compacto en todos los activos (ticker/source categóricos, precios en float32...)."""
+        for series in self.assets.values():
+            series.compact(price_dtype, int_volume)
+        self._aligned.clear()
+        self._wide.clear()
+        return self
+
+    @classmethod
+    def from_store(cls, store, provider: str, tickers: Optional[List[str]] = None,
+                   start=None, end=None, name: Optional[str] = None,
+                   weights: Optional[Dict[str, float]] = None) -> "Portfolio":
+        """Cartera con los tickers pedidos (o todos los del proveedor) leídos del almacén local."""
+        tickers = tickers or store.tickers(provider)
+        assets = {}
+        for t in tickers:
+            series = PriceSeries.from_store(store, t, provider, start=start, end=end)
+            if series.data.empty:
+                print(f"⚠️ {t} no está en el almacén ({provider}).")
+                continue
+            assets[t] = series
+        return cls(name=name or f"Cartera {provider}", assets=assets, weights=weights)
+
+    def _price_assets(self) -> List[PriceSeries]:
+        return [s for s in self.assets.values() if s.main_col == 'close' and not s.data.empty]
+
+    @staticmethod
+    def _cache_key(price_assets: List[PriceSeries]) -> tuple:
+        return tuple((s.ticker, id(s), id(s.data), s._version) for s in price_assets)
+
+    def aligned(self, to_latest: bool = False) -> AlignedPrices:
+        """
+        Matriz de cierres alineada y sus estadísticas, calculada una sola vez.
+        Se recalcula sola si cambian los activos o si alguno se ha limpiado
+        (fillna, resample_daily, negative_prices) desde la última vez.
+
+        Por defecto se recorta al rango común de todos los activos (informe,
+        correlaciones). Con to_latest=True (Monte Carlo) se empieza igual en la
+        primera fecha común, pero los activos que terminan antes se alargan con
+        ffill hasta la última fecha disponible, como hacía la simulación original.
+        """
+        price_assets = self._price_assets()
+        key = self._cache_key(price_assets)
+        cached = self._aligned.get(to_latest)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        if not price_assets:
+            raise ValueError("No hay activos de precios ('close') con datos.")
+        closes = {s.ticker: s.data['close'] for s in price_assets}
+        df_closes = pd.concat(closes, axis=1, keys=closes.keys())
+        if to_latest:
+            df_closes = df_closes.ffill().dropna(axis=0)
+            if df_closes.empty:
+                raise ValueError("No hay suficientes datos históricos para la simulación.")
+            aligned = AlignedPrices.from_closes(df_closes)
+            self._aligned[to_latest] = (key, aligned)
+            return aligned
+
+        common_start = max(s.start_date for s in price_assets)
+        common_end = min(s.end_date for s in price_assets)
+        if common_start >= common_end:
+            raise ValueError(f"No existe un rango de fechas común para todos los activos "
+                             f"({common_start.date()} - {common_end.date()}).")
+
+        df_closes = df_closes.loc[common_start:common_end].ffill().dropna(axis=0)
+        if df_closes.empty:
+            raise ValueError("El DataFrame de rango común está vacío tras limpiar los NaN.")
+
+        aligned = AlignedPrices.from_closes(df_closes)
+        self._aligned[to_latest] = (key, aligned)
+        return aligned
+
+    # --- INDICADORES DE TODA LA CARTERA A LA VEZ ---
+    def wide(self, column: str = 'close') -> pd.DataFrame:
+        """
+        Matriz (fechas, tickers) de una columna con la unión de fechas de todos los
+        activos y NaN donde un activo no cotiza (sin ffill). Se guarda en caché.
+        """
+        price_assets = self._price_assets()
+        key = self._cache_key(price_assets)
+        cached = self._wide.get(column)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if not price_assets:
+            raise ValueError("No hay activos de precios ('close') con datos.")
+        series = [s for s in price_assets if column in s.data.columns]
+        # Unión de fechas y un único bloque float64 (pd.concat de miles de columnas deja
+        # un bloque por activo y hace lentas todas las operaciones posteriores)
+        dates = [pd.DatetimeIndex(s.data.index).as_unit('ns') for s in series]
+        index = pd.DatetimeIndex(np.unique(np.concatenate([d.asi8 for d in dates])).view('datetime64[ns]'), name='date')
+        values = np.full((len(index), len(series)), np.nan)
+        for j, (s, d) in enumerate(zip(series, dates)):
+            values[np.searchsorted(index.asi8, d.asi8), j] = s.data[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        frame = pd.DataFrame(values, index=index, columns=[s.ticker for s in series])
+        self._wide[column] = (key, frame)
+        return frame
+
+    def cross_indicators(self, indicators: Dict[str, List[int]]) -> Dict[str, pd.DataFrame]:
+        """
+        Indicadores de todos los activos con operaciones sobre la matriz (fechas, tickers),
+        sin bucle por activo. `indicators` admite sma, ema, rsi, volatility y return, con
+        una lista de periodos cada uno; devuelve una matriz por clave ("sma_20", "rsi_14"...).
+        Los huecos de un activo no cuentan en sus ventanas.
+        """
+        closes = self.wide('close')
+        out: Dict[str, pd.DataFrame] = {}
+        for name, periods in indicators.items():
+            if name == "rsi":
+                for period, values in rsi_many(closes, periods).items():
+                    out[f"rsi_{period}"] = values
+                continue
+            fn = {"sma": sma, "ema": ema, "volatility": volatility, "return": period_return}.get(name)
+            if fn is None:
+                raise ValueError(f"Indicador no soportado a nivel de cartera: {name} "
+                                 f"(disponibles: sma, ema, rsi, volatility, return)")
+            for period in periods:
+                out[f"{name}_{period}"] = fn(closes, period)
+        return out
+
+    def screen(self, indicators: Dict[str, List[int]]) -> pd.DataFrame:
+        """Tabla de cribado: último cierre y último valor de cada indicador por ticker."""
+        closes = self.wide('close')
+        frames = self.cross_indicators(indicators)
+        table = pd.DataFrame({
+            "last_date": closes.index[_last_valid_rows(closes)],
+            "close": _last_valid(closes),
+            **{key: _last_valid(frame) for key, frame in frames.items()},
+        }, index=closes.columns)
+        table.index.name = "ticker"
+        return table
+
+    # --- COVARIANZA Y CORRELACIÓN MÓVILES ---
+    def rolling_covariance(self, window: Optional[int] = ROLLING_WINDOWS[0], lam: Optional[float] = None,
+                           corr: bool = False):
+        """
+        Serie temporal de matrices de covarianza (o correlación) de los retornos alineados:
+        ventana móvil de `window` sesiones o EWMA con decaimiento `lam`. Es un generador
+        de (fecha, matriz) que se actualiza de forma incremental en cada paso.
+        """
+        returns = self.aligned().log_returns
+        steps = (iter_ewma_cov(returns.to_numpy(), lam) if lam is not None
+                 else iter_rolling_cov(returns.to_numpy(), window))
+        for t, cov in steps:
+            yield returns.index[t], (cov_to_corr(cov) if corr else cov.copy())
+
+    def default_pairs(self, max_pairs: int = 5) -> List[Pair]:
+        """Todos los pares si son pocos; si no, los más y los menos correlacionados."""
+        aligned = self.aligned()
+        tickers = aligned.tickers
+        pairs = [(a, b) for i, a in enumerate(tickers) for b in tickers[i + 1:]]
+        if len(pairs) <= max_pairs:
+            return pairs
+        summary = aligned.correlation_summary(k=(max_pairs + 1) // 2)
+        chosen = list(zip(summary.top.asset_1, summary.top.asset_2))
+        chosen += [p for p in zip(summary.bottom.asset_1, summary.bottom.asset_2) if p not in chosen]
+        return chosen[:max_pairs]
+
+    def rolling_pairs(self, pairs: Optional[List[Pair]] = None, window: Optional[int] = ROLLING_WINDOWS[0],
+                      lam: Optional[float] = None, corr: bool = True) -> pd.DataFrame:
+        """Correlación (o covarianza) móvil de unos pares como series temporales, columnas "A/B"."""
+        if lam is not None:
+            window = None
+        return rolling_pairs(self.aligned().log_returns, pairs or self.default_pairs(),
+                             window=window, lam=lam, corr=corr)
+
     # --- MONTE CARLO PARA CARTERAS ---
-    def run_monte_carlo(self, days: int, simulations: int):
+    def run_monte_carlo(self, days: int, simulations: int, seed: SeedLike = None,
+                        dtype=np.float64, memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+                        return_asset_paths: bool = False, summary: bool = False,
+                        workers: int = 1, cov_window: Optional[int] = None,
+                        cov_lambda: Optional[float] = None):
+        """
+        Con `cov_window` (últimas N sesiones) o `cov_lambda` (EWMA) la covarianza de la
+        simulación refleja el régimen reciente en vez de todo el histórico; la deriva
+        sigue usando la media de todo el histórico, que es más estable.
+        """
         if not self.assets:
             raise ValueError("La cartera no tiene activos.")
         if self.weights is None:
             raise ValueError("La cartera no tiene pesos (weights) definidos.")
 
-        tickers = self.tickers
-        weights = np.array([self.weights[t] for t in tickers])
-        
-        # 1. Crear DataFrame
-        close_prices = {}
         for ticker, series in self.assets.items():
-            if series.main_col == 'close' and not series.data.empty:
-                close_prices[ticker] = series.data['close']
-            else:
+            if series.main_col != 'close' or series.data.empty:
                 raise ValueError(f"Activo {ticker} no tiene datos 'close' para simulación.")
-                
-        df_closes = pd.concat(close_prices, axis=1, keys=close_prices.keys()).fillna(method='ffill').dropna()
 
-        # 2. Calcular rentabilidades y estadísticas
-        log_returns = np.log(1 + df_closes.pct_change()).dropna()
-        
-        if log_returns.empty:
+        # 1. Precios alineados hasta la última fecha, retornos, covarianzas y Cholesky (de la caché)
+        aligned = self.aligned(to_latest=True)
+        if aligned.log_returns.empty:
             raise ValueError("No hay suficientes datos históricos para la simulación.")
-
-        mean_returns = log_returns.mean().values
-        cov_matrix = log_returns.cov().values
-        last_prices = df_closes.iloc[-1].values
-        
-        # 3. Descomposición de Cholesky
-        try:
-            L = np.linalg.cholesky(cov_matrix)
-        except np.linalg.LinAlgError:
-            raise ValueError("Error: La matriz de covarianza no es positiva definida.")
-
-        # 4. Preparar simulación
-        all_asset_paths = np.zeros((days + 1, len(tickers), simulations))
-        all_asset_paths[0, :, :] = last_prices.reshape(-1, 1)
-        portfolio_paths = np.zeros((days + 1, simulations))
-        portfolio_paths[0, :] = (last_prices * weights).sum()
-
-        # 5. Ejecutar simulaciones
-        drift = mean_returns - 0.5 * np.diag(cov_matrix)
-
-        for i in range(simulations):
-            Z = np.random.normal(0, 1, size=(days, len(tickers)))
-            daily_shocks = Z @ L.T
-            daily_returns = np.exp(drift + daily_shocks)
-            
-            current_prices = last_prices.copy()
-            for t in range(1, days + 1):
-                current_prices = current_prices * daily_returns[t-1, :]
-                all_asset_paths[t, :, i] = current_prices
-            
-            portfolio_paths[:, i] = all_asset_paths[:, :, i] @ weights
-
-        return portfolio_paths
+        weights = np.array([self.weights[t] for t in aligned.tickers])
+        last_prices = aligned.last_prices
+        if cov_window is None and cov_lambda is None:
+            cov_matrix = aligned.cov
+            L = aligned.cholesky
+        else:
+            cov_matrix = last_cov(aligned.log_returns.to_numpy(), window=cov_window, lam=cov_lambda)
+            try:
+                L = np.linalg.cholesky(cov_matrix)
+            except np.linalg.LinAlgError:
+                raise ValueError("Error: La matriz de covarianza no es positiva definida.")
+
+        # 2. Ejecutar simulaciones por bloques, reduciendo directamente a valor de cartera
+        drift = aligned.mean - 0.5 * np.diag(cov_matrix)
+        if summary:
+            if return_asset_paths:
+                raise ValueError("return_asset_paths no es compatible con summary=True.")
+            return _simulate("portfolio", simulations, summarize_portfolio, last_prices, drift, L,
+                             weights, days, simulations, seed=seed, dtype=dtype,
+                             memory_budget_mb=memory_budget_mb, workers=workers)
+        return _simulate("portfolio", simulations, simulate_portfolio, last_prices, drift, L, weights,
+                         days, simulations, seed=seed, dtype=dtype, memory_budget_mb=memory_budget_mb,
+                         return_asset_paths=return_asset_paths, workers=workers)
 
     # --- VISUALIZACIÓN ---
-    def plot_simulation(self, paths: np.ndarray, title: str):
+    def plot_simulation(self, paths: Union[np.ndarray, MonteCarloSummary], title: str):
         print(f"Mostrando gráfico para Cartera '{self.name}'...")
+        from src.plots.plots import plot_monte_carlo
         plot_monte_carlo(paths, title)
 
     # --- REPORTE ---
-    def report(self):
+    def report(self, max_matrix: int = 15, top_k: int = DEFAULT_TOP_K, corr_dtype=np.float64):
+        """
+        Informe en Markdown. Con más de `max_matrix` activos no se imprime la matriz de
+        correlación completa, sino un resumen con los `top_k` pares extremos.
+        """
+        from tabulate import tabulate
     
         if not self.assets:
             return "# Reporte de Cartera\n\nCartera vacía."
@@ -337,59 +760,99 @@ class Portfolio: # Es una cartera, es decir, una coleccion de activos (PriceSeri
         # --- 4. Análisis de Correlación (solo para 'close') ---
         md.append("\n## Análisis de Correlación (Histórica)")
         
-        price_assets = [s for s in self.assets.values() if s.main_col == 'close' and not s.data.empty]
+        price_assets = self._price_assets()
         
         if len(price_assets) < 2:
             md.append("\n_No hay suficientes activos de precios ('close') con datos para calcular la correlación._")
         else:
             try:
-                # 1. Crear DataFrame de precios de cierre
-                close_prices = {}
-                for series in price_assets:
-                    close_prices[series.ticker] = series.data['close']
-                df_closes = pd.concat(close_prices, axis=1, keys=close_prices.keys())
+                # 1. Precios alineados en el rango común y retornos logarítmicos (de la caché)
+                aligned = self.aligned()
                 
-                # 2. Rellenar y calcular retornos (respetando el rango común)
-                # Nos aseguramos de que solo usamos el rango común para el cálculo
-                common_start = max(s.start_date for s in price_assets)
-                common_end = min(s.end_date for s in price_assets)
-                
-                df_closes_common = df_closes.loc[common_start:common_end].fillna(method='ffill').dropna(axis=0) 
-
-                if df_closes_common.empty:
-                     raise ValueError("El DataFrame de rango común está vacío tras limpiar los NaN.")
-
-                # 3. Calcular retornos logarítmicos
-                log_returns = np.log(1 + df_closes_common.pct_change()).dropna()
-                
-                if log_returns.empty:
+                if len(aligned.log_returns) < 2:
                     md.append("\n> ⚠️ Advertencia: No se pudo calcular la correlación (datos insuficientes tras procesar retornos en el rango común).")
                 else:
-                    # 4. Calcular y mostrar matriz de correlación
-                    corr_matrix = log_returns.corr()
-                    md.append("\nMatriz de Correlación de Retornos Logarítmicos (sobre rango común):")
-                    md.append(f"\n{tabulate(corr_matrix, headers='keys', tablefmt='pipe', floatfmt='.3f')}\n")
-                    
-                    # 5. Insights de Correlación
-                    corr_pairs = corr_matrix.unstack().sort_values(ascending=False)
-                    corr_pairs = corr_pairs[corr_pairs < 1.0] # Quitar las correlaciones perfectas (activo consigo mismo)
-                    
-                    if not corr_pairs.empty:
+                    # 2. Pares extremos por bloques y selección parcial (sin ordenar todos los pares)
+                    summary = aligned.correlation_summary(k=top_k, dtype=corr_dtype)
+
+                    if summary.n_assets <= max_matrix:
+                        # 3a. Universo pequeño: matriz completa
+                        md.append("\nMatriz de Correlación de Retornos Logarítmicos (sobre rango común):")
+                        md.append(f"\n{tabulate(aligned.corr, headers='keys', tablefmt='pipe', floatfmt='.3f')}\n")
+                    else:
+                        # 3b. Universo grande: resumen en lugar de n x n valores
+                        md.append(f"\n_Matriz completa omitida ({summary.n_assets} activos, {summary.n_pairs:,} pares). "
+                                  f"Resumen sobre el rango común:_")
+                        md.append(f"\n- Correlación media entre pares: **{summary.mean:.3f}**")
+                        md.append(f"\n#### Top {top_k} pares más correlacionados")
+                        md.append(tabulate(summary.top, headers=["Activo 1", "Activo 2", "Correlación"],
+                                           tablefmt="pipe", floatfmt=".3f", showindex=False))
+                        md.append(f"\n#### Top {top_k} pares menos correlacionados")
+                        md.append(tabulate(summary.bottom, headers=["Activo 1", "Activo 2", "Correlación"],
+                                           tablefmt="pipe", floatfmt=".3f", showindex=False))
+                        avg = summary.avg_by_asset.dropna().sort_values(ascending=False)
+                        rows = [[t, f"{v:.3f}"] for t, v in avg.head(top_k).items()]
+                        rows += [["...", "..."]] + [[t, f"{v:.3f}"] for t, v in avg.tail(top_k).items()]
+                        md.append("\n#### Correlación media de cada activo con el resto (extremos)")
+                        md.append(tabulate(rows, headers=["Activo", "Correlación media"], tablefmt="pipe"))
+                        md.append("")
+
+                    # 4. Insights de Correlación
+                    if not summary.top.empty:
                         md.append("#### Observaciones Clave:")
                         
-                        max_corr = corr_pairs.idxmax()
-                        md.append(f"- Máxima Correlación: `{max_corr[0]}` y `{max_corr[1]}` ({corr_pairs.max():.3f}). Tienden a moverse juntos.")
+                        best = summary.top.iloc[0]
+                        md.append(f"- Máxima Correlación: `{best.asset_1}` y `{best.asset_2}` ({best['corr']:.3f}). Tienden a moverse juntos.")
                         
-                        min_corr = corr_pairs.idxmin()
-                        md.append(f"- Mínima Correlación (o Inversa): `{min_corr[0]}` y `{min_corr[1]}` ({corr_pairs.min():.3f}). Ofrecen la mayor diversificación.")
+                        worst = summary.bottom.iloc[0]
+                        md.append(f"- Mínima Correlación (o Inversa): `{worst.asset_1}` y `{worst.asset_2}` ({worst['corr']:.3f}). Ofrecen la mayor diversificación.")
                     
             except Exception as e:
                 md.append(f"\n> Error Inesperado: No se pudo generar el análisis de correlación: {e}")
 
+        # --- 5. Correlación Móvil ---
+        if len(price_assets) >= 2:
+            try:
+                md.extend(self._rolling_report())
+            except Exception as e:
+                md.append(f"\n> Error Inesperado: No se pudo generar la correlación móvil: {e}")
+
         return "\n".join(md)
+
+    def _rolling_report(self, max_pairs: int = 5) -> List[str]:
+        from tabulate import tabulate
+        returns = self.aligned().log_returns
+        short, long = ROLLING_WINDOWS
+        md = [f"\n## Correlación Móvil ({short} y {long} sesiones, EWMA λ={DEFAULT_LAMBDA})"]
+        if len(returns) < short:
+            md.append(f"\n_Se necesitan al menos {short} retornos en el rango común ({len(returns)} disponibles)._")
+            return md
+
+        pairs = self.default_pairs(max_pairs)
+        r_short = rolling_pairs(returns, pairs, window=short)
+        r_ewma = rolling_pairs(returns, pairs, lam=DEFAULT_LAMBDA)
+        r_long = rolling_pairs(returns, pairs, window=long) if len(returns) >= long else None
+
+        rows = []
+        for (a, b), col in zip(pairs, r_short.columns):
+            recent = r_short[col].iloc[-long:]  # rango de la correlación corta en el último año
+            rows.append([
+                f"{a} / {b}",
+                f"{returns[a].corr(returns[b]):.3f}",
+                f"{r_short[col].iloc[-1]:.3f}",
+                f"{r_long[col].iloc[-1]:.3f}" if r_long is not None else "N/A",
+                f"{r_ewma[col].iloc[-1]:.3f}",
+                f"{recent.min():.3f} a {recent.max():.3f}",
+            ])
+        md.append(tabulate(rows, headers=["Par", "Histórica", f"{short}d", f"{long}d", "EWMA",
+                                          f"Rango {short}d (último año)"], tablefmt="pipe"))
+        md.append(f"\n_Fecha de referencia: {returns.index[-1].date()}. "
+                  f"Una correlación reciente muy distinta de la histórica indica un cambio de régimen._")
+        return md
     
 
     def plots_report(self):
+        from src.plots.plots import plot_weights_pie_chart, plot_normalized_prices, plot_correlation_heatmap
         print("Generando gráficos de análisis de cartera...")
         
         if not self.assets:
@@ -403,42 +866,28 @@ class Portfolio: # Es una cartera, es decir, una coleccion de activos (PriceSeri
             print(" No hay pesos definidos, omitiendo gráfico de composición de cartera.")
 
         # --- Preparación para gráficos de precios/correlación ---
-        price_assets = [s for s in self.assets.values() if s.main_col == 'close' and not s.data.empty]
+        price_assets = self._price_assets()
         
         if len(price_assets) < 1:
             print("⛔ No hay activos de precios ('close') con datos para los gráficos de rendimiento o correlación.")
             return
 
-        # 1. Crear DataFrame de precios de cierre
+        # 1. Precios de cierre alineados en el rango común (de la caché)
         try:
-            close_prices = {}
-            for series in price_assets:
-                close_prices[series.ticker] = series.data['close']
-            df_closes = pd.concat(close_prices, axis=1, keys=close_prices.keys())
-
-            # 2. Encontrar rango común
-            common_start = max(s.start_date for s in price_assets)
-            common_end = min(s.end_date for s in price_assets)
-            
-            if common_start >= common_end:
-                 print(f" ¡Advertencia! No existe un rango común para los activos. No se pueden generar gráficos de rendimiento o correlación.")
-                 return
-            
-            df_closes_common = df_closes.loc[common_start:common_end].ffill().dropna(axis=0) # <-- Línea nueva
-
-            if df_closes_common.empty:
-                print(" ¡Advertencia! El DataFrame de rango común está vacío. Omitiendo gráficos.")
+            try:
+                aligned = self.aligned()
+            except ValueError as e:
+                print(f" ¡Advertencia! {e} No se pueden generar gráficos de rendimiento o correlación.")
                 return
+            df_closes_common = aligned.closes
 
             # --- Gráfico 2: Rendimiento Normalizado ---
             plot_normalized_prices(df_closes_common)
             
             # --- Gráfico 3: Mapa de Correlación ---
             if len(price_assets) >= 2:
-                log_returns = np.log(1 + df_closes_common.pct_change()).dropna()
-                if not log_returns.empty:
-                    corr_matrix = log_returns.corr()
-                    plot_correlation_heatmap(corr_matrix)
+                if len(aligned.log_returns) >= 2:
+                    plot_correlation_heatmap(aligned.corr)
                 else:
                     print(" Datos insuficientes para calcular la matriz de correlación.")
             else:
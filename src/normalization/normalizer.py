@@ -1,24 +1,105 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from dateutil import parser
 
 STANDARD_COLS = ["date","open","high","low","close","volume","ticker","source"]
+NUMERIC_COLS = ["open","high","low","close","volume"]
+
+_ALPHAVANTAGE_KEYS = {
+    "open": "1. open",
+    "high": "2. high",
+    "low": "3. low",
+    "close": "4. close",
+    "volume": "5. volume",
+}
+
+PRICE_COLS = ["open", "high", "low", "close"]
+LABEL_COLS = ["ticker", "source"]
+
+
+# --- MODO COMPACTO ---
+# Un histórico normalizado repite `ticker` y `source` en cada fila como strings de
+# Python y guarda todo en float64. Con miles de tickers y décadas de barras eso es
+# la mayor parte de la memoria de una cartera.
+def compact_frame(df: pd.DataFrame, price_dtype="float32", int_volume: bool = True) -> pd.DataFrame:
+    """
+    Versión compacta de un DataFrame normalizado: `ticker`/`source` categóricos
+    (un código por fila), precios en `price_dtype` y volumen entero si todos los
+    valores lo son (con NaN o decimales se deja en float). Si ya está compacto
+    no copia nada.
+    """
+    if df is None or df.empty:
+        return df
+    changes = {}
+    for col in LABEL_COLS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            changes[col] = df[col].astype("category")
+    for col in PRICE_COLS:
+        if col in df.columns and df[col].dtype != price_dtype:
+            changes[col] = df[col].astype(price_dtype)
+    if int_volume and "volume" in df.columns and df["volume"].dtype.kind == "f":
+        vol = df["volume"].to_numpy()
+        if np.isfinite(vol).all() and (vol == np.round(vol)).all() and np.abs(vol).max() < 2**63:
+            changes["volume"] = vol.astype(np.int64)
+    if not changes:
+        return df
+    return df.assign(**changes)
+
 
 class Normalizer:
 
+    def __init__(self, compact: bool = False, price_dtype="float32", int_volume: bool = True):
+        """Con compact=True los DataFrames salen ya en formato compacto (ver compact_frame)."""
+        self.compact = compact
+        self.price_dtype = price_dtype
+        self.int_volume = int_volume
+
+    def _compact(self, df: pd.DataFrame) -> pd.DataFrame:
+        return compact_frame(df, self.price_dtype, self.int_volume) if self.compact else df
+
     def _dt(self, s):  
         if isinstance(s, datetime): 
             return s
         dt = parser.isoparse(s)
         return dt.replace(tzinfo=None) if dt.tzinfo else dt
 
-    def _finalize_ohlcv(self, rows: list[dict]) -> pd.DataFrame:
-        df = pd.DataFrame(sorted(rows, key=lambda x: x["date"]))
-        if df.empty:
+    def _to_datetime(self, values: list, fmt: str) -> pd.DatetimeIndex:
+        """Convierte todas las fechas de una vez con un formato conocido (sin zona horaria)."""
+        try:
+            idx = pd.DatetimeIndex(pd.to_datetime(values, format=fmt))
+        except (ValueError, TypeError):
+            try:
+                idx = pd.DatetimeIndex(pd.to_datetime(values, format="ISO8601"))
+            except (ValueError, TypeError):
+                # Formatos mezclados o zonas distintas: parseo fila a fila como último recurso
+                idx = pd.DatetimeIndex(pd.to_datetime([self._dt(v) for v in values]))
+        if idx.tz is not None:
+            # Igual que _dt: se descarta la zona conservando la hora local
+            idx = idx.tz_localize(None)
+        return idx
+
+    @staticmethod
+    def _to_float(values: list) -> np.ndarray:
+        """Un único cast numérico por columna (None o texto no numérico -> NaN)."""
+        try:
+            return np.asarray(values, dtype="float64")
+        except (ValueError, TypeError):
+            return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype="float64")
+
+    def _finalize_ohlcv(self, dates: list, columns: dict[str, list], ticker, source: str,
+                        date_format: str) -> pd.DataFrame:
+        """Construye el DataFrame estándar a partir de columnas ya extraídas del JSON."""
+        if len(dates) == 0:
             # DataFrame vacío pero con columnas estándar
             return pd.DataFrame(columns=STANDARD_COLS).set_index(pd.Index([], name="date"))
-        df["date"] = pd.to_datetime(df["date"])
-        return df.set_index("date")
+        index = self._to_datetime(dates, date_format).rename("date")
+        df = pd.DataFrame({col: self._to_float(columns[col]) for col in NUMERIC_COLS}, index=index)
+        df["ticker"] = ticker
+        df["source"] = source
+        if not df.index.is_monotonic_increasing:
+            df = df.iloc[np.argsort(df.index.values, kind="stable")]
+        return self._compact(df)
 
     # --- OHLCV: AlphaVantage ---
     def normalize_alphavantage_daily(self, raw: dict, ticker: str) -> pd.DataFrame:
@@ -30,92 +111,65 @@ class Normalizer:
         if ts is None:
             return pd.DataFrame(columns=STANDARD_COLS).set_index(pd.Index([], name="date"))
 
-        out = []
-        for d, row in ts.items():
-            out.append({
-                "date":   self._dt(d),
-                "open":   float(row.get("1. open", "nan")),
-                "high":   float(row.get("2. high", "nan")),
-                "low":    float(row.get("3. low", "nan")),
-                "close":  float(row.get("4. close", "nan")),
-                "volume": float(row.get("5. volume", "nan")),
-                "ticker": ticker,
-                "source": "alphavantage",
-            })
-        return self._finalize_ohlcv(out)
+        rows = list(ts.values())
+        columns = {col: [row.get(key) for row in rows] for col, key in _ALPHAVANTAGE_KEYS.items()}
+        return self._finalize_ohlcv(list(ts.keys()), columns, ticker, "alphavantage", "%Y-%m-%d")
 
     # --- OHLCV: MarketStack ---
     def normalize_marketstack_eod(self, raw: dict) -> pd.DataFrame:
-        data = raw.get("data", [])
-        out = []
-        for r in data:
-            out.append({
-                "date":   self._dt(r.get("date")),
-                "open":   float(r["open"])   if r.get("open")   is not None else float("nan"),
-                "high":   float(r["high"])   if r.get("high")   is not None else float("nan"),
-                "low":    float(r["low"])    if r.get("low")    is not None else float("nan"),
-                "close":  float(r["close"])  if r.get("close")  is not None else float("nan"),
-                "volume": float(r["volume"]) if r.get("volume") is not None else float("nan"),
-                "ticker": r.get("symbol"),
-                "source": "marketstack",
-            })
-        return self._finalize_ohlcv(out)
+        data = raw.get("data", []) or []
+        columns = {col: [r.get(col) for r in data] for col in NUMERIC_COLS}
+        tickers = [r.get("symbol") for r in data]
+        return self._finalize_ohlcv([r.get("date") for r in data], columns, tickers,
+                                    "marketstack", "%Y-%m-%dT%H:%M:%S%z")
+
+    def split_marketstack_eod(self, raw: dict, symbols: list[str] | None = None) -> dict[str, pd.DataFrame]:
+        """
+        Normaliza un payload de MarketStack con varios símbolos (peticiones por lotes)
+        y lo separa en un DataFrame por símbolo. Si se pasan `symbols`, los que no
+        tengan filas aparecen con un DataFrame vacío.
+        """
+        df = self.normalize_marketstack_eod(raw)
+        out = ({str(sym): part for sym, part in df.groupby("ticker", observed=True, sort=False)}
+               if not df.empty else {})
+        if symbols is not None:
+            empty = pd.DataFrame(columns=STANDARD_COLS).set_index(pd.Index([], name="date"))
+            out = {sym: out.get(sym, empty) for sym in symbols}
+        return out
 
     # --- OHLCV: TwelveData ---
     def normalize_twelvedata_timeseries(self, raw: dict, ticker: str) -> pd.DataFrame:
-        vals = raw.get("values", [])
-        out = []
-        for r in vals:
-            out.append({
-                "date":   self._dt(r.get("datetime")),
-                "open":   float(r["open"])   if r.get("open")   is not None else float("nan"),
-                "high":   float(r["high"])   if r.get("high")   is not None else float("nan"),
-                "low":    float(r["low"])    if r.get("low")    is not None else float("nan"),
-                "close":  float(r["close"])  if r.get("close")  is not None else float("nan"),
-                "volume": float(r["volume"]) if r.get("volume") is not None else float("nan"),
-                "ticker": ticker,
-                "source": "twelvedata",
-            })
-        return self._finalize_ohlcv(out)
+        vals = raw.get("values", []) or []
+        columns = {col: [r.get(col) for r in vals] for col in NUMERIC_COLS}
+        return self._finalize_ohlcv([r.get("datetime") for r in vals], columns, ticker,
+                                    "twelvedata", "%Y-%m-%d")
 
 
     # --- INDICADORES (RSI) ---
     
+    def _finalize_indicator(self, dates: list, values: list, ticker: str, source: str,
+                            date_format: str, col_name: str = "rsi") -> pd.DataFrame:
+        if len(dates) == 0:
+            return pd.DataFrame(columns=[col_name, "ticker", "source"]).set_index(pd.Index([], name="date"))
+        index = self._to_datetime(dates, date_format).rename("date")
+        df = pd.DataFrame({col_name: self._to_float(values)}, index=index)
+        df["ticker"] = ticker
+        df["source"] = source
+        return self._compact(df.sort_index(kind="stable"))
+
     def normalize_alphavantage_rsi(self, raw: dict, ticker: str) -> pd.DataFrame:
         """
         AlphaVantage: el RSI viene bajo la clave 'Technical Analysis: RSI'.
         Devuelve DF con índice 'date' y columna 'rsi'.
         """
         block = raw.get("Technical Analysis: RSI", {})
-        rows = []
-        for d, obj in block.items():
-            val_str = obj.get("RSI")
-            try:
-                val = float(val_str) if val_str is not None else float("nan")
-            except:
-                val = float("nan")
-            rows.append({"date": self._dt(d), "rsi": val, "ticker": ticker, "source": "alphavantage"})
-        df = pd.DataFrame(rows).sort_values("date")
-        if df.empty:
-            return pd.DataFrame(columns=["rsi", "ticker", "source"]).set_index(pd.Index([], name="date"))
-        df["date"] = pd.to_datetime(df["date"])
-        return df.set_index("date")
+        values = [obj.get("RSI") for obj in block.values()]
+        return self._finalize_indicator(list(block.keys()), values, ticker, "alphavantage", "%Y-%m-%d")
 
     def normalize_twelvedata_rsi(self, raw: dict, ticker: str) -> pd.DataFrame:
         vals = raw.get("values", []) or []
-        rows = []
-        for r in vals:
-            val_str = r.get("rsi")
-            try:
-                val = float(val_str) if val_str is not None else float("nan")
-            except:
-                val = float("nan")
-            rows.append({"date": self._dt(r.get("datetime")), "rsi": val, "ticker": ticker, "source": "twelvedata"})
-        df = pd.DataFrame(rows).sort_values("date")
-        if df.empty:
-            return pd.DataFrame(columns=["rsi", "ticker", "source"]).set_index(pd.Index([], name="date"))
-        df["date"] = pd.to_datetime(df["date"])
-        return df.set_index("date")
+        return self._finalize_indicator([r.get("datetime") for r in vals], [r.get("rsi") for r in vals],
+                                        ticker, "twelvedata", "%Y-%m-%d")
 
     # Une los precios por fecha
     def attach_indicator(self, prices_df: pd.DataFrame, ind_df: pd.DataFrame, col_name: str = "rsi") -> pd.DataFrame:
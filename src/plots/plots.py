@@ -1,107 +1,191 @@
+from __future__ import annotations
+import os
+import re
+import unicodedata
+from typing import Optional
 import matplotlib.pyplot as plt
-import numpy as np  
-import pandas as pd  
+from matplotlib.collections import LineCollection
+import numpy as np
+import pandas as pd
 import seaborn as sns
 
+from src import metrics
+from src.models.montecarlo import MonteCarloSummary
+
+# Máximo de trayectorias individuales que se dibujan en el abanico de Monte Carlo.
+# El resto de la simulación ya está representado por la media y los percentiles.
+MAX_PLOT_PATHS = 100
+# Con más activos el mapa de calor no se anota y, por encima del límite, se recorta
+HEATMAP_ANNOT_MAX = 20
+HEATMAP_MAX_ASSETS = 100
+LEGEND_MAX = 20
+PLOT_FORMATS = ("png", "svg")
+
+# Destino de los gráficos: None = ventana interactiva (plt.show), o un directorio
+_output = {"dir": None, "format": "png"}
+
+
+# --- SALIDA A FICHERO (SIN VENTANA) ---
+def configure(output_dir: Optional[str] = None, fmt: str = "png"):
+    """
+    Con output_dir los gráficos se guardan en ficheros en lugar de mostrarse.
+    Se usa el backend Agg, que no necesita pantalla (servidores sin entorno gráfico).
+    """
+    if fmt not in PLOT_FORMATS:
+        raise ValueError(f"Formato de gráfico no soportado: {fmt} (disponibles: {', '.join(PLOT_FORMATS)})")
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        plt.switch_backend("Agg")
+    _output["dir"] = output_dir
+    _output["format"] = fmt
+
+
+def _slug(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"[^0-9A-Za-z]+", "_", text).strip("_").lower() or "grafico"
+
+
+def _figure(name: str, figsize) -> plt.Figure:
+    # Una figura por tipo de gráfico, reutilizada (y vaciada) en cada llamada: guardar
+    # 50 gráficos en un bucle no crea 50 figuras ni acumula memoria.
+    fig = plt.figure(num=name, figsize=figsize, clear=True)
+    fig.set_size_inches(figsize)
+    return fig
+
+
+def _finish(fig: plt.Figure, filename: str, title: str) -> Optional[str]:
+    if _output["dir"] is None:
+        print(f"Mostrando gráfico: {title}...")
+        plt.show()
+        return None
+    path = os.path.join(_output["dir"], f"{_slug(filename)}.{_output['format']}")
+    with metrics.timer("plots.render"):
+        fig.savefig(path, bbox_inches="tight")
+    fig.clear()
+    print(f"💾 Gráfico guardado en {path}")
+    return path
+
+
 def plot_prices(df):
-    plt.plot(df["date"], df["close"])
-    plt.title("Evolución del precio")
-    plt.show()
+    fig = _figure("prices", (12, 7))
+    ax = fig.gca()
+    ax.plot(df["date"], df["close"])
+    ax.set_title("Evolución del precio")
+    return _finish(fig, "precio", "Evolución del precio")
+
+
+def _sample_columns(paths: np.ndarray, k: int) -> np.ndarray:
+    """Muestra aleatoria (reproducible) de como mucho k trayectorias."""
+    if paths.shape[1] <= k:
+        return paths
+    cols = np.random.default_rng(0).choice(paths.shape[1], size=k, replace=False)
+    return paths[:, np.sort(cols)]
 
 
-def plot_monte_carlo(simulation_paths: np.ndarray, title: str):
-    if simulation_paths is None or simulation_paths.size == 0:
+def plot_monte_carlo(simulation_paths: np.ndarray | MonteCarloSummary, title: str,
+                     max_paths: int = MAX_PLOT_PATHS):
+    if simulation_paths is None or (isinstance(simulation_paths, np.ndarray) and simulation_paths.size == 0):
         print("No hay datos que graficar.")
         return
 
-    plt.figure(figsize=(12, 7))
-    
-    # Grafica todas las simulaciones (con transparencia)
-    plt.plot(simulation_paths, color='blue', alpha=0.05)
-    
-    # Calcula y grafica la media y los percentiles
-    mean_path = np.mean(simulation_paths, axis=1)
-    median_path = np.median(simulation_paths, axis=1)
-    p5_path = np.percentile(simulation_paths, 5, axis=1)
-    p95_path = np.percentile(simulation_paths, 95, axis=1)
-
-    plt.plot(mean_path, color='red', linewidth=2, label='Media')
-    plt.plot(median_path, color='orange', linestyle='--', linewidth=2, label='Mediana (P50)')
-    plt.plot(p5_path, color='grey', linestyle=':', label='Percentil 5')
-    plt.plot(p95_path, color='grey', linestyle=':', label='Percentil 95')
-    
+    if isinstance(simulation_paths, MonteCarloSummary):
+        summary = simulation_paths
+        paths_to_draw = summary.sample_paths
+    else:
+        summary = MonteCarloSummary.from_paths(simulation_paths)
+        paths_to_draw = simulation_paths
+    paths_to_draw = _sample_columns(np.asarray(paths_to_draw), max_paths)
+
+    fig = _figure("monte_carlo", (12, 7))
+    ax = fig.gca()
+    days = np.arange(len(summary.mean))
+
+    # Abanico: una sola LineCollection rasterizada para la muestra de trayectorias
+    # (un único artista en lugar de uno por simulación)
+    if paths_to_draw.size:
+        segments = np.stack(np.broadcast_arrays(days[:, None], paths_to_draw), axis=-1).transpose(1, 0, 2)
+        ax.add_collection(LineCollection(segments, colors='blue', alpha=0.1, linewidths=1, rasterized=True))
+
+    # Media y percentiles (ya calculados en el resumen)
+    ax.plot(days, summary.mean, color='red', linewidth=2, label='Media')
+    ax.plot(days, summary.p50, color='orange', linestyle='--', linewidth=2, label='Mediana (P50)')
+    ax.plot(days, summary.p5, color='grey', linestyle=':', label='Percentil 5')
+    ax.plot(days, summary.p95, color='grey', linestyle=':', label='Percentil 95')
+
     # Rellenar el área de confianza
-    plt.fill_between(range(len(mean_path)), p5_path, p95_path, color='grey', alpha=0.2, label='Rango 90% Confianza')
+    ax.fill_between(days, summary.p5, summary.p95, color='grey', alpha=0.2, label='Rango 90% Confianza')
+    ax.autoscale_view()
 
-    plt.title(f"Simulación Monte Carlo: {title}")
-    plt.xlabel("Días a futuro")
-    plt.ylabel("Valor / Precio Simulado")
-    plt.legend()
-    plt.grid(True)
-    
-    print(f"Mostrando gráfico: {title}...")
-    plt.show()
+    ax.set_title(f"Simulación Monte Carlo: {title}")
+    ax.set_xlabel("Días a futuro")
+    ax.set_ylabel("Valor / Precio Simulado")
+    ax.legend()
+    ax.grid(True)
+    return _finish(fig, f"monte_carlo_{title}", title)
 
 
 def plot_normalized_prices(df_closes_common: pd.DataFrame):
-   
+
     if df_closes_common.empty:
         print("No hay datos para el gráfico de rendimiento normalizado.")
         return
 
-    print("Mostrando gráfico: Rendimiento Normalizado (Base 100)...")
-    
     # Normalizar: (precio_actual / precio_inicial) * 100
     normalized_df = (df_closes_common / df_closes_common.iloc[0]) * 100
-    
-    plt.figure(figsize=(12, 7))
-    plt.plot(normalized_df)
-    
-    plt.title("Rendimiento Normalizado (Base 100)")
-    plt.xlabel(f"Fecha (Desde {df_closes_common.index.min().date()})")
-    plt.ylabel("Rendimiento (Base 100)")
-    plt.legend(normalized_df.columns)
-    plt.grid(True)
-    plt.show()
+
+    fig = _figure("normalized", (12, 7))
+    ax = fig.gca()
+    ax.plot(normalized_df.index, normalized_df.to_numpy())
+
+    ax.set_title("Rendimiento Normalizado (Base 100)")
+    ax.set_xlabel(f"Fecha (Desde {df_closes_common.index.min().date()})")
+    ax.set_ylabel("Rendimiento (Base 100)")
+    if normalized_df.shape[1] <= LEGEND_MAX:
+        ax.legend(normalized_df.columns)
+    ax.grid(True)
+    return _finish(fig, "rendimiento_normalizado", "Rendimiento Normalizado (Base 100)")
 
 
 def plot_correlation_heatmap(corr_matrix: pd.DataFrame):
-  
+
     if corr_matrix.empty:
         print("No hay datos para el mapa de calor de correlación.")
         return
-        
-    print("Mostrando gráfico: Mapa de Calor de Correlación...")
-    
-    plt.figure(figsize=(10, 7))
+
+    n = len(corr_matrix)
+    if n > HEATMAP_MAX_ASSETS:
+        print(f" ¡Advertencia! {n} activos: el mapa de calor muestra solo los {HEATMAP_MAX_ASSETS} primeros.")
+        corr_matrix = corr_matrix.iloc[:HEATMAP_MAX_ASSETS, :HEATMAP_MAX_ASSETS]
+        n = HEATMAP_MAX_ASSETS
+
+    fig = _figure("heatmap", (10, 7))
     sns.heatmap(
-        corr_matrix, 
-        annot=True,     
-        cmap='coolwarm',  
-        fmt=".2f",        
-        linewidths=.5     
+        corr_matrix,
+        ax=fig.gca(),
+        annot=n <= HEATMAP_ANNOT_MAX,
+        cmap='coolwarm',
+        fmt=".2f",
+        linewidths=.5 if n <= HEATMAP_ANNOT_MAX else 0,
     )
-    plt.title("Mapa de Calor de Correlación (Retornos Logarítmicos)")
-    plt.show()
+    fig.gca().set_title("Mapa de Calor de Correlación (Retornos Logarítmicos)")
+    return _finish(fig, "correlacion", "Mapa de Calor de Correlación")
 
 
 def plot_weights_pie_chart(weights: dict, title: str):
     if not weights:
         print("No hay pesos definidos para el gráfico de tarta.")
         return
-        
-    print(f"Mostrando gráfico: {title}...")
 
     labels = weights.keys()
     sizes = weights.values()
-    
-    plt.figure(figsize=(8, 8))
-    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, pctdistance=0.85)
-    
+
+    fig = _figure("weights", (8, 8))
+    ax = fig.gca()
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, pctdistance=0.85)
+
     centre_circle = plt.Circle((0,0),0.70,fc='white')
-    fig = plt.gcf()
-    fig.gca().add_artist(centre_circle)
-    
-    plt.title(title)
-    plt.axis('equal') 
-    plt.show()
\ No newline at end of file
+    ax.add_artist(centre_circle)
+
+    ax.set_title(title)
+    ax.axis('equal')
+    return _finish(fig, f"pesos_{title}", title)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from src.normalization.normalizer import NUMERIC_COLS
+from .store import PriceStore
+
+# Tipos explícitos del formato largo (el que genera --to-csv): sin inferencia fila a fila
+LONG_DTYPES = {**{col: np.float64 for col in NUMERIC_COLS}, "ticker": "category", "source": "category"}
+
+
+def read_long_csv(path: str, symbols: Optional[Iterable[str]] = None, start=None, end=None) -> pd.DataFrame:
+    """
+    Lee un CSV largo (date, OHLCV, ticker, source) en una sola pasada tipada:
+    floats explícitos, `ticker`/`source` categóricos e índice de fechas ya parseado.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {col: dt for col, dt in LONG_DTYPES.items() if col in header}
+    df = pd.read_csv(path, dtype=dtypes, parse_dates=["date"], date_format="ISO8601",
+                     index_col="date")
+    if symbols is not None:
+        df = df[df["ticker"].isin(list(symbols))]
+    if start is not None or end is not None:
+        df = df.loc[(df.index >= pd.Timestamp(start or df.index.min()))
+                    & (df.index <= pd.Timestamp(end or df.index.max()))]
+    return df
+
+
+def split_by_ticker(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Reparte un DataFrame largo en uno por ticker con un único groupby."""
+    if df.empty or "ticker" not in df.columns:
+        return {}
+    out = {}
+    for ticker, part in df.groupby("ticker", observed=True, sort=False):
+        out[str(ticker)] = part if part.index.is_monotonic_increasing else part.sort_index()
+    return out
+
+
+def load_csv(path: str, symbols: Optional[Iterable[str]] = None, start=None, end=None) -> Dict[str, pd.DataFrame]:
+    return split_by_ticker(read_long_csv(path, symbols, start, end))
+
+
+def load_store(root: str, provider: Optional[str] = None, symbols: Optional[Iterable[str]] = None,
+               start=None, end=None) -> Dict[str, pd.DataFrame]:
+    """Lee del almacén local los tickers pedidos (o todos) de un proveedor."""
+    store = PriceStore(root)
+    if provider is None:
+        providers = store.providers()
+        if len(providers) != 1:
+            raise ValueError(f"El almacén {root} tiene varios proveedores ({', '.join(providers) or 'ninguno'}): "
+                             f"indica uno con --provider.")
+        provider = providers[0]
+    symbols = list(symbols) if symbols is not None else store.tickers(provider)
+    return store.read_many(symbols, provider, start=start, end=end)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote, unquote
+import numpy as np
+import pandas as pd
+
+from src.normalization.normalizer import STANDARD_COLS, NUMERIC_COLS
+
+DATA_COLS = [c for c in STANDARD_COLS if c != "date"]
+
+# Tipo binario de cada columna (little-endian, sin cabecera: se puede añadir al final)
+_DTYPES = {"date": np.dtype("<i8"), **{c: np.dtype("<f8") for c in NUMERIC_COLS}}
+_META = "meta.json"
+
+
+class PriceStore:
+    """
+    Almacén local columnar de históricos OHLCV, particionado por (proveedor, ticker):
+
+        <root>/<proveedor>/<ticker>/date.bin, open.bin, ..., volume.bin, meta.json
+
+    Cada columna es un fichero binario plano (fechas en ns como int64, precios y
+    volumen en float64) que se lee con np.memmap: leer un rango de fechas solo toca
+    las partes de los ficheros de las columnas pedidas. `ticker` y `source` se
+    guardan una vez en meta.json, no por fila. meta.json lleva el nº de filas
+    válidas y se reescribe de forma atómica al final de cada escritura, así que
+    un lector nunca ve una escritura a medias.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    # --- Rutas y metadatos ---
+    def _dir(self, ticker: str, provider: str) -> str:
+        # quote() para tickers como "EUR/USD" o "^GSPC"
+        return os.path.join(self.root, provider, quote(ticker, safe=""))
+
+    def _meta(self, ticker: str, provider: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self._dir(ticker, provider), _META), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(folder: str, meta: dict):
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(folder, _META))
+
+    def providers(self) -> List[str]:
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def tickers(self, provider: str) -> List[str]:
+        folder = os.path.join(self.root, provider)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(unquote(name) for name in os.listdir(folder)
+                      if os.path.exists(os.path.join(folder, name, _META)))
+
+    def last_date(self, ticker: str, provider: str) -> Optional[pd.Timestamp]:
+        meta = self._meta(ticker, provider)
+        if not meta or not meta["rows"]:
+            return None
+        return pd.Timestamp(meta["last_date"])
+
+    # --- Lectura ---
+    def _column(self, folder: str, col: str, rows: int) -> np.ndarray:
+        if rows == 0:
+            return np.empty(0, dtype=_DTYPES[col])
+        return np.memmap(os.path.join(folder, f"{col}.bin"), dtype=_DTYPES[col], mode="r", shape=(rows,))
+
+    def read(self, ticker: str, provider: str, start=None, end=None,
+             columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Lee una partición, opcionalmente solo [start, end] y solo algunas columnas.
+        Devuelve el formato estándar (índice `date`, columnas de STANDARD_COLS).
+        """
+        columns = list(columns) if columns is not None else DATA_COLS
+        meta = self._meta(ticker, provider)
+        if meta is None or meta["rows"] == 0:
+            return pd.DataFrame(columns=columns).set_index(pd.Index([], name="date"))
+
+        folder = self._dir(ticker, provider)
+        dates = self._column(folder, "date", meta["rows"])
+        # Rango de filas por búsqueda binaria sobre las fechas (ordenadas)
+        lo = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).value, side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, pd.Timestamp(end).value, side="right"))
+
+        index = pd.DatetimeIndex(np.array(dates[lo:hi]).view("datetime64[ns]"), name="date")
+        data = {}
+        for col in columns:
+            if col in NUMERIC_COLS:
+                data[col] = np.array(self._column(folder, col, meta["rows"])[lo:hi])
+            elif col in ("ticker", "source"):
+                data[col] = meta[col]
+        return pd.DataFrame(data, index=index, columns=columns)
+
+    def read_many(self, tickers: Iterable[str], provider: str, start=None, end=None,
+                  columns: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+        return {t: self.read(t, provider, start, end, columns) for t in tickers}
+
+    # --- Escritura ---
+    def merge(self, df: pd.DataFrame, ticker: str, provider: str) -> int:
+        """
+        Incorpora barras nuevas a la partición y devuelve cuántas filas se añadieron.
+        Si todas son posteriores a la última fecha guardada se añaden al final de cada
+        columna (coste proporcional a los datos nuevos); si no, se deduplica por fecha
+        (gana la barra nueva) y se reescribe la partición.
+        """
+        if df is None or df.empty:
+            return 0
+        df = df.sort_index()
+        df = df[~df.index.duplicated(keep="last")]
+        meta = self._meta(ticker, provider)
+
+        if meta is None or meta["rows"] == 0:
+            self._rewrite(df, ticker, provider)
+            return len(df)
+        if df.index.min() > pd.Timestamp(meta["last_date"]):
+            self._append(df, ticker, provider, meta)
+            return len(df)
+
+        stored = self.read(ticker, provider)
+        merged = pd.concat([stored, df.reindex(columns=stored.columns)])
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        self._rewrite(merged, ticker, provider)
+        return len(merged) - len(stored)
+
+    # Alias con el nombre habitual para añadir barras nuevas
+    append = merge
+
+    @staticmethod
+    def _arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        out = {"date": pd.DatetimeIndex(df.index).as_unit("ns").asi8.astype(_DTYPES["date"])}
+        for col in NUMERIC_COLS:
+            values = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+            out[col] = pd.to_numeric(values, errors="coerce").to_numpy(dtype=_DTYPES[col])
+        return out
+
+    def _new_meta(self, df: pd.DataFrame, ticker: str, provider: str, rows: int, old: Optional[dict] = None) -> dict:
+        source = old["source"] if old else provider
+        if "source" in df.columns and not df["source"].isna().all():
+            source = str(df["source"].dropna().iloc[0])
+        return {"ticker": ticker, "source": source, "rows": rows,
+                "last_date": pd.Timestamp(df.index.max()).isoformat()}
+
+    def _append(self, df: pd.DataFrame, ticker: str, provider: str, meta: dict):
+        folder = self._dir(ticker, provider)
+        rows = meta["rows"]
+        for col, arr in self._arrays(df).items():
+            path = os.path.join(folder, f"{col}.bin")
+            with open(path, "r+b") as f:
+                # Si una escritura anterior se interrumpió, descartamos lo que quedó tras `rows`
+                f.truncate(rows * _DTYPES[col].itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(arr.tobytes())
+        self._write_meta(folder, self._new_meta(df, ticker, provider, rows + len(df), meta))
+
+    def _rewrite(self, df: pd.DataFrame, ticker: str, provider: str):
+        folder = self._dir(ticker, provider)
+        os.makedirs(folder, exist_ok=True)
+        old = self._meta(ticker, provider)
+        for col, arr in self._arrays(df).items():
+            fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(arr.tobytes())
+            os.replace(tmp, os.path.join(folder, f"{col}.bin"))
+        self._write_meta(folder, self._new_meta(df, ticker, provider, len(df), old))
+
+    def delete(self, ticker: str, provider: str):
+        shutil.rmtree(self._dir(ticker, provider), ignore_errors=True)
+
+    # --- Migración desde los CSV largos (tickers_data.csv, apple_data.csv...) ---
+    def import_long_frame(self, df: pd.DataFrame, provider: Optional[str] = None) -> Dict[str, int]:
+        """Guarda un DataFrame largo (índice date, columnas ticker/source) partición a partición."""
+        added = {}
+        keys = ["source", "ticker"] if provider is None and "source" in df.columns else ["ticker"]
+        for key, part in df.groupby(keys, sort=False, observed=True):
+            key = key if isinstance(key, tuple) else (key,)
+            prov, tick = (key if len(key) == 2 else (provider, key[0]))
+            added[str(tick)] = self.merge(part, str(tick), str(prov))
+        return added
+
+    def import_csv(self, path: str, provider: Optional[str] = None) -> Dict[str, int]:
+        """Migra un CSV largo de los que genera --to-csv al almacén columnar."""
+        df = pd.read_csv(path, parse_dates=["date"], index_col="date")
+        return self.import_long_frame(df, provider)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Optional
+import pandas as pd
+
+from src.extractors.base import BaseExtractor
+from src.extractors.runner import fetch_many, fetch_many_async
+from src.normalization.normalizer import Normalizer
+from .store import PriceStore
+
+
+def sync_history(
+    store: PriceStore,
+    extractor: BaseExtractor,
+    symbols: Iterable[str],
+    normalize_one: Callable[[dict, str], pd.DataFrame],
+    end: Optional[str] = None,
+    max_workers: int = 8,
+    engine: str = "thread",
+    concurrency: int = 64,
+    normalizer: Optional[Normalizer] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Sincronización incremental: para cada símbolo pide a la API solo las barras
+    posteriores a la última fecha guardada en el almacén, las normaliza, las
+    incorpora al almacén y devuelve el histórico completo desde el almacén.
+    """
+    provider = extractor.PROVIDER
+    symbols = list(symbols)
+    normalizer = normalizer or Normalizer()
+    today = date.today()
+
+    # 1. Plan: fecha de inicio que falta por símbolo (None = histórico completo)
+    last_dates = {s: store.last_date(s, provider) for s in symbols}
+    starts = {}
+    for sym, last in last_dates.items():
+        if last is not None and last.date() >= today:
+            continue  # ya al día, no se pide nada
+        starts[sym] = (last.date() + timedelta(days=1)).isoformat() if last is not None else None
+
+    up_to_date = [s for s in symbols if s not in starts]
+    for sym in up_to_date:
+        print(f"= {sym} ya estaba al día ({last_dates[sym].date()}).")
+
+    # 2. Descarga solo del rango que falta
+    fetched = {}
+    if starts and hasattr(extractor, "history_many"):
+        # Proveedores con peticiones multi-símbolo (MarketStack): un lote por fecha de inicio
+        by_start: Dict[Optional[str], list] = {}
+        for sym, start in starts.items():
+            by_start.setdefault(start, []).append(sym)
+        for start, group in by_start.items():
+            try:
+                raw = extractor.history_many(group, start=start, end=end)
+                fetched.update(normalizer.split_marketstack_eod(raw, group))
+            except Exception as e:
+                print(f"⚠️ Error al descargar {', '.join(group)}: {e}")
+    elif starts and engine == "async":
+        afetch_one = lambda s: extractor.ahistory(s, start=starts[s], end=end)
+        fetched = fetch_many_async(list(starts), afetch_one, normalize_one,
+                                   concurrency=concurrency, on_close=extractor.aclose)
+    elif starts:
+        fetch_one = lambda s: extractor.history(s, start=starts[s], end=end)
+        fetched = fetch_many(list(starts), fetch_one, normalize_one, max_workers=max_workers)
+
+    # 3. Fusión y deduplicado en el almacén
+    for sym, df in fetched.items():
+        last = last_dates[sym]
+        if last is not None and not df.empty:
+            # Hay APIs (AlphaVantage) que no filtran por fecha: descartamos lo ya guardado
+            df = df[df.index > last]
+        added = store.merge(df, sym, provider)
+        print(f"+ {sym}: {added} barras nuevas en el almacén.")
+
+    return {s: store.read(s, provider) for s in symbols}
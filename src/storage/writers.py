@@ -0,0 +1,145 @@
+from __future__ import annotations
+import bz2
+import gzip
+import io
+import lzma
+import os
+import re
+from typing import Callable, Dict, IO, List, Optional
+import pandas as pd
+
+# Escritores incrementales: cada símbolo se escribe en cuanto llega (p. ej. desde el
+# callback on_result de fetch_many) y se puede liberar, en vez de concatenar todo en
+# memoria y escribir al final. El formato sale del sufijo de la ruta:
+#   .csv  -> CSV con una cabecera              .jsonl / .ndjson -> un objeto JSON por línea
+#   .json -> array JSON de registros           + .gz / .bz2 / .xz -> comprimido
+# Si la ruta contiene "{ticker}" se escribe un fichero por ticker: "datos/{ticker}.csv.gz".
+
+_COMPRESSORS: Dict[str, Callable[..., IO]] = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+FORMATS = ("csv", "jsonl", "json")
+PARTITION_KEY = "{ticker}"
+
+
+def split_suffix(path: str):
+    """(formato, compresión) a partir del sufijo: "a.csv.gz" -> ("csv", ".gz")."""
+    root, ext = os.path.splitext(path.lower())
+    compression = None
+    if ext in _COMPRESSORS:
+        compression = ext
+        root, ext = os.path.splitext(root)
+    fmt = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "json"}.get(ext)
+    return fmt, compression
+
+
+def _open_text(path: str, compression: Optional[str], append: bool = False) -> IO[str]:
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    mode = "a" if append else "w"
+    if compression is None:
+        return open(path, mode, encoding="utf-8", newline="")
+    # gzip/bz2/xz admiten añadir un nuevo bloque comprimido al final del fichero
+    return io.TextIOWrapper(_COMPRESSORS[compression](path, mode + "b"), encoding="utf-8", newline="")
+
+
+class FrameWriter:
+    """Escribe DataFrames normalizados (índice `date`) uno tras otro en un único fichero."""
+
+    def __init__(self, path: str, fmt: Optional[str] = None, append: bool = False):
+        suffix_fmt, compression = split_suffix(path)
+        self.fmt = fmt or suffix_fmt
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Formato de salida no reconocido para {path} (usa .csv, .jsonl o .json, "
+                             f"opcionalmente con .gz/.bz2/.xz)")
+        if append and self.fmt == "json":
+            raise ValueError(f"No se puede añadir a un array JSON ya cerrado ({path}); usa .jsonl.")
+        self.path = path
+        self.rows = 0
+        self.frames = 1 if append else 0  # al añadir, la cabecera del CSV ya existe
+        self._columns: Optional[List[str]] = None
+        self._f = _open_text(path, compression, append)
+        if self.fmt == "json":
+            self._f.write("[")
+
+    def write(self, df: pd.DataFrame, ticker: Optional[str] = None):
+        """Añade `df` al fichero (`ticker` se ignora; misma firma que PartitionedWriter)."""
+        if df is None or df.empty:
+            return
+        if self._columns is None:
+            self._columns = list(df.columns)
+        elif list(df.columns) != self._columns:
+            # Un solo esquema por fichero (la cabecera del CSV ya está escrita)
+            df = df.reindex(columns=self._columns)
+
+        if self.fmt == "csv":
+            df.to_csv(self._f, header=self.frames == 0, index=True)
+        else:
+            records = df.reset_index().to_json(orient="records", lines=self.fmt == "jsonl",
+                                               date_format="iso")
+            if self.fmt == "jsonl":
+                self._f.write(records if records.endswith("\n") else records + "\n")
+            else:
+                # "[{...},{...}]" -> se quitan los corchetes y se encadena con comas
+                self._f.write(("," if self.rows else "") + records[1:-1])
+        self.rows += len(df)
+        self.frames += 1
+
+    def close(self):
+        if self._f.closed:
+            return
+        if self.fmt == "json":
+            self._f.write("]")
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class PartitionedWriter:
+    """Un fichero por ticker a partir de una plantilla con "{ticker}"."""
+
+    def __init__(self, template: str, fmt: Optional[str] = None):
+        if PARTITION_KEY not in template:
+            raise ValueError(f"La ruta particionada debe contener {PARTITION_KEY}: {template}")
+        self.template = template
+        self.fmt = fmt
+        self.rows = 0
+        self.files: Dict[str, str] = {}
+
+    def write(self, df: pd.DataFrame, ticker: str):
+        if df is None or df.empty:
+            return
+        path = self.files.get(ticker)
+        if path is None:
+            # Caracteres no válidos en nombres de fichero ("EUR/USD" -> "EUR_USD")
+            safe = re.sub(r"[^0-9A-Za-z._-]+", "_", ticker)
+            path = self.files[ticker] = self.template.replace(PARTITION_KEY, safe)
+            writer = FrameWriter(path, self.fmt)
+        else:
+            writer = FrameWriter(path, self.fmt, append=True)
+        writer.write(df)
+        self.rows += len(df)
+        # Se cierra enseguida: con miles de tickers no se acumulan ficheros abiertos
+        writer.close()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def open_writer(path: str, fmt: Optional[str] = None, default_fmt: Optional[str] = None):
+    """FrameWriter, o PartitionedWriter si la ruta contiene "{ticker}".
+    `default_fmt` se usa si el sufijo de la ruta no indica el formato."""
+    if fmt is None and split_suffix(path)[0] is None:
+        fmt = default_fmt
+    return PartitionedWriter(path, fmt) if PARTITION_KEY in path else FrameWriter(path, fmt)